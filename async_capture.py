@@ -0,0 +1,182 @@
+"""
+FalconEye Async Capture
+asyncio engine that polls many snapshot (ESP32) cameras from one event loop
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+from frame_capture import SnapshotWorker
+from mjpeg_parser import SOI
+
+
+def is_available():
+    return aiohttp is not None
+
+
+class AsyncCaptureEngine:
+    """Runs every snapshot camera as a coroutine on one background event loop.
+
+    All cameras share a single aiohttp connection pool (keep-alive per camera
+    host), and each request has its own deadline, so one slow camera never
+    delays the others. Frames land in the same per-camera slots and frame bus
+    as the threaded workers'.
+
+    The event loop never decodes. Frames of cameras with a live viewer or
+    recorder are decoded on a pool of `decode_threads` threads, at most
+    `decode_queue` at a time; when the pool is behind, a frame stays undecoded
+    and its first consumer decodes it. Frames nobody watches are not decoded
+    here, so the detection loop can still use its reduced-size decode.
+    """
+
+    def __init__(self, max_connections=100, max_connections_per_host=2, decode_threads=2, decode_queue=None):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is not installed (pip install aiohttp)")
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.decode_threads = max(1, int(decode_threads))
+        self._decoder = ThreadPoolExecutor(max_workers=self.decode_threads, thread_name_prefix="capture-decode")
+        self._decode_slots = threading.BoundedSemaphore(decode_queue or 2 * self.decode_threads)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._tasks = {}
+        # Stats
+        self.decoded = 0
+        self.decode_skipped = 0
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="capture-async", daemon=True)
+            self._thread.start()
+            print(f"[CAPTURE] Async capture engine started (pool of {self.max_connections} connections)")
+            return self._loop
+
+    async def _get_session(self):
+        # The session must be created on the engine's loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, headers={
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+                'Accept': 'image/jpeg,image/*,*/*',
+            })
+        return self._session
+
+    def add(self, worker):
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._poll(worker), loop)
+        with self._lock:
+            self._tasks[worker] = future
+
+    def remove(self, worker):
+        with self._lock:
+            future = self._tasks.pop(worker, None)
+        if future is not None:
+            future.cancel()
+
+    def is_running(self, worker):
+        with self._lock:
+            future = self._tasks.get(worker)
+        return future is not None and not future.done()
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for f in self._tasks.values() if not f.done())
+        return {"engine": "asyncio", "cameras": running, "max_connections": self.max_connections,
+                "decode_threads": self.decode_threads, "decoded": self.decoded,
+                "decode_skipped": self.decode_skipped}
+
+    def _decode(self, frame):
+        """Decode `frame` on the pool, or leave it to its consumers if the pool is behind."""
+        if not self._decode_slots.acquire(blocking=False):
+            self.decode_skipped += 1
+            return
+        future = self._decoder.submit(lambda: frame.image)
+        future.add_done_callback(self._decode_done)
+
+    def _decode_done(self, future):
+        self._decode_slots.release()
+        self.decoded += 1
+
+    async def _poll(self, worker):
+        print(f"[CAPTURE] Starting async snapshot capture for {worker.cam_id} at {worker.url}")
+        session = await self._get_session()
+        try:
+            while not worker._stop.is_set():
+                url = worker.paths.active
+                failover = False
+                started = time.monotonic()
+                try:
+                    timeout = aiohttp.ClientTimeout(total=worker.paths.timeout(worker.timeout))
+                    async with session.get(url, timeout=timeout) as resp:
+                        if resp.status != 200:
+                            raise RuntimeError(f"status {resp.status}")
+                        body = await resp.read()
+                    elapsed = time.monotonic() - started
+                    worker._record_rtt(elapsed)
+                    # A stopped worker (URL changed) must not publish over its replacement
+                    if worker._stop.is_set():
+                        break
+                    if body[:2] == SOI:
+                        frame = worker._frame_ok(body)
+                        worker.paths.record_ok(url, elapsed, len(body))
+                        if frame is not None and worker.has_demand():
+                            # A viewer needs the pixels: decode off the loop, ahead of it
+                            self._decode(frame)
+                    else:
+                        worker._frame_failed("not a JPEG")
+                        failover = worker._path_failed(url)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    worker._frame_failed(str(e) or type(e).__name__)
+                    failover = worker._path_failed(url)
+                    if worker.consecutive_failures % 20 == 0:
+                        print(f"[CAPTURE] {worker.cam_id} error (attempt {worker.consecutive_failures}): {e!r}")
+                if failover:
+                    # Another path is healthy: fetch this frame from it now instead of backing off
+                    continue
+                # Pace from the start of the request so the rate holds under latency
+                interval = worker.rate.next_interval(worker.has_demand(), worker.consecutive_failures)
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            print(f"[CAPTURE] Async snapshot capture for {worker.cam_id} stopped")
+
+
+class AsyncSnapshotWorker(SnapshotWorker):
+    """SnapshotWorker whose polling runs as a coroutine on an AsyncCaptureEngine."""
+
+    kind = "snapshot-async"
+
+    def __init__(self, cam_id, url, bus=None, engine=None, **options):
+        super().__init__(cam_id, url, bus, **options)
+        if engine is None:
+            raise ValueError("AsyncSnapshotWorker needs an AsyncCaptureEngine")
+        self.engine = engine
+
+    def start(self):
+        if self.is_alive():
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self.engine.add(self)
+
+    def stop(self):
+        self._stop.set()
+        self.engine.remove(self)
+
+    def is_alive(self):
+        return self.engine.is_running(self)
@@ -8,18 +8,27 @@ import threading
 import requests
 import numpy as np
 from datetime import datetime, timezone, timedelta
+from urllib.parse import urlparse
 import concurrent.futures
+import socket
+import functools
 import multiprocessing
 from concurrent.futures import TimeoutError as FutureTimeoutError
 try:
     import faces_worker
 except Exception:
     faces_worker = None
-from ultralytics import YOLO
+# Web workers (FALCONEYE_ROLE=web) send inference to the inference service and never import torch
+FALCONEYE_ROLE = os.getenv("FALCONEYE_ROLE", "all").lower()
+# Detector engine: ultralytics (torch) or onnx (ONNX Runtime; torch is only needed to export once)
+INFERENCE_ENGINE = os.getenv("FALCONEYE_ENGINE", "ultralytics").lower()
+USE_TORCH = FALCONEYE_ROLE != "web" and INFERENCE_ENGINE != "onnx"
+if USE_TORCH:
+    from ultralytics import YOLO
+    import torch
 from flask import Flask, request, jsonify, Response, send_from_directory, send_file, render_template_string, redirect, url_for, session
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
-import torch
 from collections import defaultdict, deque
 import base64
 try:
@@ -34,25 +43,45 @@ except Exception:
     face_recognition = None
 # Removed Firebase imports - using local notifications now
 from local_notification_service import notification_service, send_push_notification, send_security_alert, send_test_notification, get_notification_status
+import async_capture
+from camera_health import CameraHealthMonitor
+from camera_paths import PathProber
+from clip_writer import ClipWriter
+from esp32_control import ResolutionController, parse_mode
+from detection_cache import DetectionCache
+from detection_zones import CameraZones, ZoneStore
+from inference_engine import load_onnx
+from inference_scheduler import InferenceScheduler
+from inference_service import (DEFAULT_ADDRESS as DEFAULT_INFERENCE_ADDRESS, InferenceServer, RemoteCaptureWorker,
+                               RemoteModel, ServiceClient)
+from latency import FrameTimer, LatencyTracker
+from motion_gate import MotionGate, camera_settings as motion_camera_settings, restrict as restrict_to_motion
+from network_profiles import ProfileSelector
+from frame_journal import JournalRecorder
+from frame_bus import FrameBus, EVERY as FRAME_BUS_EVERY, LATEST as FRAME_BUS_LATEST
+from frame_capture import (WORKER_TYPES, CaptureManager, CapturedFrame, camera_candidates, copy_frame, frame_copies,
+                           normalize_cameras)
 
 # ---------------- CONFIG ----------------
 # Dynamic Network Profiles: define multiple IP groups; the app will auto-select
 # the first reachable profile on startup. Env vars override when set.
 
+# Each camera is {"url": ..., "type": "snapshot" | "mjpeg" | "rtsp"}; a bare URL
+# string is still accepted and its type guessed from the URL.
 NETWORK_PROFILES = [
     {
         "name": "home",
         "cameras": {
-            "cam1": "http://10.103.190.6/jpg",         # ESP32 snapshot (update if different IP)
-            "cam2": "http://10.103.190.170:8081/",     # Pi Zero MJPEG
+            "cam1": {"url": "http://10.103.190.6/jpg", "type": "snapshot"},       # ESP32 snapshot (update if different IP)
+            "cam2": {"url": "http://10.103.190.170:8081/", "type": "mjpeg"},      # Pi Zero MJPEG
         },
         "esp_pan_base": "http://10.103.190.58",
     },
     {
         "name": "hotspot",
         "cameras": {
-            "cam1": "http://10.103.190.6/jpg",
-            "cam2": "http://10.103.190.170:8081/",
+            "cam1": {"url": "http://10.103.190.6/jpg", "type": "snapshot"},
+            "cam2": {"url": "http://10.103.190.170:8081/", "type": "mjpeg"},
         },
         "esp_pan_base": "http://10.103.190.58",
     },
@@ -69,44 +98,99 @@ except Exception:
 
 # Helper to test reachability quickly
 def _is_reachable(url: str, timeout: float = 0.8) -> bool:
+    if url.startswith("file://"):
+        return os.path.exists(url[len("file://"):])
+    if url.startswith(("rtsp://", "rtsps://")):
+        # No HTTP here: a TCP connect to the RTSP port is enough
+        try:
+            parsed = urlparse(url)
+            with socket.create_connection((parsed.hostname, parsed.port or 554), timeout=timeout):
+                return True
+        except Exception:
+            return False
+    if _is_streaming(url):
+        # A capture worker is receiving frames from it right now: no request needed
+        return True
     try:
-        # For MJPEG base URLs we may need a concrete path, but doing a GET should still return something
-        r = requests.get(url, timeout=timeout, stream=True)
-        return r.status_code >= 200 and r.status_code < 500
+        # HEAD first: never opens an MJPEG stream (and its camera-side client slot)
+        with requests.head(url, timeout=timeout, allow_redirects=True) as r:
+            if r.status_code < 500 and r.status_code not in (405, 501):
+                return r.status_code >= 200
+        # Servers without HEAD: ask for one byte and drop the connection unread
+        with requests.get(url, timeout=timeout, stream=True, headers={"Range": "bytes=0-0"}) as r:
+            return r.status_code >= 200 and r.status_code < 500
     except Exception:
         return False
 
+def _is_streaming(url: str, max_age: float = 5.0) -> bool:
+    """True if a capture worker is currently receiving fresh frames from `url`."""
+    for worker in capture_manager.workers():
+        if url in (worker.url, worker.paths.active):
+            return worker.latest_frame(max_age=max_age) is not None
+    return False
+
 def _select_active_profile() -> dict:
     # Env direct overrides take precedence
     env_cam1 = os.getenv("CAM1_URL")
     env_cam2 = os.getenv("CAM2_URL")
     env_pan = os.getenv("ESP_PAN_BASE_URL")
     if env_cam1 or env_cam2 or env_pan:
-        cams = {
-            "cam1": env_cam1 or NETWORK_PROFILES[0]["cameras"]["cam1"],
-            "cam2": env_cam2 or NETWORK_PROFILES[0]["cameras"]["cam2"],
-        }
+        cams = dict(NETWORK_PROFILES[0]["cameras"])
+        for cam_id, env_url in (("cam1", env_cam1), ("cam2", env_cam2)):
+            env_type = os.getenv(f"{cam_id.upper()}_TYPE")
+            if env_url:
+                # Comma-separated: candidate URLs for the same camera (e.g. LAN, then tunnel)
+                env_urls = [u.strip() for u in env_url.split(",") if u.strip()]
+                env_url = env_urls if len(env_urls) > 1 else env_urls[0]
+                cams[cam_id] = {"url": env_url, "type": env_type} if env_type else env_url
         return {"name": "env_override", "cameras": cams, "esp_pan_base": env_pan or NETWORK_PROFILES[0]["esp_pan_base"]}
 
-    # Probe each profile; consider it valid if at least cam1 or cam2 is reachable
-    for profile in NETWORK_PROFILES:
-        cam1_url = profile["cameras"].get("cam1")
-        cam2_url = profile["cameras"].get("cam2")
-        ok1 = _is_reachable(cam1_url) if cam1_url else False
-        # For MJPEG streams, hit the base or append a simple param to avoid caching
-        ok2 = _is_reachable(cam2_url) if cam2_url else False
-        if ok1 or ok2:
-            return profile
-    # Fallback to first profile if none reachable
+    # Start on the first profile without blocking; profile_selector probes all
+    # profiles concurrently in the background and switches once they answer
     return NETWORK_PROFILES[0]
 
 ACTIVE_PROFILE = _select_active_profile()
-CAMERAS = ACTIVE_PROFILE["cameras"].copy()
+# CAMERAS maps cam_id -> URL; CAMERA_TYPES maps cam_id -> capture type;
+# CAMERA_CANDIDATES maps cam_id -> every URL the camera can be reached at (first = CAMERAS)
+CAMERAS, CAMERA_TYPES = normalize_cameras(ACTIVE_PROFILE["cameras"])
+CAMERA_CANDIDATES = camera_candidates(ACTIVE_PROFILE["cameras"])
+
+CAMERA_TYPE_LABELS = {"snapshot": "ESP32", "mjpeg": "Pi Zero MJPEG", "rtsp": "RTSP"}
+
+def camera_label(cam_id):
+    """Human-readable camera type for overlays and logs"""
+    return CAMERA_TYPE_LABELS.get(CAMERA_TYPES.get(cam_id), "Camera")
 
 # Pan (PTZ) controller for Pi Zero mount (ESP8266/ESP32 HTTP endpoints)
 # You can override via environment variable ESP_PAN_BASE_URL
 ESP_PAN_BASE_URL = os.getenv("ESP_PAN_BASE_URL", ACTIVE_PROFILE.get("esp_pan_base", "http://192.168.31.75"))
 
+_profile_lock = threading.Lock()
+
+def _apply_profile(profile):
+    """Switch ACTIVE_PROFILE, CAMERAS, CAMERA_TYPES and CAMERA_CANDIDATES to `profile` in one step.
+
+    New dicts are built first and swapped in under a lock, so readers never
+    see cameras from two profiles; capture workers whose URL changed restart.
+    """
+    global ACTIVE_PROFILE, CAMERAS, CAMERA_TYPES, CAMERA_CANDIDATES, ESP_PAN_BASE_URL
+    urls, types = normalize_cameras(profile.get("cameras", {}))
+    candidates = camera_candidates(profile.get("cameras", {}))
+    with _profile_lock:
+        ACTIVE_PROFILE, CAMERAS, CAMERA_TYPES, CAMERA_CANDIDATES = profile, urls, types, candidates
+        ESP_PAN_BASE_URL = profile.get("esp_pan_base", ESP_PAN_BASE_URL)
+        profile_selector.current = profile
+        if capture_manager.started:
+            capture_manager.sync(urls, types, candidates)
+
+# Background profile selection (FALCONEYE_PROFILE_REPROBE_INTERVAL=0 probes once at startup)
+profile_selector = ProfileSelector(NETWORK_PROFILES, _is_reachable, _apply_profile, current=ACTIVE_PROFILE,
+                                   deadline=float(os.getenv("FALCONEYE_PROFILE_PROBE_DEADLINE", "2")),
+                                   interval=float(os.getenv("FALCONEYE_PROFILE_REPROBE_INTERVAL", "60")))
+if ACTIVE_PROFILE.get("name") == "env_override":
+    # Cameras given explicitly in the environment: never switch away from them
+    profile_selector.pin()
+
 # Test mode - set to True to use test images instead of ESP32
 TEST_MODE = False
 
@@ -194,15 +278,28 @@ os.environ.setdefault("OMP_NUM_THREADS", os.environ.get("OMP_NUM_THREADS", "1"))
 os.environ.setdefault("MKL_NUM_THREADS", os.environ.get("MKL_NUM_THREADS", "1"))
 try:
     # reduce torch thread usage to avoid oversubscription
-    torch.set_num_threads(int(os.environ.get("OMP_NUM_THREADS", "1")))
-    torch.set_num_interop_threads(int(os.environ.get("OMP_NUM_THREADS", "1")))
+    if USE_TORCH:
+        torch.set_num_threads(int(os.environ.get("OMP_NUM_THREADS", "1")))
+        torch.set_num_interop_threads(int(os.environ.get("OMP_NUM_THREADS", "1")))
 except Exception:
     pass
 # ---------------- Device Selection ----------------
 # Allow overriding device via environment variable for stability or testing.
 # Supported values: "cuda", "mps", "cpu". If not set, auto-detect.
 FALCONEYE_DEVICE_OVERRIDE = os.getenv("FALCONEYE_DEVICE", "auto").lower()
-if FALCONEYE_DEVICE_OVERRIDE == "cuda":
+# Where the inference service listens: a Unix socket path, or host:port across containers
+INFERENCE_ADDRESS = os.getenv("FALCONEYE_INFERENCE_ADDRESS", DEFAULT_INFERENCE_ADDRESS)
+if FALCONEYE_ROLE == "web":
+    # The inference service owns the device; its status endpoints report it
+    DEVICE = "remote"
+    GPU_NAME = None
+    print(f"[INFO] Web worker: inference via {INFERENCE_ADDRESS}")
+elif INFERENCE_ENGINE == "onnx":
+    # ONNX Runtime: CPU, or its CUDA provider when requested and installed (checked at model load)
+    DEVICE = "cuda" if FALCONEYE_DEVICE_OVERRIDE == "cuda" else "cpu"
+    GPU_NAME = None
+    print(f"[INFO] ONNX Runtime engine, device -> {DEVICE.upper()}")
+elif FALCONEYE_DEVICE_OVERRIDE == "cuda":
     DEVICE = "cuda"
     GPU_NAME = torch.cuda.get_device_name(0) if torch.cuda.is_available() else None
     print(f"[INFO] Forcing device -> CUDA (requested). GPU: {GPU_NAME}")
@@ -234,12 +331,36 @@ else:
 # Defaults can be overridden via env vars for quick tuning
 DETECT_MODEL_NAME = os.getenv("FALCONEYE_DETECT_MODEL", "yolov8s.pt")
 LIVE_MODEL_NAME = os.getenv("FALCONEYE_LIVE_MODEL", "yolov8n.pt")
+# The detector letterboxes to this size; the detection loop decodes camera JPEGs
+# with libjpeg's 1/2, 1/4 or 1/8 scaling down to about this size instead of full-res
+DETECT_INPUT_SIZE = int(os.getenv("FALCONEYE_DETECT_INPUT_SIZE", "640"))
+REDUCED_DECODE = os.getenv("FALCONEYE_REDUCED_DECODE", "true").lower() in ("1", "true", "yes")
+# Minimum seconds between two inferences in the background detection loop
+DETECT_INTERVAL = float(os.getenv("FALCONEYE_DETECT_INTERVAL", "0.5"))
+
+# ONNX engine: INT8 quantization (none, dynamic, or static calibrated on recorded frames)
+ONNX_QUANTIZE = os.getenv("FALCONEYE_ONNX_QUANTIZE", "none").lower()
+ONNX_CALIBRATION = os.getenv("FALCONEYE_ONNX_CALIBRATION", "")
+ONNX_THREADS = int(os.getenv("FALCONEYE_ONNX_THREADS", "0"))
 
 def _safe_load_yolo(name: str, device: str):
     """Try to load YOLO model to the requested device. On failure, fall back to CPU.
 
+    With FALCONEYE_ENGINE=onnx the weights are exported (and quantized) for
+    ONNX Runtime on first use.
+
     Returns (model, actual_device)
     """
+    if INFERENCE_ENGINE == "onnx":
+        try:
+            print(f"[INFO] Loading model {name} -> ONNX Runtime {device} (quantize: {ONNX_QUANTIZE})")
+            m = load_onnx(name, device, imgsz=DETECT_INPUT_SIZE, quantize=ONNX_QUANTIZE,
+                          calibration=ONNX_CALIBRATION, threads=ONNX_THREADS or None)
+            print(f"[INFO] Model {os.path.basename(m.path)} loaded on {m.device}")
+            return m, m.device
+        except Exception as e:
+            print(f"[ERROR] Failed to initialize ONNX model {name}: {e}")
+            raise
     try:
         print(f"[INFO] Loading model {name} -> {device}")
         m = YOLO(name)
@@ -262,21 +383,40 @@ def _safe_load_yolo(name: str, device: str):
         raise
 
 # Load models with safe fallback to CPU if needed
-try:
-    model, _actual = _safe_load_yolo(DETECT_MODEL_NAME, DEVICE)
-    # If we had to fall back to CPU, update DEVICE to reflect actual runtime
-    if _actual != DEVICE:
-        print(f"[WARN] Device fallback: requested {DEVICE} but using {_actual}")
-        DEVICE = _actual
-except Exception:
-    print("[ERROR] Unable to load detect model. Exiting.")
-    raise
+if FALCONEYE_ROLE == "web":
+    # Proxies to the inference service's models; they also stand in for the schedulers below
+    model = RemoteModel("detect", INFERENCE_ADDRESS)
+    live_model = RemoteModel("live", INFERENCE_ADDRESS)
+else:
+    try:
+        model, _actual = _safe_load_yolo(DETECT_MODEL_NAME, DEVICE)
+        # If we had to fall back to CPU, update DEVICE to reflect actual runtime
+        if _actual != DEVICE:
+            print(f"[WARN] Device fallback: requested {DEVICE} but using {_actual}")
+            DEVICE = _actual
+    except Exception:
+        print("[ERROR] Unable to load detect model. Exiting.")
+        raise
 
-try:
-    live_model, _ = _safe_load_yolo(LIVE_MODEL_NAME, DEVICE)
-except Exception:
-    print("[ERROR] Unable to load live model. Exiting.")
-    raise
+    try:
+        live_model, _ = _safe_load_yolo(LIVE_MODEL_NAME, DEVICE)
+    except Exception:
+        print("[ERROR] Unable to load live model. Exiting.")
+        raise
+
+# All inference goes through one scheduler thread per model, which batches the
+# frames of every camera loop and live stream into one forward pass
+INFERENCE_MAX_BATCH = int(os.getenv("FALCONEYE_INFERENCE_MAX_BATCH", "8"))
+INFERENCE_MAX_WAIT = float(os.getenv("FALCONEYE_INFERENCE_MAX_WAIT_MS", "20")) / 1000.0
+if FALCONEYE_ROLE == "web":
+    detect_scheduler, live_scheduler = model, live_model
+else:
+    detect_scheduler = InferenceScheduler(model, "detect", max_batch=INFERENCE_MAX_BATCH, max_wait=INFERENCE_MAX_WAIT)
+    live_scheduler = InferenceScheduler(live_model, "live", max_batch=INFERENCE_MAX_BATCH, max_wait=INFERENCE_MAX_WAIT)
+
+# Detections per (camera, frame seq, model): snapshots, live viewers and the detection
+# loop asking about the same frame share one inference
+detection_cache = DetectionCache(maxsize=int(os.getenv("FALCONEYE_DETECTION_CACHE_SIZE", "512")))
 
 # ---------------- Face recognition toggle ----------------
 # Allow disabling face_recognition (dlib) to keep live stream lightweight.
@@ -373,6 +513,11 @@ CORS(app)
 
 # Vision settings (overlay controls)
 VISION_SETTINGS_FILE = os.path.join(os.getcwd(), "vision_settings.json")
+# Per-camera include/exclude polygons applied before inference in the detection loop
+DETECTION_ZONES_FILE = os.path.join(os.getcwd(), os.getenv("FALCONEYE_DETECTION_ZONES_FILE", "detection_zones.json"))
+detection_zones = ZoneStore(DETECTION_ZONES_FILE)
+# No zones: the whole frame (maps boxes from a motion crop back to the frame)
+WHOLE_FRAME = CameraZones()
 DEFAULT_VISION_SETTINGS = {
     "show_boxes": True,
     "show_labels": True,
@@ -403,10 +548,27 @@ DEFAULT_VISION_SETTINGS = {
         "motorcycle": "#00BCD4",
         "dog": "#9C27B0",
         "cat": "#E91E63"
+    },
+    # Motion gate in front of the detection loop; "cameras" holds per-camera overrides,
+    # e.g. {"cam2": {"sensitivity": 30, "min_area": 0.01}}
+    "motion": {
+        "enabled": os.getenv("FALCONEYE_MOTION_GATE", "true").lower() in ("1", "true", "yes"),
+        "method": "mog2",           # "mog2" or "diff"
+        "sensitivity": 16,          # pixel change threshold, lower = more sensitive
+        "min_area": 0.002,          # smallest moving blob, fraction of the frame
+        "hold": 2.0,                # keep detecting this many seconds after motion stops
+        "keepalive": float(os.getenv("FALCONEYE_MOTION_KEEPALIVE", "10")),
+        "crop": True,               # on motion, run the detector only around the moving region
+        "cameras": {}
     }
 }
 
 VISION_SETTINGS = DEFAULT_VISION_SETTINGS.copy()
+# The settings file is re-read when it changes (checked at most every few seconds), so a
+# change POSTed to one web worker reaches the inference service and the other workers
+VISION_SETTINGS_CHECK_INTERVAL = 2.0
+_vision_settings_mtime = None
+_vision_settings_checked = 0.0
 
 def _merge_vision_settings(base, override):
     out = json.loads(json.dumps(base))
@@ -417,8 +579,16 @@ def _merge_vision_settings(base, override):
             out[k] = v
     return out
 
+def _vision_settings_file_mtime():
+    try:
+        return os.stat(VISION_SETTINGS_FILE).st_mtime
+    except OSError:
+        return None
+
 def load_vision_settings():
-    global VISION_SETTINGS
+    global VISION_SETTINGS, _vision_settings_mtime, _vision_settings_checked
+    _vision_settings_mtime = _vision_settings_file_mtime()
+    _vision_settings_checked = time.monotonic()
     try:
         if os.path.exists(VISION_SETTINGS_FILE):
             with open(VISION_SETTINGS_FILE, "r") as f:
@@ -436,15 +606,41 @@ def load_vision_settings():
         VISION_SETTINGS = DEFAULT_VISION_SETTINGS.copy()
 
 def save_vision_settings():
+    global _vision_settings_mtime
     try:
         with open(VISION_SETTINGS_FILE, "w") as f:
             json.dump(VISION_SETTINGS, f, indent=2)
+        _vision_settings_mtime = _vision_settings_file_mtime()
     except Exception as e:
         print(f"[VISION] Failed to save settings: {e}")
 
+def refresh_vision_settings():
+    """Reload the settings if another process saved them; cheap enough to call per frame"""
+    global _vision_settings_checked
+    now = time.monotonic()
+    if now - _vision_settings_checked < VISION_SETTINGS_CHECK_INTERVAL:
+        return
+    _vision_settings_checked = now
+    if _vision_settings_file_mtime() != _vision_settings_mtime:
+        load_vision_settings()
+
 def is_class_enabled(name: str) -> bool:
     return VISION_SETTINGS.get("enabled_classes", {}).get(name, True)
 
+# Motion gates of the detection loops, one per camera
+MOTION_GATE_WIDTH = int(os.getenv("FALCONEYE_MOTION_GATE_WIDTH", "160"))
+motion_gates = {}
+
+def get_motion_gate(camera_id):
+    """The camera's motion gate, reconfigured from the current vision settings."""
+    settings = motion_camera_settings(VISION_SETTINGS.get("motion"), camera_id)
+    gate = motion_gates.get(camera_id)
+    if gate is None:
+        gate = motion_gates[camera_id] = MotionGate(width=MOTION_GATE_WIDTH, **settings)
+    else:
+        gate.configure(**settings)
+    return gate
+
 def hex_to_bgr(hex_color: str):
     try:
         hex_color = hex_color.strip()
@@ -830,338 +1026,406 @@ def format_clip_name(filename):
     except:
         return filename
 
-# Global variables for frame sharing
-current_frame = None
-frame_lock = threading.Lock()
-last_frame_time = 0
-capture_session = None
-
-def init_capture_session():
-    """Initialize session for connection pooling"""
-    global capture_session
-    capture_session = requests.Session()
-    capture_session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Accept': 'image/jpeg,image/*,*/*',
-        'Connection': 'keep-alive'
-    })
+# Background capture: one worker per camera keeps the latest frame in memory and
+# publishes every frame on the frame bus for live viewers and recorders
+frame_bus = FrameBus()
+# Snapshot cameras are polled at the active rate only while someone watches or
+# records them, at the idle rate otherwise (detection sampling only)
+CAPTURE_ACTIVE_FPS = float(os.getenv("FALCONEYE_CAPTURE_ACTIVE_FPS", "10"))
+CAPTURE_IDLE_FPS = float(os.getenv("FALCONEYE_CAPTURE_IDLE_FPS", "2"))
+# "threads" runs one blocking thread per camera; "asyncio" polls all snapshot
+# cameras from one event loop with a shared connection pool (needs aiohttp)
+CAPTURE_ENGINE = os.getenv("FALCONEYE_CAPTURE_ENGINE", "threads").lower()
+capture_worker_types = {}
+if FALCONEYE_ROLE == "web":
+    # Web workers never open a camera: every camera's frames come from the inference
+    # service, which keeps the only upstream connection (and sees these viewers' demand)
+    capture_worker_types = {kind: functools.partial(RemoteCaptureWorker, address=INFERENCE_ADDRESS)
+                            for kind in WORKER_TYPES}
+elif CAPTURE_ENGINE == "asyncio":
+    if async_capture.is_available():
+        _async_engine = async_capture.AsyncCaptureEngine(
+            decode_threads=int(os.getenv("FALCONEYE_CAPTURE_DECODE_THREADS", "2")))
+        capture_worker_types["snapshot"] = functools.partial(async_capture.AsyncSnapshotWorker, engine=_async_engine)
+    else:
+        print("[WARN] FALCONEYE_CAPTURE_ENGINE=asyncio needs aiohttp; using threaded capture")
+        CAPTURE_ENGINE = "threads"
+# RTSP over TCP avoids smeared frames from UDP packet loss on Wi-Fi
+RTSP_TRANSPORT = os.getenv("FALCONEYE_RTSP_TRANSPORT", "tcp")
+capture_manager = CaptureManager(bus=frame_bus, worker_options={} if FALCONEYE_ROLE == "web" else {
+    "snapshot": {"active_fps": CAPTURE_ACTIVE_FPS, "idle_fps": CAPTURE_IDLE_FPS},
+    "rtsp": {"active_fps": CAPTURE_ACTIVE_FPS, "idle_fps": CAPTURE_IDLE_FPS, "transport": RTSP_TRANSPORT},
+    # journal:// cameras replay a recorded journal; 0 = lockstep with the detection loop
+    "journal": {"speed": float(os.getenv("FALCONEYE_JOURNAL_REPLAY_SPEED", "0"))},
+}, worker_types=capture_worker_types)
+
+# Measures the alternative URLs of multi-URL cameras; workers fail over between them
+path_prober = PathProber(capture_manager, interval=float(os.getenv("FALCONEYE_PATH_PROBE_INTERVAL", "10")))
+
+# Cached per-camera health for the status endpoints (no I/O on the request path)
+health_monitor = CameraHealthMonitor(capture_manager, lambda: (CAMERAS, CAMERA_TYPES), probe=_is_reachable,
+                                     interval=float(os.getenv("FALCONEYE_HEALTH_INTERVAL", "2")))
+
+# ESP32 sensor resolution/quality follows demand: low for idle polling, high while
+# recording or a desktop viewer is watching
+ESP32_RESOLUTION_CONTROL = os.getenv("FALCONEYE_ESP32_RESOLUTION_CONTROL", "true").lower() == "true"
+resolution_controller = ResolutionController(
+    frame_bus, lambda: (CAMERAS, CAMERA_TYPES),
+    modes={"low": parse_mode(os.getenv("FALCONEYE_ESP32_LOW_MODE", "VGA:15")),
+           "high": parse_mode(os.getenv("FALCONEYE_ESP32_HIGH_MODE", "HD:10"))},
+    min_interval=float(os.getenv("FALCONEYE_ESP32_SWITCH_INTERVAL", "5")),
+    hold_down=float(os.getenv("FALCONEYE_ESP32_HOLD_DOWN", "15")))
+# Seconds a recording holds its first frames while the ESP32 switches to the high mode,
+# so the clip is written at the recording resolution
+RECORD_SETTLE = float(os.getenv("FALCONEYE_RECORD_SETTLE", "2"))
+
+# Opt-in raw frame journal: the cameras' original JPEGs with capture timestamps, for
+# replaying a misbehaving detection bit-exactly (camera type "journal")
+JOURNAL_CAMERAS = [c.strip() for c in os.getenv("FALCONEYE_JOURNAL_CAMERAS", "").split(",") if c.strip()]
+if JOURNAL_CAMERAS == ["all"]:
+    JOURNAL_CAMERAS = list(CAMERAS)
+journal_recorder = JournalRecorder(
+    frame_bus, os.getenv("FALCONEYE_JOURNAL_DIR", "journal"), JOURNAL_CAMERAS,
+    segment_bytes=int(float(os.getenv("FALCONEYE_JOURNAL_SEGMENT_MB", "256")) * 1024 * 1024),
+    max_bytes=int(float(os.getenv("FALCONEYE_JOURNAL_MAX_GB", "20")) * 1024 ** 3))
+
+# The process that owns the cameras and their side effects: the single process (all)
+# or the inference service. Web workers receive its frames over the inference socket
+CAPTURE_OWNER = FALCONEYE_ROLE != "web"
+
+def ensure_capture_started():
+    """Start capture workers for the configured cameras if nothing started them yet
+    (e.g. when running under gunicorn, where the __main__ block is skipped)"""
+    if not capture_manager.started:
+        capture_manager.sync(CAMERAS, CAMERA_TYPES, CAMERA_CANDIDATES)
+    if CAPTURE_OWNER:
+        start_capture_services()
+    else:
+        start_profile_follower()
+
+def start_capture_services():
+    """Background services that act on the cameras themselves. Only one process may run
+    them: every gunicorn web worker would otherwise drive the ESP32 framesizes from its
+    own subscriber counts, write its own journal and probe the cameras again"""
+    health_monitor.start()
+    profile_selector.start()
+    path_prober.start()
+    if ESP32_RESOLUTION_CONTROL and not TEST_MODE:
+        resolution_controller.start()
+    if JOURNAL_CAMERAS and not TEST_MODE:
+        journal_recorder.start()
+
+# Web workers: network profile changes go to the capture-owning process, and each worker
+# follows the profile active there
+owner_client = ServiceClient(INFERENCE_ADDRESS, timeout=10.0) if not CAPTURE_OWNER else None
+PROFILE_FOLLOW_INTERVAL = float(os.getenv("FALCONEYE_PROFILE_FOLLOW_INTERVAL", "5"))
+_profile_follower = None
+
+def start_profile_follower():
+    global _profile_follower
+    if _profile_follower is not None:
+        return
+    _profile_follower = threading.Thread(target=_follow_owner_profile, name="profile-follower", daemon=True)
+    _profile_follower.start()
 
-def capture_frames_background():
-    """Background thread to continuously capture frames"""
-    global current_frame, last_frame_time, capture_session
-    
-    if capture_session is None:
-        init_capture_session()
-    
-    print(f"[CAPTURE] Starting high-speed frame capture from ESP32...")
-    
-    consecutive_failures = 0
-    frame_count = 0
-    
+def _follow_owner_profile():
     while True:
         try:
-            # Get frame from ESP32 with shorter timeout
-            resp = capture_session.get(CAMERAS["cam1"], timeout=1.5, stream=False)
-            if resp.status_code == 200:
-                # Convert to OpenCV image
-                img_arr = np.frombuffer(resp.content, np.uint8)
-                frame = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
-                
-                if frame is not None:
-                    with frame_lock:
-                        current_frame = frame.copy()
-                        last_frame_time = time.time()
-                    
-                    consecutive_failures = 0
-                    frame_count += 1
-                    
-                    # Print status every 50 frames
-                    if frame_count % 50 == 0:
-                        print(f"[CAPTURE] Captured {frame_count} frames successfully")
-                else:
-                    consecutive_failures += 1
-            else:
-                consecutive_failures += 1
-                
-        except Exception as e:
-            consecutive_failures += 1
-            if consecutive_failures % 20 == 0:  # Print error every 20 failures
-                print(f"[CAPTURE] Error (attempt {consecutive_failures}): {e}")
-        
-        # High-speed capture - 10 FPS
-        time.sleep(0.1)
+            profile = owner_client.call("network")["profile"]
+            if profile != ACTIVE_PROFILE:
+                print(f"[NETWORK] Following the inference service to profile {profile.get('name')}")
+                _apply_profile(profile)
+        except Exception:
+            pass  # inference service restarting: keep the current profile
+        time.sleep(PROFILE_FOLLOW_INTERVAL)
 
-def get_frame(camera_url):
-    """Get frame - now uses background captured frames"""
+def get_captured_frame(camera_url):
+    """Latest CapturedFrame from the camera's capture worker (carries the seq the detection cache keys on)"""
     try:
         if TEST_MODE or camera_url == "test":
-            # Test mode - use test image only
-            return create_test_image()
-        elif ":8081" in camera_url:
-            # Pi Zero MJPEG stream - get frame directly
-            return get_mjpeg_frame(camera_url)
-        else:
-            # Use background captured frame for ESP32
-            with frame_lock:
-                if current_frame is not None and time.time() - last_frame_time < 10:
-                    return current_frame.copy()
-                else:
-                    return None
+            return CapturedFrame("test", image=create_test_image())
+        ensure_capture_started()
+        return capture_manager.latest_frame(camera_url, wait=3.0)
     except Exception as e:
         print(f"[CAMERA ERROR] {e}")
         return None
 
-def get_mjpeg_frame(mjpeg_url):
-    """Get single frame from MJPEG stream - optimized for speed and reliability"""
+def wait_for_captured_frame(camera_url, after_seq=0, timeout=2.0):
+    """Block until the camera has a frame newer than `after_seq` (CapturedFrame or None)"""
     try:
-        response = requests.get(mjpeg_url, timeout=3, stream=True)
-        if response.status_code == 200:
-            buffer = b''
-            for chunk in response.iter_content(chunk_size=16384):  # Larger chunks for speed
-                buffer += chunk
-                if b'\xff\xd8' in buffer and b'\xff\xd9' in buffer:
-                    start = buffer.find(b'\xff\xd8')
-                    end = buffer.find(b'\xff\xd9', start) + 2
-                    if end > start:
-                        jpeg_data = buffer[start:end]
-                        img_arr = np.frombuffer(jpeg_data, np.uint8)
-                        frame = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
-                        if frame is not None:
-                            return frame
-                if len(buffer) > 200000:  # Prevent memory buildup
-                    buffer = buffer[-100000:]  # Keep last 100KB
+        if TEST_MODE or camera_url == "test":
+            time.sleep(min(timeout, DETECT_INTERVAL))
+            return CapturedFrame("test", image=create_test_image())
+        ensure_capture_started()
+        return capture_manager.wait_for_frame(camera_url, after_seq=after_seq, timeout=timeout)
+    except Exception as e:
+        print(f"[CAMERA ERROR] {e}")
+        time.sleep(timeout)
         return None
+
+def get_frame_jpeg(camera_url):
+    """Get the latest frame as the camera's original JPEG bytes (no decode/re-encode)"""
+    try:
+        if TEST_MODE or camera_url == "test":
+            _, buffer = cv2.imencode(".jpg", create_test_image())
+            return buffer.tobytes()
+        ensure_capture_started()
+        frame = capture_manager.latest_frame(camera_url, wait=3.0)
+        return frame.jpeg if frame is not None else None
     except Exception as e:
-        # Only print MJPEG errors occasionally to reduce log spam
-        if not hasattr(get_mjpeg_frame, 'error_count'):
-            get_mjpeg_frame.error_count = 0
-        get_mjpeg_frame.error_count += 1
-        if get_mjpeg_frame.error_count % 50 == 0:  # Print every 50th error
-            print(f"[MJPEG ERROR] {e} (error #{get_mjpeg_frame.error_count})")
+        print(f"[CAMERA ERROR] {e}")
         return None
 
+# Per-camera, per-stage frame latency (capture -> socket write); see /camera/latency
+latency_tracker = LatencyTracker(window=int(os.getenv("FALCONEYE_LATENCY_WINDOW", "300")))
+
+def draw_latency_overlay(annotated, timer, font_scale=0.6, thickness=2):
+    """Debug overlay (?debug=latency): frame age and recent glass-to-glass percentiles"""
+    cv2.putText(annotated, timer.overlay_text(), (10, annotated.shape[0] - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 165, 255), thickness)
+
+def subscribe_camera(cam_id, mode=FRAME_BUS_LATEST, realtime=True, name=None, full_res=False):
+    """Subscribe to a camera's frames on the frame bus (use as a context manager).
+    full_res=True asks ESP32 cameras for their high-resolution mode while subscribed"""
+    ensure_capture_started()
+    return frame_bus.subscribe(cam_id, mode=mode, realtime=realtime, name=name, full_res=full_res)
+
 def gen_mjpeg_live_stream(cam_id, is_mobile):
-    """Generate live MJPEG stream directly from Pi Zero with object detection"""
+    """Generate live MJPEG stream from the camera's capture worker with object detection"""
     try:
         camera_url = CAMERAS[cam_id]
-        print(f"[{cam_id}] Starting MJPEG stream from Pi Zero at {camera_url}")
-        
-        response = requests.get(camera_url, timeout=5, stream=True)
-        if response.status_code != 200:
-            print(f"[{cam_id}] Failed to connect to Pi Zero camera: {response.status_code}")
-            return
-        
-        print(f"[{cam_id}] Connected to Pi Zero successfully")
+        label = camera_label(cam_id)
+        print(f"[{cam_id}] Starting {label} stream at {camera_url}")
         
-        buffer = b''
         frame_count = 0
         last_detection = 0
         frame_times = []
         last_face_check = 0
         faces_overlay_text = ""
         
-        for chunk in response.iter_content(chunk_size=16384):
-            buffer += chunk
-            
-            # Look for JPEG frame boundaries
-            while b'\xff\xd8' in buffer and b'\xff\xd9' in buffer:
-                start = buffer.find(b'\xff\xd8')
-                end = buffer.find(b'\xff\xd9', start) + 2
-                
-                if end > start:
-                    # Extract complete JPEG frame
-                    jpeg_data = buffer[start:end]
-                    buffer = buffer[end:]
+        latency_debug = (request.args.get('debug') == 'latency') if request else False
+        
+        offline = create_test_image()
+        cv2.putText(offline, f"{label} Camera Offline", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        _, offline_buffer = cv2.imencode('.jpg', offline)
+        offline_part = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + offline_buffer.tobytes() + b'\r\n'
+        
+        # Frames come from the camera's shared capture worker through the frame bus,
+        # so any number of viewers share one upstream connection
+        with subscribe_camera(cam_id, name="live-mjpeg") as sub:
+            while True:
+                captured = sub.get(timeout=5.0)
+                refresh_vision_settings()
+                if captured is None:
+                    if capture_manager.latest_frame(camera_url, max_age=5.0) is not None:
+                        # Camera is up but repeating the same image (duplicates are not republished)
+                        continue
+                    # No frames for a while: show offline placeholder and keep waiting
+                    yield offline_part
+                    continue
+                try:
+                    # Time this frame from capture through decode, inference, faces, annotate, encode, write
+                    timer = FrameTimer(latency_tracker, captured, "live")
+                    # Decoded lazily (once, shared with other consumers)
+                    frame = captured.image
+                    timer.mark("decode")
                     
-                    try:
-                        # Decode JPEG to OpenCV frame
-                        img_arr = np.frombuffer(jpeg_data, np.uint8)
-                        frame = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
+                    if frame is not None:
+                        # Fast path: optional lightweight mode (skip heavy detection most frames)
+                        mode = request.args.get('mode', 'full') if request else 'full'
+                        # Increase default detection interval to reduce CPU/GPU load.
+                        detect_every = int(request.args.get('detect_every', 20)) if request else 20
+                        do_detect = (mode == 'full') or ((mode == 'lite') and (frame_count % max(1, detect_every) == 0))
+
+                        # Resize for mobile if needed
+                        if is_mobile:
+                            height, width = frame.shape[:2]
+                            if width > 640:
+                                new_width = 640
+                                new_height = int((height * new_width) / width)
+                                frame = cv2.resize(frame, (new_width, new_height))
                         
-                        if frame is not None:
-                            # Fast path: optional lightweight mode (skip heavy detection most frames)
-                            mode = request.args.get('mode', 'full') if request else 'full'
-                            # Increase default detection interval to reduce CPU/GPU load.
-                            detect_every = int(request.args.get('detect_every', 20)) if request else 20
-                            do_detect = (mode == 'full') or ((mode == 'lite') and (frame_count % max(1, detect_every) == 0))
-
-                            # Resize for mobile if needed
-                            if is_mobile:
-                                height, width = frame.shape[:2]
-                                if width > 640:
-                                    new_width = 640
-                                    new_height = int((height * new_width) / width)
-                                    frame = cv2.resize(frame, (new_width, new_height))
-                            
-                            # Check for camera tampering first
-                            detect_camera_tampering(frame, cam_id)
-                            
-                            # Perform object detection with balanced confidence (gated for performance)
-                            results = None
-                            if do_detect:
-                                results = live_model(frame, conf=0.5, verbose=False)
-                            if results[0].boxes and time.time() - last_detection > COOLDOWN:
-                                all_tags = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
-                                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else None
-                                filtered_list = filter_surveillance_objects(all_tags, boxes, min_area=10000)
-                                tags = set(filtered_list)
-                                if tags:
-                                    # Try face recognition to append face:Name and optionally hide person
-                                    try:
-                                        person_boxes = []
-                                        if boxes is not None and results[0].boxes is not None:
-                                            cls_list = results[0].boxes.cls.tolist()
-                                            for i, cls_idx in enumerate(cls_list):
-                                                if model.names[int(cls_idx)] == 'person':
-                                                    person_boxes.append(boxes[i])
-                                        rec_names = recognize_faces_in_frame(frame, person_boxes)
-                                        for n in rec_names:
-                                            tags.add(f"face:{n}")
-                                        if (
-                                            rec_names
-                                            and VISION_SETTINGS.get('faces', {}).get('hide_person_if_named', True)
-                                            and 'person' in tags
-                                        ):
-                                            tags.discard('person')
-                                    except Exception:
-                                        pass
-                                    print(f"[{cam_id}] MJPEG Stream - SURVEILLANCE DETECTED: {sorted(list(tags))}")
-                                    
-                                    # Perform intruder detection
-                                    intruder_detected = detect_intruder_activity(filtered_list, boxes, cam_id)
-                                    
-                                    # Send notification for general detection if no specific intruder alert was sent
-                                    if not intruder_detected:
-                                        ist_time = datetime.now(timezone.utc).astimezone(timezone(timedelta(hours=5, minutes=30)))
-                                        local_time = ist_time.strftime("%I:%M:%S %p")
-                                        send_push_notification(
-                                            title=f"FalconEye Alert ({cam_id})",
-                                            body=f"Detected: {', '.join(sorted(list(tags)))} at {local_time}",
-                                            detected_objects=sorted(list(tags))
-                                        )
-                                    last_detection = time.time()
-                            
-                            # Annotate frame with boxes and per-object labels (filtered)
-                            annotated = frame.copy()
-                            if results is not None and results[0].boxes:
-                                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else []
-                                clses = results[0].boxes.cls.tolist() if results[0].boxes.cls is not None else []
-                                confs = results[0].boxes.conf.tolist() if results[0].boxes.conf is not None else []
-                                names = [model.names[int(c)] for c in clses]
-                                # Compute per-box face names if enabled
-                                face_names_by_idx = {}
-                                if VISION_SETTINGS.get('faces', {}).get('enabled', True):
-                                    try:
-                                        person_boxes = [boxes[i] for i, nm in enumerate(names) if nm == 'person']
-                                        tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
-                                        mapping = recognize_faces_for_boxes(frame, person_boxes, tolerance=tol)
-                                        # Map back to full index space
-                                        pi = 0
-                                        for i, nm in enumerate(names):
-                                            if nm == 'person':
-                                                if pi in mapping:
-                                                    face_names_by_idx[i] = mapping[pi]
-                                                pi += 1
-                                    except Exception:
-                                        face_names_by_idx = {}
-                                # Filter to surveillance objects but preserve index mapping
-                                for i, name in enumerate(names):
-                                    if name not in SURVEILLANCE_OBJECTS or not is_class_enabled(name):
-                                        continue
-                                    if i >= len(boxes):
-                                        continue
-                                    x1, y1, x2, y2 = boxes[i]
-                                    color = class_color_bgr(name)
-                                    if VISION_SETTINGS.get('show_boxes', True):
-                                        cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-                                    if VISION_SETTINGS.get('show_labels', True):
-                                        if name == 'person' and i in face_names_by_idx:
-                                            label_text = face_names_by_idx[i]
-                                        else:
-                                            label_text = f"{name} {(confs[i]*100):.0f}%" if i < len(confs) else name
-                                        label = label_text
-                                        # Background for text for readability
-                                        (tw, th), bl = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, 1 if is_mobile else 2)
-                                        ty1 = max(int(y1) - th - 6, 0)
-                                        cv2.rectangle(annotated, (int(x1), ty1), (int(x1)+tw+6, ty1+th+6), (0, 0, 0), -1)
-                                        cv2.putText(annotated, label, (int(x1)+3, ty1+th+2), cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, (255, 255, 255), 1 if is_mobile else 2)
-
-                            # Faces overlay (sampled)
-                            # Only run faces overlay sampling on frames where detection ran to avoid double work
-                            if VISION_SETTINGS.get('faces', {}).get('enabled', True) and do_detect:
-                                every = int(VISION_SETTINGS.get('faces', {}).get('sample_every', 10) or 10)
-                                if frame_count % max(1, every) == 0:
-                                    try:
-                                        person_boxes = []
-                                        if results and results[0].boxes is not None:
-                                            bxyxy = results[0].boxes.xyxy.cpu().numpy()
-                                            cl = results[0].boxes.cls.tolist()
-                                            for i, ci in enumerate(cl):
-                                                if model.names[int(ci)] == 'person':
-                                                    person_boxes.append(bxyxy[i])
-                                        tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
-                                        # If no person boxes, skip to avoid scanning whole frame repeatedly
-                                        names = []
-                                        if person_boxes:
-                                            names = recognize_faces_in_frame(frame, person_boxes, tolerance=tol)
-                                        faces_overlay_text = ", ".join(names[:3]) if names else ""
-                                    except Exception:
-                                        faces_overlay_text = ""
-                            
-                            # Add camera info and FPS overlay
-                            current_time = time.time()
-                            frame_times.append(current_time)
-                            if len(frame_times) > 30:  # Keep last 30 frames
-                                frame_times.pop(0)
-                            
-                            font_scale = 0.6 if is_mobile else 0.8
-                            thickness = 1 if is_mobile else 2
-                            
-                            if len(frame_times) > 1:
-                                fps = len(frame_times) / (frame_times[-1] - frame_times[0])
-                                fps_text = f"Pi Zero Live - FPS: {fps:.1f} - Frame: {frame_count}"
-                            else:
-                                fps_text = f"Pi Zero Live - Frame: {frame_count}"
-                            
-                            cv2.putText(annotated, fps_text, (10, 25), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
-                            cv2.putText(annotated, "FalconEye AI Detection", (10, 45), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
-                            
-                            # Show filtered objects summary line
-                            if results is not None and results[0].boxes and VISION_SETTINGS.get('show_summary', True):
-                                all_objects = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
-                                objects = filter_surveillance_objects(all_objects)
-                                if objects:
-                                    cv2.putText(annotated, f"Detected: {', '.join(objects)}", (10, 65),
-                                               cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 255), thickness)
-                            # Show faces overlay line
-                            if faces_overlay_text and VISION_SETTINGS.get('faces', {}).get('overlay', True):
-                                cv2.putText(annotated, f"Faces: {faces_overlay_text}", (10, 85),
-                                           cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 200, 0), thickness)
-                            
-                            # Encode back to JPEG
-                            quality = 70 if is_mobile else 85
-                            _, buffer_encoded = cv2.imencode('.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, quality])
-                            frame_bytes = buffer_encoded.tobytes()
-                            
-                            # Send frame
-                            yield (b'--frame\r\n'
-                                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                            
-                            frame_count += 1
-                            if frame_count % 10 == 0:  # Print every 10th frame
-                                print(f"[{cam_id}] Streamed {frame_count} frames")
-                            
-                    except Exception as e:
-                        print(f"[{cam_id}] Error processing MJPEG frame: {e}")
-                        continue
+                        # Check for camera tampering first
+                        detect_camera_tampering(frame, cam_id)
+                        
+                        # Perform object detection with balanced confidence (gated for performance)
+                        results = None
+                        if do_detect:
+                            results = detection_cache.infer(live_scheduler, "live", cam_id, captured.seq, frame,
+                                                            key=f"live:{cam_id}", conf=0.5, verbose=False)
+                        timer.mark("inference")
+                        if results[0].boxes and time.time() - last_detection > COOLDOWN:
+                            all_tags = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
+                            boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else None
+                            filtered_list = filter_surveillance_objects(all_tags, boxes, min_area=10000)
+                            tags = set(filtered_list)
+                            if tags:
+                                # Try face recognition to append face:Name and optionally hide person
+                                try:
+                                    person_boxes = []
+                                    if boxes is not None and results[0].boxes is not None:
+                                        cls_list = results[0].boxes.cls.tolist()
+                                        for i, cls_idx in enumerate(cls_list):
+                                            if model.names[int(cls_idx)] == 'person':
+                                                person_boxes.append(boxes[i])
+                                    rec_names = recognize_faces_in_frame(frame, person_boxes)
+                                    for n in rec_names:
+                                        tags.add(f"face:{n}")
+                                    if (
+                                        rec_names
+                                        and VISION_SETTINGS.get('faces', {}).get('hide_person_if_named', True)
+                                        and 'person' in tags
+                                    ):
+                                        tags.discard('person')
+                                except Exception:
+                                    pass
+                                print(f"[{cam_id}] MJPEG Stream - SURVEILLANCE DETECTED: {sorted(list(tags))}")
+                                
+                                # Perform intruder detection
+                                intruder_detected = detect_intruder_activity(filtered_list, boxes, cam_id)
+                                
+                                # Send notification for general detection if no specific intruder alert was sent
+                                if not intruder_detected:
+                                    ist_time = datetime.now(timezone.utc).astimezone(timezone(timedelta(hours=5, minutes=30)))
+                                    local_time = ist_time.strftime("%I:%M:%S %p")
+                                    send_push_notification(
+                                        title=f"FalconEye Alert ({cam_id})",
+                                        body=f"Detected: {', '.join(sorted(list(tags)))} at {local_time}",
+                                        detected_objects=sorted(list(tags))
+                                    )
+                                last_detection = time.time()
+                        timer.mark("faces")
+                        
+                        # Annotate frame with boxes and per-object labels (filtered)
+                        annotated = copy_frame(frame)
+                        if results is not None and results[0].boxes:
+                            boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else []
+                            clses = results[0].boxes.cls.tolist() if results[0].boxes.cls is not None else []
+                            confs = results[0].boxes.conf.tolist() if results[0].boxes.conf is not None else []
+                            names = [model.names[int(c)] for c in clses]
+                            # Compute per-box face names if enabled
+                            face_names_by_idx = {}
+                            if VISION_SETTINGS.get('faces', {}).get('enabled', True):
+                                try:
+                                    person_boxes = [boxes[i] for i, nm in enumerate(names) if nm == 'person']
+                                    tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
+                                    mapping = recognize_faces_for_boxes(frame, person_boxes, tolerance=tol)
+                                    # Map back to full index space
+                                    pi = 0
+                                    for i, nm in enumerate(names):
+                                        if nm == 'person':
+                                            if pi in mapping:
+                                                face_names_by_idx[i] = mapping[pi]
+                                            pi += 1
+                                except Exception:
+                                    face_names_by_idx = {}
+                            timer.mark("faces")
+                            # Filter to surveillance objects but preserve index mapping
+                            for i, name in enumerate(names):
+                                if name not in SURVEILLANCE_OBJECTS or not is_class_enabled(name):
+                                    continue
+                                if i >= len(boxes):
+                                    continue
+                                x1, y1, x2, y2 = boxes[i]
+                                color = class_color_bgr(name)
+                                if VISION_SETTINGS.get('show_boxes', True):
+                                    cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+                                if VISION_SETTINGS.get('show_labels', True):
+                                    if name == 'person' and i in face_names_by_idx:
+                                        label_text = face_names_by_idx[i]
+                                    else:
+                                        label_text = f"{name} {(confs[i]*100):.0f}%" if i < len(confs) else name
+                                    label = label_text
+                                    # Background for text for readability
+                                    (tw, th), bl = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, 1 if is_mobile else 2)
+                                    ty1 = max(int(y1) - th - 6, 0)
+                                    cv2.rectangle(annotated, (int(x1), ty1), (int(x1)+tw+6, ty1+th+6), (0, 0, 0), -1)
+                                    cv2.putText(annotated, label, (int(x1)+3, ty1+th+2), cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, (255, 255, 255), 1 if is_mobile else 2)
+
+                        timer.mark("annotate")
+                        # Faces overlay (sampled)
+                        # Only run faces overlay sampling on frames where detection ran to avoid double work
+                        if VISION_SETTINGS.get('faces', {}).get('enabled', True) and do_detect:
+                            every = int(VISION_SETTINGS.get('faces', {}).get('sample_every', 10) or 10)
+                            if frame_count % max(1, every) == 0:
+                                try:
+                                    person_boxes = []
+                                    if results and results[0].boxes is not None:
+                                        bxyxy = results[0].boxes.xyxy.cpu().numpy()
+                                        cl = results[0].boxes.cls.tolist()
+                                        for i, ci in enumerate(cl):
+                                            if model.names[int(ci)] == 'person':
+                                                person_boxes.append(bxyxy[i])
+                                    tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
+                                    # If no person boxes, skip to avoid scanning whole frame repeatedly
+                                    names = []
+                                    if person_boxes:
+                                        names = recognize_faces_in_frame(frame, person_boxes, tolerance=tol)
+                                    faces_overlay_text = ", ".join(names[:3]) if names else ""
+                                except Exception:
+                                    faces_overlay_text = ""
+                        timer.mark("faces")
+                        
+                        # Add camera info and FPS overlay
+                        current_time = time.time()
+                        frame_times.append(current_time)
+                        if len(frame_times) > 30:  # Keep last 30 frames
+                            frame_times.pop(0)
+                        
+                        font_scale = 0.6 if is_mobile else 0.8
+                        thickness = 1 if is_mobile else 2
+                        
+                        if len(frame_times) > 1:
+                            fps = len(frame_times) / (frame_times[-1] - frame_times[0])
+                            fps_text = f"{label} Live - FPS: {fps:.1f} - Frame: {frame_count}"
+                        else:
+                            fps_text = f"{label} Live - Frame: {frame_count}"
+                        
+                        cv2.putText(annotated, fps_text, (10, 25), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
+                        cv2.putText(annotated, "FalconEye AI Detection", (10, 45), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
+                        
+                        # Show filtered objects summary line
+                        if results is not None and results[0].boxes and VISION_SETTINGS.get('show_summary', True):
+                            all_objects = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
+                            objects = filter_surveillance_objects(all_objects)
+                            if objects:
+                                cv2.putText(annotated, f"Detected: {', '.join(objects)}", (10, 65),
+                                           cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 255), thickness)
+                        # Show faces overlay line
+                        if faces_overlay_text and VISION_SETTINGS.get('faces', {}).get('overlay', True):
+                            cv2.putText(annotated, f"Faces: {faces_overlay_text}", (10, 85),
+                                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 200, 0), thickness)
+                        
+                        if latency_debug:
+                            draw_latency_overlay(annotated, timer, font_scale, thickness)
+                        timer.mark("annotate")
+                        
+                        # Encode back to JPEG
+                        quality = 70 if is_mobile else 85
+                        _, buffer_encoded = cv2.imencode('.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                        frame_bytes = buffer_encoded.tobytes()
+                        timer.mark("encode")
+                        
+                        # Send frame (resumes once the server has written it to the socket)
+                        yield (b'--frame\r\n'
+                               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                        timer.done("write")
+                        
+                        frame_count += 1
+                        if frame_count % 10 == 0:  # Print every 10th frame
+                            print(f"[{cam_id}] Streamed {frame_count} frames")
+                        
+                except Exception as e:
+                    print(f"[{cam_id}] Error processing MJPEG frame: {e}")
+                    continue
                         
     except Exception as e:
         print(f"[{cam_id}] MJPEG live stream error: {e}")
         # Return a placeholder frame
         placeholder = create_test_image()
-        cv2.putText(placeholder, "Pi Zero Camera Offline", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        cv2.putText(placeholder, f"{camera_label(cam_id)} Camera Offline", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         _, buffer = cv2.imencode('.jpg', placeholder)
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
@@ -1196,16 +1460,41 @@ def camera_test_mode():
 
 @app.route("/camera/status", methods=["GET"])
 def camera_status():
-    status = {}
-    for cam_id, url in CAMERAS.items():
-        ok = _is_reachable(url)
-        status[cam_id] = {"url": url, "reachable": ok}
+    # Served from the health monitor's cache; it never probes on the request path
+    if CAPTURE_OWNER:
+        health_monitor.start()
+    health = health_monitor.snapshot()
     return jsonify({
         "test_mode": TEST_MODE,
         "active_profile": ACTIVE_PROFILE.get("name"),
-        "status": status
+        "status": health["cameras"],
+        "health_age": health["updated_age"],
+        "capture_engine": CAPTURE_ENGINE,
+        "capture": capture_manager.stats(),
+        "bus": frame_bus.stats(),
+        "resolution": resolution_controller.stats(),
+        "journal": journal_recorder.stats(),
+        "frame_copies": frame_copies.stats()
     })
 
+@app.route("/camera/latency", methods=["GET"])
+@app.route("/camera/latency/<cam_id>", methods=["GET"])
+def camera_latency(cam_id=None):
+    """Per-stage latency percentiles (ms) for each camera and pipeline (live, detect).
+    glass_to_glass is measured from the source's stamp when it sends one (replay camera),
+    otherwise from capture"""
+    if cam_id is not None and cam_id not in CAMERAS:
+        return jsonify({"error": "Invalid camera"}), 404
+    return jsonify({"window": latency_tracker.window, "cameras": latency_tracker.stats(cam_id)})
+
+@app.route("/inference/stats", methods=["GET"])
+def inference_stats():
+    """Batch size, forward-pass and queue-wait stats of the detect and live inference schedulers,
+    detection cache hits/misses and per-camera motion gate open ratios"""
+    return jsonify({"detect": detect_scheduler.stats(), "live": live_scheduler.stats(),
+                    "cache": detection_cache.stats(),
+                    "motion": {cam_id: gate.stats() for cam_id, gate in motion_gates.items()}})
+
 def upload_to_s3(file_path, object_name=None, tags=None):
     if object_name is None:
         object_name = os.path.basename(file_path)
@@ -1494,115 +1783,57 @@ def record_clip(camera_id, camera_url, tags=None, duration=CLIP_DURATION):
 
     print(f"[RECORD] Starting {duration}s recording for {camera_id}...")
     
-    # Initialize video writer
-    out = None
+    # Opened on the first frames; frames of another size (an ESP32 switching to its
+    # recording framesize) are resized instead of silently dropped by cv2.VideoWriter
+    out = ClipWriter(filename, FPS, settle=RECORD_SETTLE if ESP32_RESOLUTION_CONTROL and CAMERA_TYPES.get(camera_id) == "snapshot" else 0.0)
     frames_captured = 0
     start_time = time.time()
     all_tags = set(tags or [])
     
-    # Use a dedicated stream for recording to avoid conflicts with live view
-    # For MJPEG, we need to continuously read from the stream
-    if camera_id == "cam2": # Pi Zero MJPEG stream
-        try:
-            # Tuple timeout: (connect, read)
-            stream_response = requests.get(camera_url, stream=True, timeout=(3, 3))
-        except Exception as e:
-            print(f"[RECORD ERROR] Failed to open Pi Zero stream: {e}")
-            return None
-        if stream_response.status_code != 200:
-            print(f"[RECORD ERROR] Failed to connect to Pi Zero stream for recording: {camera_url}")
-            try:
-                stream_response.close()
-            except Exception:
-                pass
-            return None
-
-        bytes_buffer = b''
-        last_data_time = time.time()
-        try:
-            for chunk in stream_response.iter_content(chunk_size=16384):
-                # Handle stalls: empty chunk or no progress
-                if not chunk:
-                    if time.time() - last_data_time > 2.0:
-                        print("[RECORD WARNING] MJPEG stalled >2s, ending clip early.")
-                        break
-                    continue
-                last_data_time = time.time()
-                bytes_buffer += chunk
-                a = bytes_buffer.find(b'\xff\xd8') # Start of JPEG
-                b = bytes_buffer.find(b'\xff\xd9') # End of JPEG
-                
-                if a != -1 and b != -1:
-                    jpeg_data = bytes_buffer[a:b+2]
-                    bytes_buffer = bytes_buffer[b+2:]
-                    
-                    img_arr = np.frombuffer(jpeg_data, np.uint8)
-                    frame = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
-                    
-                    if frame is not None:
-                        if out is None:
-                            height, width, _ = frame.shape
-                            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-                            out = cv2.VideoWriter(filename, fourcc, FPS, (width, height))
-                            if not out.isOpened():
-                                print(f"[RECORD ERROR] Could not open video writer for {filename}")
-                                return None
-                        
-                        # Perform object detection; annotate only filtered tags
-                        results = model(frame, conf=0.9, verbose=False)
-                        annotated = frame.copy()
-                        if results[0].boxes:
-                            frame_tags = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
-                            boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else None
-                            # Filter for surveillance objects only with size constraints
-                            filtered_tags = filter_surveillance_objects(frame_tags, boxes, min_area=1000)
-                            all_tags.update(filtered_tags)
-                        
-                        out.write(annotated)
-                        frames_captured += 1
-                        
-                        if time.time() - start_time > duration:
-                            break
-                    else:
-                        print(f"[RECORD WARNING] Failed to decode frame from Pi Zero stream during recording.")
-        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
-            print(f"[RECORD WARNING] MJPEG read interrupted: {e}")
-        finally:
-            try:
-                stream_response.close()
-            except Exception:
-                pass
-    else: # ESP32 camera (or other non-MJPEG)
+    # Record from the shared capture worker: subscribe to every frame on the bus
+    # instead of opening another upstream connection next to the live viewers
+    with subscribe_camera(camera_id, mode=FRAME_BUS_EVERY, name="recorder", full_res=True) as sub:
         while time.time() - start_time < duration:
-            frame = get_frame(camera_url)
-            if frame is None:
+            captured = sub.get(timeout=min(2.0, max(0.1, duration - (time.time() - start_time))))
+            if captured is None:
                 print(f"[RECORD WARNING] Failed to get frame from {camera_id} during recording.")
-                time.sleep(0.1) # Avoid busy-waiting
+                continue
+            frame = captured.image
+            if frame is None:
                 continue
             
-            if out is None:
-                height, width, _ = frame.shape
-                fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-                out = cv2.VideoWriter(filename, fourcc, FPS, (width, height))
-                if not out.isOpened():
-                    print(f"[RECORD ERROR] Could not open video writer for {filename}")
-                    return None
-            
-            # Perform object detection; annotate only filtered tags
-            results = model(frame, conf=0.9, verbose=False)
-            annotated = frame.copy()
+            # Perform object detection on the detection loop's input, so frames it already
+            # inferred come from the cache; boxes are scaled back to the recorded resolution
+            if REDUCED_DECODE:
+                det_frame, box_scale = captured.detection_image(DETECT_INPUT_SIZE)
+            else:
+                det_frame, box_scale = frame, 1.0
+            results = detection_cache.infer(detect_scheduler, "detect", camera_id, captured.seq, det_frame,
+                                            key=f"record:{camera_id}", conf=0.9, verbose=False)
             if results[0].boxes:
                 frame_tags = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
-                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else None
+                boxes = results[0].boxes.xyxy.cpu().numpy() * box_scale if results[0].boxes.xyxy is not None else None
                 # Filter for surveillance objects only with size constraints
                 filtered_tags = filter_surveillance_objects(frame_tags, boxes, min_area=1000)
                 all_tags.update(filtered_tags)
             
-            out.write(annotated)
+            # Nothing is drawn on recorded frames, so the shared frame is written as-is
+            try:
+                out.write(frame, captured.timestamp)
+            except IOError as e:
+                print(f"[RECORD ERROR] {e}")
+                return None
             frames_captured += 1
+        if sub.dropped:
+            print(f"[RECORD] {camera_id}: dropped {sub.dropped} frames while recording (inference slower than capture)")
 
-    if out is not None:
-        out.release()
+    try:
+        frames_captured = out.close()
+    except IOError as e:
+        print(f"[RECORD ERROR] {e}")
+        return None
+    if out.resized:
+        print(f"[RECORD] {camera_id}: resized {out.resized} frames to {out.size[0]}x{out.size[1]} (resolution changed)")
 
     if frames_captured > 0:
         print(f"[RECORD] Captured {frames_captured} frames successfully for {camera_id}.")
@@ -1643,30 +1874,88 @@ def record_clip(camera_id, camera_url, tags=None, duration=CLIP_DURATION):
 def detect_and_record(camera_id, camera_url):
     last_detection = 0
     frame_count = 0
-    camera_type = "Pi Zero MJPEG" if ":8081" in camera_url else "ESP32"
+    camera_type = camera_label(camera_id)
     
     print(f"[{camera_id}] Starting detection loop with {camera_type} camera at {camera_url}")
     
+    last_seq = 0
     while True:
-        frame = get_frame(camera_url)
-        if frame is None:
-            time.sleep(0.5)
+        # Follow runtime network profile switches
+        camera_url = CAMERAS.get(camera_id, camera_url)
+        # Block until there is a frame we have not inferred yet (never the same frame twice)
+        captured = wait_for_captured_frame(camera_url, after_seq=last_seq, timeout=2.0)
+        if captured is None:
+            continue
+        last_seq = captured.seq
+        # Motion, face and area settings may have been changed through a web worker
+        refresh_vision_settings()
+        inference_started = time.time()
+        timer = FrameTimer(latency_tracker, captured, "detect")
+        # Motion pre-stage on a 1/8-scale decode: frames where nothing moved skip
+        # the detector (and its larger decode), apart from periodic keep-alives
+        if REDUCED_DECODE:
+            motion_frame, motion_scale = captured.detection_image(MOTION_GATE_WIDTH)
+        else:
+            motion_frame, motion_scale = captured.image, 1.0
+        if motion_frame is None:
             continue
-        
         frame_count += 1
         
         # Print status every 50 frames
         if frame_count % 50 == 0:
             print(f"[{camera_id}] Processing frame {frame_count} - {camera_type} camera working")
         
-        # Check for camera tampering first
-        detect_camera_tampering(frame, camera_id)
+        # Check for camera tampering first (mean brightness, the small decode is enough)
+        detect_camera_tampering(motion_frame, camera_id)
+        
+        # Motion outside the camera's detection zones doesn't open the gate
+        zones = detection_zones.get(camera_id)
+        if zones is not None:
+            motion_frame = zones.blackout(motion_frame)
+        gate = get_motion_gate(camera_id)
+        # Frame time, not the wall clock: a replayed journal keeps its recorded pace
+        frame_time = captured.timestamp
+        motion = gate.check(motion_frame, scale=motion_scale, now=frame_time)
+        timer.mark("motion")
+        if not motion.run:
+            if CAMERA_TYPES.get(camera_id) != "journal":
+                time.sleep(max(0.0, DETECT_INTERVAL - (time.time() - inference_started)))
+            continue
+        
+        # Detect on a DCT-scaled decode; box_scale maps boxes back to full-res pixels
+        if REDUCED_DECODE:
+            frame, box_scale = captured.detection_image(DETECT_INPUT_SIZE)
+        else:
+            frame, box_scale = captured.image, 1.0
+        if frame is None:
+            continue
+        timer.mark("decode")
+        
+        # Black out / crop away everything outside the detection zones
+        det_input, zone_offset = zones.prepare(frame) if zones is not None else (frame, (0, 0))
+        if det_input is None:
+            continue
+        # On fresh motion, look only around the moving region (within the zone crop);
+        # hold and keep-alive frames still see the whole input
+        motion_crop = motion.crop(frame.shape, box_scale) if gate.settings["crop"] else None
+        if motion_crop is not None:
+            det_input, zone_offset = restrict_to_motion(det_input, zone_offset, motion_crop)
         
         # Perform object detection on raw frame (no compression)
-        results = model(frame, conf=0.5, verbose=False)
-        if results[0].boxes and time.time() - last_detection > COOLDOWN:
+        variant = (zones.key if zones is not None else None, motion_crop)
+        results = detection_cache.infer(detect_scheduler, "detect", camera_id, captured.seq, det_input,
+                                        key=camera_id, variant=variant, conf=0.5, verbose=False)
+        if zones is not None or motion_crop is not None:
+            # Back to frame coordinates, dropping objects standing outside the zones
+            results = [(zones or WHOLE_FRAME).restore(results[0], zone_offset, frame)]
+        timer.done("inference")
+        # (frame time going backwards means a journal replay looped)
+        if results[0].boxes and not 0 <= frame_time - last_detection <= COOLDOWN:
             all_tags = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
             boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else None
+            if boxes is not None and box_scale != 1.0:
+                # Back to full-resolution coordinates (area filters, face crops, logs)
+                boxes = boxes * box_scale
             
             # Filter for surveillance objects only with size constraints
             filtered_list = filter_surveillance_objects(all_tags, boxes, min_area=500)  # Lowered min_area
@@ -1695,7 +1984,8 @@ def detect_and_record(camera_id, camera_url):
                                     person_boxes.append(boxes[i])
                     except Exception:
                         person_boxes = []
-                    recognized_names = recognize_faces_in_frame(frame, person_boxes)
+                    # Face crops come from the full-resolution frame
+                    recognized_names = recognize_faces_in_frame(captured.image, person_boxes)
                     if recognized_names:
                         for n in recognized_names:
                             tags.add(f"face:{n}")
@@ -1704,7 +1994,7 @@ def detect_and_record(camera_id, camera_url):
                             tags.discard('person')
                         print(f"[{camera_id}] 👤 Recognized: {recognized_names}")
                     print(f"[{camera_id}] ✅ TRIGGERING RECORDING! Detected: {sorted(list(tags))}")
-                    last_detection = time.time()
+                    last_detection = frame_time
                     
                     # Perform intruder detection
                     intruder_detected = detect_intruder_activity(filtered_list, boxes, camera_id)
@@ -1726,7 +2016,9 @@ def detect_and_record(camera_id, camera_url):
                     recent_detections.append({
                         "camera": camera_id,
                         "tags": sorted(list(tags)),
-                        "timestamp": datetime.now(timezone.utc).isoformat()
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        # Moving regions (full-res x1, y1, x2, y2) that opened the gate, for crops
+                        "motion_boxes": [[round(v) for v in box] for box in motion.boxes]
                     })
                     
                     # Push notification to all registered devices
@@ -1738,17 +2030,22 @@ def detect_and_record(camera_id, camera_url):
                     )
             # Don't print anything for non-surveillance objects - they are completely ignored
         
-        # Check for new frames every 0.5 seconds
-        time.sleep(0.5)
+        # Cap the detection rate; the next wait skips frames captured meanwhile.
+        # Journal replays run uncapped: every recorded frame, faster than real time
+        if CAMERA_TYPES.get(camera_id) != "journal":
+            time.sleep(max(0.0, DETECT_INTERVAL - (time.time() - inference_started)))
 
 
 # ---------------- Local Preview ----------------
 def local_preview(camera_id, camera_url):
+    last_seq = 0
     while True:
-        frame = get_frame(camera_url)
-        if frame is None:
+        captured = wait_for_captured_frame(camera_url, after_seq=last_seq, timeout=2.0)
+        if captured is None or captured.image is None:
             continue
-        results = model(frame, conf=0.9, verbose=False)
+        last_seq = captured.seq
+        frame = captured.image
+        results = detect_scheduler.infer(frame, key=f"preview:{camera_id}", conf=0.9, verbose=False)
         annotated = results[0].plot()
         cv2.imshow(f"FalconEye - {camera_id}", annotated)
         if cv2.waitKey(1) & 0xFF == ord("q"):
@@ -1758,6 +2055,7 @@ def local_preview(camera_id, camera_url):
 # Load faces DB at startup
 load_face_db()
 load_vision_settings()
+detection_zones.load()
 
 # ---------------- Dashboard ----------------
 dashboard_html = """
@@ -5884,6 +6182,8 @@ def list_cameras():
 @app.route("/vision/settings", methods=["GET", "POST"])
 def vision_settings():
     global VISION_SETTINGS
+    # Start from what another worker may have saved meanwhile
+    refresh_vision_settings()
     if request.method == "GET":
         return jsonify(VISION_SETTINGS)
     try:
@@ -5895,23 +6195,63 @@ def vision_settings():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
+@app.route("/vision/zones", methods=["GET"])
+def vision_zones():
+    """Detection zones of every camera"""
+    return jsonify(detection_zones.to_config())
+
+@app.route("/vision/zones/<cam_id>", methods=["GET", "POST", "DELETE"])
+def vision_camera_zones(cam_id):
+    """Get, replace (POST {"include": [...], "exclude": [...], "mode": "crop"|"mask"}) or remove a camera's zones"""
+    if cam_id not in CAMERAS:
+        return jsonify({"status": "error", "message": "Invalid camera"}), 404
+    if request.method == "GET":
+        zones = detection_zones.get(cam_id)
+        if zones is None:
+            return jsonify({})
+        config = zones.to_config()
+        captured = get_captured_frame(CAMERAS[cam_id])
+        if captured is not None and captured.size:
+            config["coverage"] = zones.coverage((captured.size[1], captured.size[0]))
+        return jsonify(config)
+    try:
+        zones = detection_zones.set(cam_id, None if request.method == "DELETE" else (request.json or {}))
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    print(f"[ZONES] {cam_id}: {'updated' if zones is not None else 'removed'}")
+    return jsonify({"status": "ok"})
+
 @app.route("/camera/snapshot/<cam_id>")
 def snapshot(cam_id):
     if cam_id not in CAMERAS: return "Invalid camera", 404
-    frame = get_frame(CAMERAS[cam_id])
-    if frame is None: 
+    refresh_vision_settings()
+    # ?raw=1 returns the camera's own JPEG untouched (no decode, detection or re-encode)
+    if request.args.get('raw') == '1':
+        jpeg = get_frame_jpeg(CAMERAS[cam_id])
+        if jpeg is not None:
+            return Response(jpeg, mimetype="image/jpeg")
+    captured = get_captured_frame(CAMERAS[cam_id])
+    # Detect on the detection loop's input (before the full decode below), so every
+    # dashboard tab polling this frame, and the loop itself, share one cached inference
+    if captured is not None and REDUCED_DECODE:
+        det_frame, box_scale = captured.detection_image(DETECT_INPUT_SIZE)
+    else:
+        det_frame, box_scale = (captured.image if captured is not None else None), 1.0
+    frame = captured.image if captured is not None else None
+    if frame is None or det_frame is None:
         # Return a placeholder image when camera is not available
         placeholder = create_test_image()
-        camera_type = "Pi Zero MJPEG" if ":8081" in CAMERAS[cam_id] else "ESP32"
+        camera_type = camera_label(cam_id)
         cv2.putText(placeholder, f"{camera_type} Camera Offline", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         _, buffer = cv2.imencode(".jpg", placeholder)
         return Response(buffer.tobytes(), mimetype="image/jpeg")
     
-    results = model(frame, verbose=False)
-    annotated = frame.copy()
+    results = detection_cache.infer(detect_scheduler, "detect", cam_id, captured.seq, det_frame,
+                                    key=f"snapshot:{cam_id}", verbose=False)
+    annotated = copy_frame(frame)
     # Draw boxes + labels (filtered to surveillance classes) on snapshots too
     if results[0].boxes:
-        boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else []
+        boxes = results[0].boxes.xyxy.cpu().numpy() * box_scale if results[0].boxes.xyxy is not None else []
         clses = results[0].boxes.cls.tolist() if results[0].boxes.cls is not None else []
         confs = results[0].boxes.conf.tolist() if results[0].boxes.conf is not None else []
         names = [model.names[int(c)] for c in clses]
@@ -5958,7 +6298,7 @@ def snapshot(cam_id):
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
     
     # Add camera info and FPS to snapshot
-    camera_type = "Pi Zero MJPEG" if ":8081" in CAMERAS[cam_id] else "ESP32"
+    camera_type = camera_label(cam_id)
     cv2.putText(annotated, f"{camera_type} Snapshot", (10, 25), 
                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
     cv2.putText(annotated, "FalconEye AI Detection", (10, 45), 
@@ -5980,53 +6320,53 @@ def live(cam_id):
 
     def gen():
         frame_count = 0
-        last_sent_frame = None
+        last_sent_seq = 0
         camera_url = CAMERAS[cam_id]
-        camera_type = "Pi Zero MJPEG" if ":8081" in camera_url else "ESP32"
+        camera_type = camera_label(cam_id)
         
-        # For Pi Zero MJPEG, allow passthrough for highest smoothness
-        if ":8081" in camera_url:
-            print(f"[STREAM] Using MJPEG stream for {cam_id}")
-            if passthrough:
-                # Raw proxy without decoding/re-encoding
-                try:
-                    with requests.get(camera_url, timeout=5, stream=True) as r:
-                        if r.status_code != 200:
-                            raise RuntimeError(f"Upstream status {r.status_code}")
-                        boundary = None
-                        ctype = r.headers.get('Content-Type', '')
-                        if 'boundary=' in ctype:
-                            boundary = ctype.split('boundary=')[-1]
-                        boundary = boundary or 'frame'
-                        yield (b'')
-                        for chunk in r.iter_content(chunk_size=16384):
-                            if not chunk:
+        # Passthrough: forward the original JPEG bytes captured by the shared
+        # worker, no decode/re-encode and no extra upstream connection (RTSP
+        # frames have no JPEG and are encoded without annotation)
+        if passthrough:
+            try:
+                with subscribe_camera(cam_id, name="passthrough", full_res=not is_mobile) as sub:
+                    yield (b'')
+                    while True:
+                        captured = sub.get(timeout=10.0)
+                        if captured is None:
+                            raise RuntimeError("no frames from upstream for 10s")
+                        jpeg = captured.jpeg
+                        if jpeg is None:
+                            # RTSP workers publish decoded pixels only: encode them once here
+                            if captured.image is None:
                                 continue
-                            # We just forward chunks; client expects multipart stream
-                            # Ensure boundary framing if upstream omits headers (rare)
-                            # Most MJPEG servers include correct multipart headers.
-                            yield chunk
-                except Exception as e:
-                    print(f"[STREAM] Passthrough error: {e}")
-                    placeholder = create_test_image()
-                    cv2.putText(placeholder, f"Passthrough Error", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                    _, buffer = cv2.imencode('.jpg', placeholder)
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-                return
-            else:
-                try:
-                    for frame_data in gen_mjpeg_live_stream(cam_id, is_mobile):
-                        yield frame_data
-                except Exception as e:
-                    print(f"[STREAM] Error in MJPEG stream: {e}")
-                    # Fallback to test image
-                    placeholder = create_test_image()
-                    cv2.putText(placeholder, f"Pi Zero Stream Error: {str(e)[:30]}", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                    _, buffer = cv2.imencode('.jpg', placeholder)
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-                return
+                            quality = 70 if is_mobile else 85
+                            _, buffer = cv2.imencode('.jpg', captured.image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                            jpeg = buffer.tobytes()
+                        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+            except Exception as e:
+                print(f"[STREAM] Passthrough error: {e}")
+                placeholder = create_test_image()
+                cv2.putText(placeholder, f"Passthrough Error", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+                _, buffer = cv2.imencode('.jpg', placeholder)
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            return
+        
+        if CAMERA_TYPES.get(cam_id) in ("mjpeg", "rtsp"):
+            print(f"[STREAM] Using continuous stream for {cam_id}")
+            try:
+                for frame_data in gen_mjpeg_live_stream(cam_id, is_mobile):
+                    yield frame_data
+            except Exception as e:
+                print(f"[STREAM] Error in MJPEG stream: {e}")
+                # Fallback to test image
+                placeholder = create_test_image()
+                cv2.putText(placeholder, f"Pi Zero Stream Error: {str(e)[:30]}", (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+                _, buffer = cv2.imencode('.jpg', placeholder)
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            return
         
         # For faces overlay sampling
         faces_overlay_text = ""
@@ -6034,153 +6374,170 @@ def live(cam_id):
         skip_detection = request.args.get('skip_detection') == '1'
         # Use a higher default detect_every for smoother live streams.
         detect_every = int(request.args.get('detect_every', 20))
-        while True:
-            frame = get_frame(camera_url)
-            
-            if frame is None:
-                # If no frame available, wait briefly and try again
-                time.sleep(0.1)
-                continue
-            
-            # Only process if we have a new frame
-            if frame is not last_sent_frame:
-                # Resize frame for mobile to reduce bandwidth
-                if is_mobile:
-                    height, width = frame.shape[:2]
-                    # Resize to max 480 width for mobile to improve smoothness
-                    if width > 480:
-                        scale = 480 / width
-                        new_width = int(width * scale)
-                        new_height = int(height * scale)
-                        frame = cv2.resize(frame, (new_width, new_height))
+        latency_debug = request.args.get('debug') == 'latency'
+        # ESP32 frames come from the shared snapshot worker through the frame bus;
+        # get() blocks until a frame newer than the last one sent is available
+        with subscribe_camera(cam_id, name="live", full_res=not is_mobile) as sub:
+            while True:
+                captured = sub.get(timeout=1.0)
+                refresh_vision_settings()
+                timer = FrameTimer(latency_tracker, captured, "live") if captured is not None else None
+                frame = captured.image if captured is not None else None
                 
-                # Perform object detection on the frame (raw, no compression)
-                results = None
-                do_detect = not skip_detection or (frame_count % max(1, detect_every) == 0)
-                if do_detect:
-                    results = live_model(frame, verbose=False)
-                # Annotate with boxes and per-object labels (filtered)
-                annotated = frame.copy()
-                if results is not None and results[0].boxes:
-                    boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else []
-                    clses = results[0].boxes.cls.tolist() if results[0].boxes.cls is not None else []
-                    confs = results[0].boxes.conf.tolist() if results[0].boxes.conf is not None else []
-                    names = [model.names[int(c)] for c in clses]
-                    # Compute per-box face names if enabled
-                    face_names_by_idx = {}
-                    if VISION_SETTINGS.get('faces', {}).get('enabled', True):
-                        try:
-                            if DISABLE_FACE_RECOGNITION:
-                                # Skip expensive face recognition when disabled
+                if frame is None:
+                    continue
+                
+                # Only process if we have a new frame
+                if captured.seq > last_sent_seq:
+                    # Resize frame for mobile to reduce bandwidth
+                    if is_mobile:
+                        height, width = frame.shape[:2]
+                        # Resize to max 480 width for mobile to improve smoothness
+                        if width > 480:
+                            scale = 480 / width
+                            new_width = int(width * scale)
+                            new_height = int(height * scale)
+                            frame = cv2.resize(frame, (new_width, new_height))
+                    
+                    # Perform object detection on the frame (raw, no compression)
+                    results = None
+                    do_detect = not skip_detection or (frame_count % max(1, detect_every) == 0)
+                    timer.mark("decode")
+                    if do_detect:
+                        results = detection_cache.infer(live_scheduler, "live", cam_id, captured.seq, frame,
+                                                        key=f"live:{cam_id}", verbose=False)
+                    timer.mark("inference")
+                    # Annotate with boxes and per-object labels (filtered)
+                    annotated = copy_frame(frame)
+                    if results is not None and results[0].boxes:
+                        boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes.xyxy is not None else []
+                        clses = results[0].boxes.cls.tolist() if results[0].boxes.cls is not None else []
+                        confs = results[0].boxes.conf.tolist() if results[0].boxes.conf is not None else []
+                        names = [model.names[int(c)] for c in clses]
+                        # Compute per-box face names if enabled
+                        face_names_by_idx = {}
+                        if VISION_SETTINGS.get('faces', {}).get('enabled', True):
+                            try:
+                                if DISABLE_FACE_RECOGNITION:
+                                    # Skip expensive face recognition when disabled
+                                    face_names_by_idx = {}
+                                else:
+                                    person_boxes = [boxes[i] for i, nm in enumerate(names) if nm == 'person']
+                                    tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
+                                    mapping = recognize_faces_for_boxes(frame, person_boxes, tolerance=tol)
+                                    # Map back to full index space
+                                    pi = 0
+                                    for i, nm in enumerate(names):
+                                        if nm == 'person':
+                                            if pi in mapping:
+                                                face_names_by_idx[i] = mapping[pi]
+                                            pi += 1
+                            except Exception:
                                 face_names_by_idx = {}
-                            else:
-                                person_boxes = [boxes[i] for i, nm in enumerate(names) if nm == 'person']
-                                tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
-                                mapping = recognize_faces_for_boxes(frame, person_boxes, tolerance=tol)
-                                # Map back to full index space
-                                pi = 0
-                                for i, nm in enumerate(names):
-                                    if nm == 'person':
-                                        if pi in mapping:
-                                            face_names_by_idx[i] = mapping[pi]
-                                        pi += 1
-                        except Exception:
-                            face_names_by_idx = {}
-                    for i, name in enumerate(names):
-                        if name not in SURVEILLANCE_OBJECTS or not is_class_enabled(name):
-                            continue
-                        if i >= len(boxes):
-                            continue
-                        x1, y1, x2, y2 = boxes[i]
-                        color = class_color_bgr(name)
-                        if VISION_SETTINGS.get('show_boxes', True):
-                            cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-                        if VISION_SETTINGS.get('show_labels', True):
-                            if name == 'person' and i in face_names_by_idx:
-                                label_text = face_names_by_idx[i]
-                            else:
-                                label_text = f"{name} {(confs[i]*100):.0f}%" if i < len(confs) else name
-                            label = label_text
-                            (tw, th), bl = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, 1 if is_mobile else 2)
-                            ty1 = max(int(y1) - th - 6, 0)
-                            cv2.rectangle(annotated, (int(x1), ty1), (int(x1)+tw+6, ty1+th+6), (0, 0, 0), -1)
-                            cv2.putText(annotated, label, (int(x1)+3, ty1+th+2), cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, (255, 255, 255), 1 if is_mobile else 2)
-                # Faces overlay (sampled)
-                if results is not None and VISION_SETTINGS.get('faces', {}).get('enabled', True):
-                    if frame_count % max(1, sample_every) == 0:
-                        try:
-                            if DISABLE_FACE_RECOGNITION:
+                        timer.mark("faces")
+                        for i, name in enumerate(names):
+                            if name not in SURVEILLANCE_OBJECTS or not is_class_enabled(name):
+                                continue
+                            if i >= len(boxes):
+                                continue
+                            x1, y1, x2, y2 = boxes[i]
+                            color = class_color_bgr(name)
+                            if VISION_SETTINGS.get('show_boxes', True):
+                                cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+                            if VISION_SETTINGS.get('show_labels', True):
+                                if name == 'person' and i in face_names_by_idx:
+                                    label_text = face_names_by_idx[i]
+                                else:
+                                    label_text = f"{name} {(confs[i]*100):.0f}%" if i < len(confs) else name
+                                label = label_text
+                                (tw, th), bl = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, 1 if is_mobile else 2)
+                                ty1 = max(int(y1) - th - 6, 0)
+                                cv2.rectangle(annotated, (int(x1), ty1), (int(x1)+tw+6, ty1+th+6), (0, 0, 0), -1)
+                                cv2.putText(annotated, label, (int(x1)+3, ty1+th+2), cv2.FONT_HERSHEY_SIMPLEX, 0.5 if is_mobile else 0.6, (255, 255, 255), 1 if is_mobile else 2)
+                    timer.mark("annotate")
+                    # Faces overlay (sampled)
+                    if results is not None and VISION_SETTINGS.get('faces', {}).get('enabled', True):
+                        if frame_count % max(1, sample_every) == 0:
+                            try:
+                                if DISABLE_FACE_RECOGNITION:
+                                    faces_overlay_text = ""
+                                else:
+                                    person_boxes = []
+                                    if results and results[0].boxes is not None:
+                                        bxyxy = results[0].boxes.xyxy.cpu().numpy()
+                                        cl = results[0].boxes.cls.tolist()
+                                        for i, ci in enumerate(cl):
+                                            if model.names[int(ci)] == 'person':
+                                                person_boxes.append(bxyxy[i])
+                                    tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
+                                    names = recognize_faces_in_frame(frame, person_boxes, tolerance=tol)
+                                    faces_overlay_text = ", ".join(names[:3]) if names else ""
+                            except Exception:
                                 faces_overlay_text = ""
-                            else:
-                                person_boxes = []
-                                if results and results[0].boxes is not None:
-                                    bxyxy = results[0].boxes.xyxy.cpu().numpy()
-                                    cl = results[0].boxes.cls.tolist()
-                                    for i, ci in enumerate(cl):
-                                        if model.names[int(ci)] == 'person':
-                                            person_boxes.append(bxyxy[i])
-                                tol = float(VISION_SETTINGS.get('faces', {}).get('tolerance', 0.6))
-                                names = recognize_faces_in_frame(frame, person_boxes, tolerance=tol)
-                                faces_overlay_text = ", ".join(names[:3]) if names else ""
-                        except Exception:
-                            faces_overlay_text = ""
-                
-                # Add status text to the frame (smaller for mobile)
-                font_scale = 0.4 if is_mobile else 0.6
-                thickness = 1 if is_mobile else 2
-                
-                # Calculate FPS
-                current_time = time.time()
-                if not hasattr(gen, 'last_time'):
-                    gen.last_time = current_time
-                    gen.frame_times = []
-                
-                gen.frame_times.append(current_time)
-                if len(gen.frame_times) > 30:  # Keep last 30 frames
-                    gen.frame_times.pop(0)
-                
-                if len(gen.frame_times) > 1:
-                    fps = len(gen.frame_times) / (gen.frame_times[-1] - gen.frame_times[0])
-                    fps_text = f"{camera_type} Live - FPS: {fps:.1f} - Frame: {frame_count}"
-                else:
-                    fps_text = f"{camera_type} Live - Frame: {frame_count}"
-                
-                cv2.putText(annotated, fps_text, (10, 25), 
-                           cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
-                cv2.putText(annotated, "FalconEye AI Detection", (10, 45), 
-                           cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
-                
-                # Show detected objects (filtered for surveillance) summary line
-                if results is not None and results[0].boxes and VISION_SETTINGS.get('show_summary', True):
-                    all_objects = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
-                    objects = filter_surveillance_objects(all_objects)
-                    if objects:  # Only show if there are relevant objects
-                        cv2.putText(annotated, f"Detected: {', '.join(objects)}", (10, 65),
-                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 255), thickness)
-                # Faces overlay line
-                if faces_overlay_text and VISION_SETTINGS.get('faces', {}).get('overlay', True):
-                    cv2.putText(annotated, f"Faces: {faces_overlay_text}", (10, 85),
-                               cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 200, 0), thickness)
-                
-                # Encode as JPEG with different quality for mobile
-                quality = 70 if is_mobile else 85
-                _, buffer = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, quality])
-                yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
-                
-                last_sent_frame = frame
-                frame_count += 1
+                    timer.mark("faces")
+                    
+                    # Add status text to the frame (smaller for mobile)
+                    font_scale = 0.4 if is_mobile else 0.6
+                    thickness = 1 if is_mobile else 2
+                    
+                    # Calculate FPS
+                    current_time = time.time()
+                    if not hasattr(gen, 'last_time'):
+                        gen.last_time = current_time
+                        gen.frame_times = []
+                    
+                    gen.frame_times.append(current_time)
+                    if len(gen.frame_times) > 30:  # Keep last 30 frames
+                        gen.frame_times.pop(0)
+                    
+                    if len(gen.frame_times) > 1:
+                        fps = len(gen.frame_times) / (gen.frame_times[-1] - gen.frame_times[0])
+                        fps_text = f"{camera_type} Live - FPS: {fps:.1f} - Frame: {frame_count}"
+                    else:
+                        fps_text = f"{camera_type} Live - Frame: {frame_count}"
+                    
+                    cv2.putText(annotated, fps_text, (10, 25), 
+                               cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
+                    cv2.putText(annotated, "FalconEye AI Detection", (10, 45), 
+                               cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
+                    
+                    # Show detected objects (filtered for surveillance) summary line
+                    if results is not None and results[0].boxes and VISION_SETTINGS.get('show_summary', True):
+                        all_objects = [model.names[int(c)] for c in results[0].boxes.cls.tolist()]
+                        objects = filter_surveillance_objects(all_objects)
+                        if objects:  # Only show if there are relevant objects
+                            cv2.putText(annotated, f"Detected: {', '.join(objects)}", (10, 65),
+                                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 255), thickness)
+                    # Faces overlay line
+                    if faces_overlay_text and VISION_SETTINGS.get('faces', {}).get('overlay', True):
+                        cv2.putText(annotated, f"Faces: {faces_overlay_text}", (10, 85),
+                                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 200, 0), thickness)
+                    
+                    if latency_debug:
+                        draw_latency_overlay(annotated, timer, font_scale, thickness)
+                    timer.mark("annotate")
+                    
+                    # Encode as JPEG with different quality for mobile
+                    quality = 70 if is_mobile else 85
+                    _, buffer = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                    timer.mark("encode")
+                    yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
+                    timer.done("write")
+                    
+                    last_sent_seq = captured.seq
+                    frame_count += 1
+                    
+                    # Print status every 100 frames
+                    if frame_count % 100 == 0:
+                        print(f"[LIVE STREAM] Streamed {frame_count} frames from {camera_type} (Mobile: {is_mobile})")
                 
-                # Print status every 100 frames
-                if frame_count % 100 == 0:
-                    print(f"[LIVE STREAM] Streamed {frame_count} frames from {camera_type} (Mobile: {is_mobile})")
-            
-            # Adjust FPS based on device type (allow override)
-            try:
-                override = float(request.args.get('sleep', '')) if request else None
-            except Exception:
-                override = None
-            sleep_time = override if override is not None else (0.2 if not is_mobile else 0.25)
-            time.sleep(max(0.0, sleep_time))
+                # Adjust FPS based on device type (allow override)
+                try:
+                    override = float(request.args.get('sleep', '')) if request else None
+                except Exception:
+                    override = None
+                sleep_time = override if override is not None else (0.2 if not is_mobile else 0.25)
+                time.sleep(max(0.0, sleep_time))
     return Response(gen(), mimetype="multipart/x-mixed-replace; boundary=frame")
 
 # ---------------- Camera Pan/Tilt Controls (PTZ) ----------------
@@ -6356,22 +6713,77 @@ def system_status():
     return jsonify({
         "device": DEVICE,
         "gpu": GPU_NAME if DEVICE == "cuda" else None,
+        "engine": INFERENCE_ENGINE,
         "network_profile": {
             "active": ACTIVE_PROFILE.get("name"),
             "cameras": CAMERAS,
             "esp_pan_base": ESP_PAN_BASE_URL
         },
+        "camera_health": health_monitor.snapshot()["cameras"],
+        "inference": {"detect": detect_scheduler.stats(), "live": live_scheduler.stats()},
+        "detection_cache": detection_cache.stats(),
         "faces": faces_info
     })
 
+def network_state():
+    """The active profile and camera configuration, as served by /network/profiles"""
+    return {
+        "active": ACTIVE_PROFILE.get("name"),
+        "profile": ACTIVE_PROFILE,
+        "profiles": NETWORK_PROFILES,
+        "cameras": CAMERAS,
+        "camera_types": CAMERA_TYPES,
+        "camera_candidates": CAMERA_CANDIDATES,
+        "esp_pan_base": ESP_PAN_BASE_URL,
+        "selection": profile_selector.stats(),
+    }
+
+def set_network_profile(data):
+    """Apply a /network/profile request in the capture-owning process; returns (reply, status)"""
+    name = data.get("name")
+    cams = data.get("cameras")
+    pan = data.get("esp_pan_base")
+    if name == "auto":
+        # Hand profile choice back to the background prober
+        profile_selector.unpin()
+        profile_selector.start()
+    elif name:
+        # Find by name
+        match = None
+        for p in NETWORK_PROFILES:
+            if p.get("name") == name:
+                match = p
+                break
+        if not match:
+            return {"status": "error", "message": f"profile '{name}' not found"}, 404
+        # A manual choice sticks until {"name": "auto"}
+        profile_selector.pin()
+        _apply_profile(match)
+    elif cams:
+        # Direct override (URL strings or {"url", "type"} entries)
+        urls, types = normalize_cameras(cams)
+        candidates = camera_candidates(cams)
+        merged = {c: {"url": CAMERA_CANDIDATES.get(c) or u, "type": CAMERA_TYPES.get(c)} for c, u in CAMERAS.items()}
+        merged.update({c: {"url": candidates[c], "type": types.get(c)} for c in urls})
+        profile_selector.pin()
+        _apply_profile({"name": "runtime_override", "cameras": merged,
+                        "esp_pan_base": pan or ESP_PAN_BASE_URL})
+    else:
+        return {"status": "error", "message": "provide 'name' or 'cameras'"}, 400
+    return {"status": "ok", "active": ACTIVE_PROFILE.get("name"), "cameras": CAMERAS, "camera_types": CAMERA_TYPES, "camera_candidates": CAMERA_CANDIDATES, "esp_pan_base": ESP_PAN_BASE_URL}, 200
+
+def _network_profile_op(header):
+    """Inference service op: a /network/profile request forwarded by a web worker"""
+    reply, status = set_network_profile(header.get("data") or {})
+    return {"reply": reply, "status": status, "profile": ACTIVE_PROFILE}
+
 @app.route("/network/profiles", methods=["GET"])
 def network_profiles_list():
     try:
-        return jsonify({
-            "active": ACTIVE_PROFILE.get("name"),
-            "profiles": NETWORK_PROFILES,
-            "cameras": CAMERAS,
-        })
+        # Web workers report the capture-owning process's profile and selector
+        state = owner_client.call("network") if owner_client is not None else network_state()
+        return jsonify({k: state[k] for k in ("active", "profiles", "cameras", "camera_types", "camera_candidates",
+                                              "selection")})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -6379,31 +6791,14 @@ def network_profiles_list():
 def network_profile_set():
     try:
         data = request.json or {}
-        name = data.get("name")
-        cams = data.get("cameras")
-        pan = data.get("esp_pan_base")
-        global ACTIVE_PROFILE, CAMERAS, ESP_PAN_BASE_URL
-        if name:
-            # Find by name
-            match = None
-            for p in NETWORK_PROFILES:
-                if p.get("name") == name:
-                    match = p
-                    break
-            if not match:
-                return jsonify({"status": "error", "message": f"profile '{name}' not found"}), 404
-            ACTIVE_PROFILE = match
-            CAMERAS = match.get("cameras", {}).copy()
-            ESP_PAN_BASE_URL = match.get("esp_pan_base", ESP_PAN_BASE_URL)
-        elif cams:
-            # Direct override
-            CAMERAS.update(cams)
-            ACTIVE_PROFILE = {"name": "runtime_override", "cameras": CAMERAS.copy(), "esp_pan_base": ESP_PAN_BASE_URL}
-            if pan:
-                ESP_PAN_BASE_URL = pan
-        else:
-            return jsonify({"status": "error", "message": "provide 'name' or 'cameras'"}), 400
-        return jsonify({"status": "ok", "active": ACTIVE_PROFILE.get("name"), "cameras": CAMERAS, "esp_pan_base": ESP_PAN_BASE_URL})
+        if owner_client is not None:
+            # The profile belongs to the process that owns the cameras; follow it here right away
+            result = owner_client.call("network_profile", data=data)
+            if result["status"] == 200:
+                _apply_profile(result["profile"])
+            return jsonify(result["reply"]), result["status"]
+        reply, status = set_network_profile(data)
+        return jsonify(reply), status
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -6750,20 +7145,36 @@ def faces_delete():
 
 # ---------------- MAIN ----------------
 if __name__ == "__main__":
-    print("🚀 Starting FalconEye on http://localhost:3001")
-    print("📱 Dashboard: http://localhost:3001")
-    print("🔗 Remote access: https://cam.falconeye.website (when Cloudflare tunnel is running)")
+    if FALCONEYE_ROLE == "inference":
+        print(f"🚀 Starting FalconEye inference service on {INFERENCE_ADDRESS}")
+    else:
+        print("🚀 Starting FalconEye on http://localhost:3001")
+        print("📱 Dashboard: http://localhost:3001")
+        print("🔗 Remote access: https://cam.falconeye.website (when Cloudflare tunnel is running)")
     
-    # Start background frame capture
+    # Start background frame capture (one worker per camera)
     if not TEST_MODE:
-        threading.Thread(target=capture_frames_background, daemon=True).start()
+        capture_manager.sync(CAMERAS, CAMERA_TYPES, CAMERA_CANDIDATES)
         time.sleep(2)  # Wait for first frame
+    if CAPTURE_OWNER:
+        start_capture_services()
     
-    # Start detection loop
-    for cam_id, url in CAMERAS.items():
-        threading.Thread(target=detect_and_record, args=(cam_id, url), daemon=True).start()
+    # Start detection loop (web workers leave it to the inference service)
+    if FALCONEYE_ROLE != "web":
+        for cam_id, url in CAMERAS.items():
+            threading.Thread(target=detect_and_record, args=(cam_id, url), daemon=True).start()
     
     # Comment out local preview for headless operation
     # threading.Thread(target=local_preview, args=("cam1", CAMERAS["cam1"]), daemon=True).start()
     
-    app.run(host="0.0.0.0", port=3001)
\ No newline at end of file
+    if FALCONEYE_ROLE == "inference":
+        # Models, cameras, detection loops and the socket web workers talk to; no HTTP here
+        InferenceServer({"detect": detect_scheduler, "live": live_scheduler},
+                        {"detect": model.names, "live": live_model.names},
+                        INFERENCE_ADDRESS, info={"device": DEVICE, "gpu": GPU_NAME, "engine": INFERENCE_ENGINE},
+                        capture=capture_manager,
+                        handlers={"network": lambda header: network_state(),
+                                  "network_profile": _network_profile_op}).start()
+        threading.Event().wait()
+    else:
+        app.run(host="0.0.0.0", port=3001)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+FalconEye Camera Health
+Background monitor that keeps a cached view of every camera's health for the status endpoints
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Stops probing a camera that keeps failing.
+
+    closed: probes allowed. After `threshold` consecutive failures the breaker
+    opens and no probe is made for `cooldown` seconds (doubling on every
+    failed retry, up to `max_cooldown`). Then one probe is let through
+    (half-open); success closes the breaker again.
+    """
+
+    def __init__(self, threshold=3, cooldown=5.0, max_cooldown=120.0):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record(self, ok):
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            self.cooldown = self.base_cooldown
+            return
+        self.failures += 1
+        if self.opened_at is not None:
+            # Failed half-open probe: stay open for longer
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.opened_at = time.time()
+        elif self.failures >= self.threshold:
+            self.opened_at = time.time()
+
+    def stats(self):
+        state = self.state
+        out = {"state": state, "failures": self.failures}
+        if state == "open":
+            out["retry_in"] = round(self.opened_at + self.cooldown - time.time(), 1)
+        return out
+
+
+class CameraHealthMonitor:
+    """Refreshes per-camera health every `interval` seconds in a background thread.
+
+    Cameras with a running capture worker are judged from the capture path
+    itself (last frame age, fps, error streak, RTT), with no extra traffic.
+    Cameras without one (capture not started, test mode) are probed with
+    `probe(url)`, guarded by a per-camera CircuitBreaker. Readers get the
+    cached result from `snapshot()` without any I/O.
+
+    `cameras` is a callable returning ({cam_id: url}, {cam_id: type}) so the
+    monitor follows network profile switches.
+    """
+
+    def __init__(self, capture_manager, cameras, probe=None, interval=2.0, stale_after=10.0):
+        self.capture_manager = capture_manager
+        self.cameras = cameras
+        self.probe = probe
+        self.interval = interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._health = {}
+        self._updated = 0.0
+        self._breakers = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="camera-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[HEALTH] Refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+    def snapshot(self):
+        """Cached health: {"updated_age": seconds, "cameras": {cam_id: {...}}}."""
+        with self._lock:
+            if not self._updated:
+                health, updated = None, 0.0
+            else:
+                health, updated = dict(self._health), self._updated
+        if health is None:
+            # Nothing cached yet: build from capture stats only (never probes here)
+            health = self.refresh(allow_probe=False)
+            updated = time.time()
+        return {"updated_age": round(time.time() - updated, 2), "cameras": health}
+
+    def refresh(self, allow_probe=True):
+        urls, types = self.cameras()
+        capture = self.capture_manager.stats() if self.capture_manager is not None else {}
+        with self._lock:
+            previous = dict(self._health)
+        health = {}
+        for cam_id, url in urls.items():
+            stats = capture.get(cam_id)
+            if stats and stats.get("running") and stats.get("url") == url:
+                entry = self._from_capture(stats)
+            else:
+                entry = self._from_probe(cam_id, url, previous.get(cam_id), allow_probe)
+            entry.update({"url": url, "type": types.get(cam_id)})
+            health[cam_id] = entry
+        with self._lock:
+            self._health = health
+            self._updated = time.time()
+        return health
+
+    def _from_capture(self, stats):
+        age = stats.get("last_frame_age")
+        return {
+            "reachable": age is not None and age < self.stale_after,
+            "source": "capture",
+            "rtt_ms": stats.get("rtt_ms"),
+            "last_frame_age": age,
+            "fps": stats.get("fps"),
+            "error_streak": stats.get("consecutive_failures", 0),
+            "last_error": stats.get("last_error"),
+            "circuit": None,
+        }
+
+    def _from_probe(self, cam_id, url, previous, allow_probe):
+        breaker = self._breakers.get(cam_id)
+        if breaker is None or breaker[0] != url:
+            breaker = (url, CircuitBreaker())
+            self._breakers[cam_id] = breaker
+        breaker = breaker[1]
+        entry = {
+            "reachable": None, "source": "probe", "rtt_ms": None, "last_frame_age": None,
+            "fps": None, "error_streak": breaker.failures, "last_error": None,
+        }
+        if previous and previous.get("source") == "probe" and previous.get("url") == url:
+            entry.update({k: previous.get(k) for k in ("reachable", "rtt_ms", "last_error")})
+        if not url or url == "test":
+            entry["reachable"] = url == "test"
+        elif allow_probe and self.probe is not None and breaker.allow():
+            started = time.monotonic()
+            try:
+                ok = bool(self.probe(url))
+                error = None if ok else "unreachable"
+            except Exception as e:
+                ok, error = False, str(e)
+            breaker.record(ok)
+            entry.update({"reachable": ok, "last_error": error, "error_streak": breaker.failures,
+                          "rtt_ms": round((time.monotonic() - started) * 1000, 1) if ok else None})
+        elif breaker.state == "open":
+            entry["reachable"] = False
+        entry["circuit"] = breaker.stats()
+        return entry
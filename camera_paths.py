@@ -0,0 +1,293 @@
+"""
+FalconEye Camera Paths
+Ordered candidate URLs per camera (e.g. LAN and tunnel) with latency-based selection and failover
+"""
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from mjpeg_parser import SOI, MjpegParser, boundary_from_content_type
+
+
+class PathStats:
+    """Measurements for one candidate URL."""
+
+    def __init__(self, url):
+        self.url = url
+        self.rtt = None         # smoothed time to fetch one frame, seconds
+        self.throughput = None  # smoothed bytes/second while fetching a frame
+        self.frame_bytes = None
+        self.failures = 0       # consecutive
+        self.last_ok = 0.0
+        self.last_failure = 0.0
+
+    @property
+    def healthy(self):
+        return self.failures == 0
+
+    def cost(self):
+        """Expected seconds to get one frame over this path, or None if never measured."""
+        if self.rtt is None:
+            return None
+        if self.throughput and self.frame_bytes:
+            # Charge large frames on slow links (tunnel) for the transfer, not just the round trip
+            return max(self.rtt, self.frame_bytes / self.throughput)
+        return self.rtt
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "throughput_kbps": round(self.throughput * 8 / 1000, 1) if self.throughput else None,
+            "failures": self.failures,
+            "last_ok_age": round(time.time() - self.last_ok, 1) if self.last_ok else None,
+        }
+
+
+class PathSelector:
+    """Chooses which of a camera's candidate URLs the capture worker reads from.
+
+    The worker reports every frame and failure on the path it used. A failure
+    on the active path fails over at once to the best healthy candidate, so
+    the next request already goes elsewhere. `rebalance()` (run by PathProber
+    after probing the idle candidates) moves to a clearly faster path, with
+    hysteresis so two similar paths don't flap.
+    """
+
+    def __init__(self, urls, switch_ratio=0.7, min_dwell=10.0):
+        self.paths = [PathStats(url) for url in dict.fromkeys(u for u in urls if u)]
+        if not self.paths:
+            raise ValueError("a camera needs at least one URL")
+        self.switch_ratio = switch_ratio
+        self.min_dwell = min_dwell
+        self.switches = 0
+        self.last_switch = 0.0
+        self._active = self.paths[0]
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [p.url for p in self.paths]
+
+    @property
+    def multi(self):
+        return len(self.paths) > 1
+
+    @property
+    def active(self):
+        return self._active.url
+
+    def _get(self, url):
+        for path in self.paths:
+            if path.url == url:
+                return path
+        return None
+
+    def record_ok(self, url, seconds=None, nbytes=None):
+        with self._lock:
+            path = self._get(url)
+            if path is None:
+                return
+            path.failures = 0
+            path.last_ok = time.time()
+            if seconds is not None:
+                path.rtt = seconds if path.rtt is None else 0.7 * path.rtt + 0.3 * seconds
+                if nbytes and seconds > 0:
+                    rate = nbytes / seconds
+                    path.throughput = rate if path.throughput is None else 0.7 * path.throughput + 0.3 * rate
+                    path.frame_bytes = nbytes if path.frame_bytes is None else 0.7 * path.frame_bytes + 0.3 * nbytes
+
+    def record_failure(self, url):
+        """Count a failure on `url`; if it is the active path, fail over.
+
+        Returns True when the worker should retry right away on a new, healthy
+        path. When every path is failing the active one still rotates (so each
+        gets retried), but False is returned and the worker backs off as usual.
+        """
+        with self._lock:
+            path = self._get(url)
+            if path is None:
+                return False
+            path.failures += 1
+            path.last_failure = time.time()
+            if path is not self._active or not self.multi:
+                return False
+            target = self._best(exclude=path)
+            if target is None:
+                # Nothing healthy: rotate to the path that failed longest ago
+                target = min((p for p in self.paths if p is not path), key=lambda p: p.last_failure)
+            self._switch(target)
+            return target.healthy
+
+    def rebalance(self):
+        """Move to a healthier or clearly faster path; returns True if the active path changed."""
+        with self._lock:
+            if not self.multi:
+                return False
+            active = self._active
+            best = self._best(exclude=active)
+            if best is None:
+                return False
+            if not active.healthy:
+                self._switch(best)
+                return True
+            if time.time() - self.last_switch < self.min_dwell:
+                return False
+            best_cost, active_cost = best.cost(), active.cost()
+            if best_cost is not None and active_cost is not None and best_cost < active_cost * self.switch_ratio:
+                self._switch(best)
+                return True
+            return False
+
+    def _best(self, exclude=None):
+        candidates = [p for p in self.paths if p is not exclude and p.healthy]
+        if not candidates:
+            return None
+        # Measured paths by cost; unmeasured ones after them, in config order
+        measured = [p for p in candidates if p.cost() is not None]
+        if measured:
+            return min(measured, key=lambda p: p.cost())
+        return candidates[0]
+
+    def _switch(self, path):
+        if path is self._active:
+            return
+        self._active = path
+        self.switches += 1
+        self.last_switch = time.time()
+
+    def timeout(self, default, floor=0.25):
+        """Request/read timeout for the active path.
+
+        With alternatives available, a dead path should be given up on after a
+        few of its usual frame times rather than the full `default`.
+        """
+        rtt = self._active.rtt
+        if not self.multi or rtt is None:
+            return default
+        return min(default, max(floor, 4 * rtt))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self._active.url,
+                "switches": self.switches,
+                "candidates": [p.stats() for p in self.paths],
+            }
+
+
+def probe_path(url, kind, timeout=2.0, max_bytes=2 * 1024 * 1024):
+    """Fetch one frame from `url` the way a `kind` worker would.
+
+    Returns (seconds, nbytes); raises on failure. RTSP is judged by a TCP
+    connect (nbytes None) since opening a decoder per probe is too costly.
+    An MJPEG stream is read only up to its first part (at most `max_bytes`)
+    and the connection is dropped, so the camera does not keep serving an
+    extra client between rounds.
+    """
+    started = time.monotonic()
+    if kind == "rtsp":
+        if url.lower().startswith("file://"):
+            if not os.path.exists(url[len("file://"):]):
+                raise RuntimeError("file not found")
+            return 0.0, None
+        parsed = urlparse(url)
+        with socket.create_connection((parsed.hostname, parsed.port or 554), timeout=timeout):
+            return time.monotonic() - started, None
+    if kind == "mjpeg":
+        with requests.get(url, stream=True, headers={"Connection": "close"}, timeout=(timeout, timeout)) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"status {resp.status_code}")
+            parser = MjpegParser(boundary_from_content_type(resp.headers.get('Content-Type')))
+            received = 0
+            try:
+                # Small reads so little of the second part is pulled in before we hang up
+                for chunk in resp.iter_content(chunk_size=4096):
+                    for jpeg in parser.feed(chunk):
+                        return time.monotonic() - started, len(jpeg)
+                    received += len(chunk)
+                    if received > max_bytes or time.monotonic() - started > timeout:
+                        break
+            finally:
+                # Close the socket rather than returning a half-read stream to the pool
+                resp.raw.close()
+        raise RuntimeError("no frame")
+    resp = requests.get(url, timeout=timeout)
+    if resp.status_code != 200 or resp.content[:2] != SOI:
+        raise RuntimeError(f"status {resp.status_code}")
+    return time.monotonic() - started, len(resp.content)
+
+
+class PathProber:
+    """Background loop that measures the idle candidate URLs of multi-URL cameras.
+
+    The active path is measured by the capture worker itself; every `interval`
+    seconds the others get one probe each (concurrently), then the camera's
+    PathSelector rebalances. This is also how a failed path is noticed coming
+    back.
+    """
+
+    def __init__(self, capture_manager, interval=10.0, timeout=2.0, max_workers=8):
+        self.capture_manager = capture_manager
+        self.interval = interval
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.rounds = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="path-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="path-probe") as pool:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.probe_once(pool)
+                except Exception as e:
+                    print(f"[PATHS] Probe round failed: {e}")
+
+    def probe_once(self, pool=None):
+        jobs = []
+        for worker in self.capture_manager.workers():
+            paths = worker.paths
+            if not paths.multi:
+                continue
+            for url in paths.urls:
+                if url != paths.active:
+                    jobs.append((worker, url))
+        if pool is None:
+            results = [self._probe(worker, url) for worker, url in jobs]
+        else:
+            results = list(pool.map(lambda job: self._probe(*job), jobs))
+        for worker in {worker for worker, _ in jobs}:
+            before = worker.paths.active
+            if worker.paths.rebalance():
+                print(f"[PATHS] {worker.cam_id}: switching {before} -> {worker.paths.active}")
+        self.rounds += 1
+        return results
+
+    def _probe(self, worker, url):
+        try:
+            seconds, nbytes = probe_path(url, worker.kind.split("-")[0], self.timeout)
+        except Exception:
+            worker.paths.record_failure(url)
+            return False
+        worker.paths.record_ok(url, seconds, nbytes)
+        return True
@@ -0,0 +1,73 @@
+"""
+FalconEye Clip Writer
+cv2.VideoWriter wrapper that keeps every frame when the camera changes resolution mid-clip
+"""
+
+import time
+
+import cv2
+
+
+class ClipWriter:
+    """Writes a clip whose frames may change size (an ESP32 switching framesize).
+
+    cv2.VideoWriter fixes its size when it is opened and silently drops
+    frames of any other size. The first frames are held for up to `settle`
+    seconds of frame time, so a camera that is still switching to its recording
+    resolution gets there first. The writer then opens at the largest size seen,
+    and every frame is resized to that size.
+    """
+
+    def __init__(self, filename, fps, fourcc="mp4v", settle=2.0):
+        self.filename = filename
+        self.fps = fps
+        self.fourcc = fourcc
+        self.settle = settle
+        self.size = None  # (width, height) once open
+        self.frames = 0
+        self.resized = 0
+        self._writer = None
+        self._pending = []
+        self._first = None
+
+    def write(self, frame, timestamp=None):
+        """Add a frame (`timestamp` defaults to now); raises IOError if the writer cannot be opened."""
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._writer is None:
+            if self._first is None:
+                self._first = timestamp
+            self._pending.append(frame)
+            if timestamp - self._first < self.settle:
+                return
+            self._open()
+            return
+        self._write(frame)
+
+    def _open(self):
+        width = max(f.shape[1] for f in self._pending)
+        height = max(f.shape[0] for f in self._pending)
+        self._writer = cv2.VideoWriter(self.filename, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height))
+        if not self._writer.isOpened():
+            self._writer = None
+            self._pending = []
+            raise IOError(f"could not open video writer for {self.filename}")
+        self.size = (width, height)
+        pending, self._pending = self._pending, []
+        for frame in pending:
+            self._write(frame)
+
+    def _write(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_LINEAR)
+            self.resized += 1
+        self._writer.write(frame)
+        self.frames += 1
+
+    def close(self):
+        """Flush held frames and finish the file; returns the number of frames written."""
+        if self._writer is None and self._pending:
+            self._open()
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        return self.frames
@@ -0,0 +1,103 @@
+"""
+FalconEye Detection Cache
+Detection results memoized per (camera, frame sequence, model) and shared by every caller
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from detections import Detections
+
+# ultralytics' default confidence threshold when a call passes no `conf`
+DEFAULT_CONF = 0.25
+
+
+class _Entry:
+    __slots__ = ("conf", "future")
+
+    def __init__(self, conf):
+        self.conf = conf
+        self.future = Future()
+
+
+class DetectionCache:
+    """LRU of per-frame detections in front of the inference schedulers.
+
+    The key is (camera, frame seq, model, input shape, other call options):
+    the same captured frame at the same input size gives the same boxes, so
+    the snapshot endpoint, every live viewer and the detection loop share one
+    inference per frame. Concurrent callers for a frame that is still being
+    inferred wait for that inference instead of starting another.
+
+    A result computed at confidence c also answers any request at c' >= c by
+    filtering (NMS at a higher threshold keeps exactly the boxes above it),
+    so callers with different `conf` share too. Entries hold boxes only,
+    never the frame; results come back with the caller's frame attached.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # waited for an inference already running for the same frame
+        self.evictions = 0
+
+    def infer(self, scheduler, model_name, cam_id, seq, frame, key=None, variant=None, **kwargs):
+        """`scheduler.infer(frame, key, **kwargs)`, memoized for frame `seq` of `cam_id`.
+
+        Returns [Detections] like the scheduler; `seq` None bypasses the cache.
+        `variant` tells apart inputs derived differently from the same frame
+        (e.g. masked by detection zones).
+        """
+        if seq is None:
+            return scheduler.infer(frame, key=key, **kwargs)
+        conf = kwargs.get("conf", DEFAULT_CONF)
+        options = tuple(sorted((k, v) for k, v in kwargs.items() if k not in ("conf", "verbose")))
+        cache_key = (cam_id, seq, model_name, tuple(frame.shape), variant, options)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry.conf <= conf:
+                self._entries.move_to_end(cache_key)
+                if entry.future.done():
+                    self.hits += 1
+                else:
+                    self.coalesced += 1
+                owner = False
+            else:
+                # Not cached, or only at a higher threshold than asked for
+                entry = self._entries[cache_key] = _Entry(conf)
+                self._entries.move_to_end(cache_key)
+                self.misses += 1
+                owner = True
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        if owner:
+            try:
+                result = scheduler.infer(frame, key=key, **kwargs)[0]
+                detections = Detections.from_results(result).filtered(conf)  # drops the frame reference
+            except Exception as e:
+                with self._lock:
+                    if self._entries.get(cache_key) is entry:
+                        del self._entries[cache_key]
+                entry.future.set_exception(e)
+                raise
+            entry.future.set_result(detections)
+        return [entry.future.result().filtered(conf, orig_img=frame)]
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,210 @@
+"""
+FalconEye Detection Zones
+Per-camera include/exclude polygons applied to frames before inference
+
+Zones live in detection_zones.json next to vision_settings.json:
+
+    {
+      "cam1": {
+        "include": [[[0.0, 0.4], [1.0, 0.4], [1.0, 1.0], [0.0, 1.0]]],
+        "exclude": [[[0.7, 0.4], [1.0, 0.4], [1.0, 0.6], [0.7, 0.6]]],
+        "mode": "crop"
+      }
+    }
+
+Points are (x, y) fractions of the frame width/height, so zones hold for any
+decode scale or camera resolution. With no include polygon the whole frame is
+included. "crop" mode cuts the frame to the bounding box of the allowed area
+(a smaller detector input) and blacks out what is left outside it; "mask" mode
+only blacks out, keeping the frame size.
+"""
+
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+MODES = ("crop", "mask")
+
+
+def _validate_polygons(polygons, field):
+    if not isinstance(polygons, list):
+        raise ValueError(f"{field} must be a list of polygons")
+    out = []
+    for polygon in polygons:
+        points = np.asarray(polygon, np.float32)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError(f"{field}: each polygon needs at least 3 [x, y] points")
+        if points.min() < 0.0 or points.max() > 1.0:
+            raise ValueError(f"{field}: points are fractions of the frame size (0..1)")
+        out.append(points)
+    return out
+
+
+class CameraZones:
+    """One camera's zones: prepares detector input and maps detections back to the frame."""
+
+    def __init__(self, include=(), exclude=(), mode="crop"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.include = _validate_polygons(list(include), "include")
+        self.exclude = _validate_polygons(list(exclude), "exclude")
+        self.mode = mode
+        # Identifies this zone layout (detection cache variant)
+        self.key = json.dumps(self.to_config(), sort_keys=True)
+        self._masks = {}  # (height, width) -> (mask, crop rect, mask is the whole crop)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        if not isinstance(config, dict):
+            raise ValueError("zones must be an object with include/exclude/mode")
+        return cls(config.get("include") or [], config.get("exclude") or [], config.get("mode", "crop"))
+
+    def to_config(self):
+        return {"include": [p.tolist() for p in self.include], "exclude": [p.tolist() for p in self.exclude],
+                "mode": self.mode}
+
+    def _mask(self, shape):
+        shape = tuple(shape[:2])
+        with self._lock:
+            cached = self._masks.get(shape)
+            if cached is not None:
+                return cached
+            h, w = shape
+            scale = np.array([w, h], np.float32)
+            if self.include:
+                mask = np.zeros((h, w), np.uint8)
+                cv2.fillPoly(mask, [np.round(p * scale).astype(np.int32) for p in self.include], 255)
+            else:
+                mask = np.full((h, w), 255, np.uint8)
+            if self.exclude:
+                cv2.fillPoly(mask, [np.round(p * scale).astype(np.int32) for p in self.exclude], 0)
+            x, y, cw, ch = cv2.boundingRect(mask)
+            if self.mode == "mask":
+                x, y, cw, ch = 0, 0, w, h
+            full = bool(cw and ch and mask[y:y + ch, x:x + cw].all())
+            cached = self._masks[shape] = (mask, (x, y, cw, ch), full)
+            return cached
+
+    def prepare(self, frame):
+        """(detector input, (x, y) offset of that input in `frame`); None if nothing is left to look at."""
+        mask, (x, y, w, h), full = self._mask(frame.shape)
+        if not w or not h:
+            return None, (0, 0)
+        if full:
+            return frame[y:y + h, x:x + w], (x, y)
+        return cv2.bitwise_and(frame[y:y + h, x:x + w], frame[y:y + h, x:x + w], mask=mask[y:y + h, x:x + w]), (x, y)
+
+    def blackout(self, frame):
+        """`frame` with everything outside the zones blacked out, same size (e.g. for the motion gate)."""
+        mask = self._mask(frame.shape)[0]
+        return cv2.bitwise_and(frame, frame, mask=mask)
+
+    def contains(self, points, shape):
+        """Which (x, y) points (pixels of a frame of `shape`) lie in the allowed area."""
+        mask = self._mask(shape)[0]
+        points = np.asarray(points, np.float32).reshape(-1, 2)
+        xs = np.clip(points[:, 0].astype(np.int32), 0, mask.shape[1] - 1)
+        ys = np.clip(points[:, 1].astype(np.int32), 0, mask.shape[0] - 1)
+        return mask[ys, xs] > 0
+
+    def restore(self, result, offset, frame):
+        """Detections on a `prepare`d input, back in `frame` pixels.
+
+        Boxes are shifted by the crop offset; boxes whose bottom-centre (where
+        the object stands) lies outside the zones are dropped, which removes
+        objects straddling a blacked-out edge.
+        """
+        result = Detections.from_results(result)
+        xyxy = result.boxes.xyxy.array + np.array([offset[0], offset[1], offset[0], offset[1]], np.float32)
+        if len(xyxy):
+            feet = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, np.minimum(xyxy[:, 3], frame.shape[0] - 1)], axis=1)
+            keep = self.contains(feet, frame.shape)
+        else:
+            keep = np.zeros(0, bool)
+        return Detections(xyxy[keep], result.boxes.conf.array[keep], result.boxes.cls.array[keep], result.names,
+                          frame)
+
+    def coverage(self, shape):
+        """Fraction of the frame the detector still sees, and of the input size after cropping."""
+        mask, (x, y, w, h), _ = self._mask(shape)
+        return {"allowed": round(float(np.count_nonzero(mask)) / mask.size, 3),
+                "input": round(float(w * h) / mask.size, 3)}
+
+
+class ZoneStore:
+    """All cameras' zones, persisted as JSON; `get` is cheap enough to call per frame.
+
+    The file is re-read when it changes (checked every `check_interval`
+    seconds), so zones edited through one process (a web worker) reach the
+    detection loops running in another (the inference daemon).
+    """
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._zones = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def load(self):
+        zones = {}
+        self._mtime = self._file_mtime()
+        self._checked = time.monotonic()
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    for cam_id, config in (json.load(f) or {}).items():
+                        zones[cam_id] = CameraZones.from_config(config)
+        except Exception as e:
+            print(f"[ZONES] Failed to load {self.path}: {e}")
+        with self._lock:
+            self._zones = zones
+        if zones:
+            print(f"[ZONES] Loaded zones for {', '.join(sorted(zones))}")
+
+    def save(self):
+        with self._lock:
+            data = {cam_id: zones.to_config() for cam_id, zones in self._zones.items()}
+        try:
+            with open(self.path, "w") as f:
+                json.dump(data, f, indent=2)
+            self._mtime = self._file_mtime()
+        except Exception as e:
+            print(f"[ZONES] Failed to save {self.path}: {e}")
+
+    def get(self, cam_id):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            if self._file_mtime() != self._mtime:
+                self.load()
+        return self._zones.get(cam_id)
+
+    def set(self, cam_id, config):
+        """Replace a camera's zones (raises ValueError on a bad config); None or {} removes them."""
+        zones = CameraZones.from_config(config) if config else None
+        with self._lock:
+            if zones is None:
+                self._zones.pop(cam_id, None)
+            else:
+                self._zones[cam_id] = zones
+        self.save()
+        return zones
+
+    def to_config(self):
+        with self._lock:
+            return {cam_id: zones.to_config() for cam_id, zones in self._zones.items()}
@@ -0,0 +1,107 @@
+"""
+FalconEye Detections
+Plain-numpy detection results shaped like ultralytics Results (boxes.xyxy / cls / conf, plot())
+"""
+
+import cv2
+import numpy as np
+
+
+class _Array:
+    """numpy array that also answers the torch-tensor calls backend code makes (`.cpu().numpy()`, `.tolist()`)."""
+
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+    def tolist(self):
+        return self.array.tolist()
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+
+class Boxes:
+    """N detections: xyxy (N x 4, pixels of the original frame), conf (N), cls (N)."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = _Array(np.asarray(xyxy, np.float32).reshape(-1, 4))
+        self.conf = _Array(np.asarray(conf, np.float32).reshape(-1))
+        self.cls = _Array(np.asarray(cls, np.float32).reshape(-1))
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class Detections:
+    """One image's detections, usable wherever backend.py reads an ultralytics Results.
+
+    Produced by engines that don't run ultralytics in this process (the
+    inference service client, ONNX Runtime) and serialized to a compact
+    N x 6 float32 array (x1, y1, x2, y2, conf, cls) for transport.
+    """
+
+    def __init__(self, xyxy, conf, cls, names, orig_img=None, orig_shape=None):
+        self.boxes = Boxes(xyxy, conf, cls)
+        self.names = names
+        self.orig_img = orig_img
+        if orig_shape is None and orig_img is not None:
+            orig_shape = orig_img.shape[:2]
+        self.orig_shape = orig_shape
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @classmethod
+    def empty(cls, names, orig_img=None):
+        return cls(np.zeros((0, 4), np.float32), [], [], names, orig_img)
+
+    @classmethod
+    def from_results(cls, result):
+        """Convert an ultralytics Results (or pass a Detections through)."""
+        if isinstance(result, cls):
+            return result
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(result.names, result.orig_img)
+        return cls(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy(),
+                   result.names, result.orig_img)
+
+    def filtered(self, min_conf, orig_img=None):
+        """The detections at or above `min_conf` (same as running the model with that `conf`)."""
+        keep = self.boxes.conf.array >= min_conf
+        return Detections(self.boxes.xyxy.array[keep], self.boxes.conf.array[keep], self.boxes.cls.array[keep],
+                          self.names, orig_img, self.orig_shape)
+
+    def to_array(self):
+        """N x 6 float32: x1, y1, x2, y2, conf, cls."""
+        return np.hstack([self.boxes.xyxy.array, self.boxes.conf.array[:, None], self.boxes.cls.array[:, None]])
+
+    @classmethod
+    def from_array(cls, array, names, orig_img=None):
+        array = np.asarray(array, np.float32).reshape(-1, 6)
+        return cls(array[:, :4], array[:, 4], array[:, 5], names, orig_img)
+
+    def plot(self, img=None, color=(0, 255, 0)):
+        """Annotated copy of the frame (like Results.plot(), without ultralytics)."""
+        img = self.orig_img if img is None else img
+        annotated = img.copy()
+        for (x1, y1, x2, y2), conf, cls in zip(self.boxes.xyxy.array, self.boxes.conf.array, self.boxes.cls.array):
+            p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+            cv2.rectangle(annotated, p1, p2, color, 2)
+            label = f"{self.names.get(int(cls), int(cls))} {conf:.2f}"
+            cv2.putText(annotated, label, (p1[0], max(p1[1] - 5, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+        return annotated
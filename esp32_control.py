@@ -0,0 +1,179 @@
+"""
+FalconEye ESP32 Control
+Demand-driven ESP32-CAM sensor resolution and JPEG quality switching
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+# esp_camera framesize_t values accepted by the firmware's /control?var=framesize
+FRAMESIZES = {
+    "QQVGA": 0, "QCIF": 2, "HQVGA": 3, "240X240": 4, "QVGA": 5, "CIF": 6, "HVGA": 7,
+    "VGA": 8, "SVGA": 9, "XGA": 10, "HD": 11, "SXGA": 12, "UXGA": 13,
+}
+
+# ESP32 JPEG quality is 10 (best) .. 63 (smallest)
+DEFAULT_MODES = {
+    "low": {"framesize": "VGA", "quality": 15},   # idle polling / detection
+    "high": {"framesize": "HD", "quality": 10},   # recording or a desktop viewer
+}
+
+
+def parse_mode(spec):
+    """Parse a "FRAMESIZE:QUALITY" setting such as "VGA:15"."""
+    framesize, _, quality = spec.partition(":")
+    framesize = framesize.strip().upper()
+    if framesize not in FRAMESIZES:
+        raise ValueError(f"unknown ESP32 framesize: {framesize}")
+    return {"framesize": framesize, "quality": int(quality) if quality else 12}
+
+
+class Esp32Camera:
+    """Switches one ESP32-CAM between the "low" and "high" modes over its HTTP control API.
+
+    Going high happens as soon as there is demand; going back low waits until
+    demand has been gone for `hold_down` seconds. Either way two switches are
+    at least `min_interval` seconds apart, since every switch makes the sensor
+    drop a few frames. Firmware without the control endpoint (404) is marked
+    unsupported and left alone.
+    """
+
+    def __init__(self, cam_id, url, modes=None, min_interval=5.0, hold_down=15.0, timeout=2.0,
+                 control_path="/control"):
+        self.cam_id = cam_id
+        self.url = url
+        self.modes = modes or DEFAULT_MODES
+        self.min_interval = min_interval
+        self.hold_down = hold_down
+        self.timeout = timeout
+        parsed = urlparse(url)
+        self.control_url = f"{parsed.scheme}://{parsed.netloc}{control_path}"
+        self.session = requests.Session()
+
+        self.mode = None  # unknown until the first successful switch
+        self.supported = None
+        self.switches = 0
+        self.deferred = 0
+        self.last_switch = 0.0
+        self.last_error = None
+        self._last_demand = 0.0
+
+    def update(self, demand, now=None):
+        """Move toward the mode `demand` asks for; returns True if a switch was made."""
+        if self.supported is False:
+            return False
+        now = time.time() if now is None else now
+        if demand:
+            self._last_demand = now
+        target = "high" if demand else "low"
+        if target == self.mode:
+            return False
+        if target == "low" and self.mode == "high" and now - self._last_demand < self.hold_down:
+            return False
+        if self.last_switch and now - self.last_switch < self.min_interval:
+            self.deferred += 1
+            return False
+        return self.apply(target, now)
+
+    def apply(self, mode, now=None):
+        settings = self.modes[mode]
+        self.last_switch = time.time() if now is None else now
+        try:
+            # quality first: a larger frame at the old quality can overflow the frame buffer
+            for var, val in (("quality", settings["quality"]), ("framesize", FRAMESIZES[settings["framesize"]])):
+                resp = self.session.get(self.control_url, params={"var": var, "val": val}, timeout=self.timeout)
+                if resp.status_code == 404:
+                    self.supported = False
+                    self.last_error = "control endpoint not found"
+                    print(f"[ESP32] {self.cam_id}: no {self.control_url}; resolution control disabled")
+                    return False
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{var}: status {resp.status_code}")
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        self.supported = True
+        self.last_error = None
+        self.switches += 1
+        print(f"[ESP32] {self.cam_id}: {self.mode or 'unknown'} -> {mode} "
+              f"({settings['framesize']}, quality {settings['quality']})")
+        self.mode = mode
+        return True
+
+    def stats(self):
+        settings = self.modes.get(self.mode, {})
+        return {
+            "mode": self.mode,
+            "framesize": settings.get("framesize"),
+            "quality": settings.get("quality"),
+            "supported": self.supported,
+            "switches": self.switches,
+            "deferred": self.deferred,
+            "last_switch_age": round(time.time() - self.last_switch, 1) if self.last_switch else None,
+            "last_error": self.last_error,
+        }
+
+
+class ResolutionController:
+    """Background loop that keeps every ESP32 snapshot camera in the mode its demand calls for.
+
+    Demand is read from the frame bus: a subscription made with
+    `full_res=True` (clip recording, a desktop live view) asks for "high".
+    Web workers' viewers count too: their remote capture workers hold
+    subscriptions on this bus flagged with the viewers' demand.
+    `cameras` is a callable returning ({cam_id: url}, {cam_id: type}), so
+    network profile switches are followed.
+    """
+
+    def __init__(self, bus, cameras, interval=1.0, **camera_options):
+        self.bus = bus
+        self.cameras = cameras
+        self.interval = interval
+        self.camera_options = camera_options
+        self._cams = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="esp32-resolution", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[ESP32] Resolution update failed: {e}")
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        urls, types = self.cameras()
+        with self._lock:
+            for cam_id in list(self._cams):
+                if cam_id not in urls or types.get(cam_id) != "snapshot":
+                    del self._cams[cam_id]
+            for cam_id, url in urls.items():
+                if types.get(cam_id) != "snapshot" or not url or url == "test":
+                    continue
+                cam = self._cams.get(cam_id)
+                if cam is None or cam.url != url:
+                    cam = self._cams[cam_id] = Esp32Camera(cam_id, url, **self.camera_options)
+            cams = list(self._cams.values())
+        for cam in cams:
+            cam.update(self.bus.subscriber_count(cam.cam_id, full_res_only=True) > 0)
+
+    def stats(self):
+        with self._lock:
+            cams = dict(self._cams)
+        return {cam_id: cam.stats() for cam_id, cam in cams.items()}
@@ -0,0 +1,156 @@
+"""
+FalconEye Frame Bus
+In-process publish/subscribe fan-out of captured frames, keyed by camera
+"""
+
+import threading
+from collections import deque
+
+LATEST = "latest"  # keep only the newest undelivered frame
+EVERY = "every"    # queue every frame up to maxsize, dropping the oldest when full
+
+
+class Subscription:
+    """A consumer's bounded view of one camera topic.
+
+    Use as a context manager so the subscription is always released:
+
+        with frame_bus.subscribe("cam1") as sub:
+            frame = sub.get(timeout=5)
+    """
+
+    def __init__(self, bus, topic, mode=LATEST, maxsize=32, realtime=True, name=None, full_res=False):
+        if mode not in (LATEST, EVERY):
+            raise ValueError(f"unknown subscription mode: {mode}")
+        self.bus = bus
+        self.topic = topic
+        self.mode = mode
+        self.maxsize = 1 if mode == LATEST else max(1, int(maxsize))
+        # Realtime subscribers (live viewers, recorders) want the full frame rate
+        self.realtime = realtime
+        # Full-resolution subscribers (recorders, desktop viewers) want the camera's high-res mode
+        self.full_res = full_res
+        self.name = name
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # Stats
+        self.delivered = 0
+        self.dropped = 0
+
+    def _offer(self, item):
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Block until a frame is available; returns None on timeout or after close()."""
+        with self._cond:
+            if not self._queue and not self._closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.clear()
+            self._cond.notify_all()
+        self.bus._remove(self)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "realtime": self.realtime,
+            "full_res": self.full_res,
+            "pending": self.pending(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class FrameBus:
+    """Fans frames published by the capture workers out to any number of subscribers.
+
+    Publishing never blocks: a slow subscriber only loses its own frames
+    (counted in its `dropped` counter), never anyone else's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = {}
+        self._published = {}
+        self._dropped_closed = {}
+
+    def subscribe(self, topic, mode=LATEST, maxsize=32, realtime=True, name=None, full_res=False):
+        sub = Subscription(self, topic, mode=mode, maxsize=maxsize, realtime=realtime, name=name,
+                           full_res=full_res)
+        with self._lock:
+            self._subs.setdefault(topic, []).append(sub)
+        return sub
+
+    def publish(self, topic, item):
+        with self._lock:
+            subs = list(self._subs.get(topic, ()))
+            self._published[topic] = self._published.get(topic, 0) + 1
+        for sub in subs:
+            sub._offer(item)
+        return len(subs)
+
+    def _remove(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.topic)
+            if subs and sub in subs:
+                subs.remove(sub)
+                # Keep lifetime drop totals after the subscriber goes away
+                self._dropped_closed[sub.topic] = self._dropped_closed.get(sub.topic, 0) + sub.dropped
+
+    def subscriber_count(self, topic, realtime_only=False, full_res_only=False):
+        with self._lock:
+            subs = self._subs.get(topic, ())
+            if full_res_only:
+                return sum(1 for s in subs if s.full_res)
+            if realtime_only:
+                return sum(1 for s in subs if s.realtime)
+            return len(subs)
+
+    def stats(self):
+        with self._lock:
+            topics = set(self._subs) | set(self._published)
+            snapshot = {t: list(self._subs.get(t, ())) for t in topics}
+            published = dict(self._published)
+            dropped_closed = dict(self._dropped_closed)
+        out = {}
+        for topic, subs in snapshot.items():
+            out[topic] = {
+                "published": published.get(topic, 0),
+                "subscribers": len(subs),
+                "dropped": dropped_closed.get(topic, 0) + sum(s.dropped for s in subs),
+                "subscriptions": [s.stats() for s in subs],
+            }
+        return out
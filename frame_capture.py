@@ -0,0 +1,931 @@
+"""
+FalconEye Frame Capture
+Background capture workers (one per camera) that keep the newest frame in memory
+"""
+
+import itertools
+import os
+import threading
+import time
+import zlib
+from collections import deque
+
+import cv2
+import numpy as np
+import requests
+
+from camera_paths import PathSelector
+from frame_journal import JournalReader
+from mjpeg_parser import SOI, MjpegParser, boundary_from_content_type, jpeg_dimensions, jpeg_timestamp
+
+
+CAMERA_TYPES = ("snapshot", "mjpeg", "rtsp", "journal")
+
+
+def camera_kind(url):
+    """Fallback capture type for a bare camera URL.
+
+    Camera configs should set "type" explicitly (see `normalize_cameras`); this
+    only keeps plain-URL configs working: rtsp:// and file:// sources are
+    streamed through FFMPEG, and the Pi Zero MJPEG server is recognised by its
+    :8081 port. journal:// URLs replay a recorded frame journal.
+    """
+    scheme = url.split("://", 1)[0].lower() if "://" in url else ""
+    if scheme in ("rtsp", "rtsps", "file"):
+        return "rtsp"
+    if scheme == "journal":
+        return "journal"
+    return "mjpeg" if ":8081" in url else "snapshot"
+
+
+def _entry_urls(entry):
+    # A camera entry's candidate URLs, in order of preference
+    value = (entry.get("urls") or entry.get("url")) if isinstance(entry, dict) else entry
+    if isinstance(value, (list, tuple)):
+        return [u for u in value if u]
+    return [value] if value else []
+
+
+def normalize_cameras(config):
+    """Split a camera config into ({cam_id: url}, {cam_id: type}).
+
+    Each entry is either a URL string or a dict {"url": ..., "type": ...} with
+    type one of CAMERA_TYPES. "url" (or "urls") may also be a list of candidate
+    URLs for the same camera (see `camera_candidates`); the first one is the
+    camera's URL here.
+    """
+    urls, types = {}, {}
+    for cam_id, entry in (config or {}).items():
+        candidates = _entry_urls(entry)
+        url = candidates[0] if candidates else None
+        if isinstance(entry, dict):
+            kind = entry.get("type") or (camera_kind(url) if url else None)
+        else:
+            kind = camera_kind(url) if url else None
+        if kind is not None and kind not in CAMERA_TYPES:
+            raise ValueError(f"camera {cam_id}: unknown type {kind!r} (expected one of {', '.join(CAMERA_TYPES)})")
+        urls[cam_id] = url
+        types[cam_id] = kind
+    return urls, types
+
+
+def camera_candidates(config):
+    """{cam_id: [url, ...]} for every camera, e.g. a LAN address and a tunnel address.
+
+    The capture worker streams from the fastest healthy one and fails over
+    between them (see camera_paths.PathSelector).
+    """
+    return {cam_id: _entry_urls(entry) for cam_id, entry in (config or {}).items()}
+
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding (in the DCT domain),
+# which is much cheaper than a full decode followed by a resize
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def decode_jpeg(jpeg, reduction=1):
+    """Decode JPEG bytes (or a buffer view) to a read-only BGR image; None if undecodable.
+
+    `reduction` (1, 2, 4 or 8) decodes at 1/reduction of the full resolution.
+    The result is shared between consumers, so it is marked non-writeable:
+    drawing on it raises instead of silently corrupting other viewers' frames.
+    """
+    image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), REDUCED_DECODE_FLAGS[reduction])
+    if image is not None:
+        image.flags.writeable = False
+    return image
+
+
+class CopyMeter:
+    """Counts bytes copied out of shared frames (see `copy_frame`)."""
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._events = deque()
+        self.copies = 0
+        self.bytes_total = 0
+
+    def add(self, nbytes):
+        now = time.time()
+        with self._lock:
+            self.copies += 1
+            self.bytes_total += nbytes
+            self._events.append((now, nbytes))
+            while self._events and self._events[0][0] < now - self.window:
+                self._events.popleft()
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            while self._events and self._events[0][0] < now - self.window:
+                self._events.popleft()
+            recent = sum(n for _, n in self._events)
+            return {
+                "copies": self.copies,
+                "bytes_total": self.bytes_total,
+                "bytes_per_sec": round(recent / self.window),
+            }
+
+
+frame_copies = CopyMeter()
+
+
+def copy_frame(image):
+    """Writable copy of a shared frame, for consumers that draw on it (counted)."""
+    frame_copies.add(image.nbytes)
+    return image.copy()
+
+
+def pick_reduction(width, height, target_size):
+    """Largest DCT reduction that keeps the longer side at or above `target_size`.
+
+    Detectors letterbox their input to `target_size` (640 for YOLO) anyway, so
+    decoding more pixels than that is wasted work.
+    """
+    if not target_size or not width or not height:
+        return 1
+    longest = max(width, height)
+    for reduction in (8, 4, 2):
+        if longest / reduction >= target_size:
+            return reduction
+    return 1
+
+
+_frame_seq = itertools.count(1)
+
+
+class CapturedFrame:
+    """One captured frame: the camera's original JPEG bytes plus the decoded pixels.
+
+    Decoding is lazy. Workers publish the compressed bytes only, and the first
+    consumer that reads `image` pays for one `cv2.imdecode`, which is then
+    shared by everyone else. Consumers that only forward the JPEG (passthrough,
+    raw snapshots) never trigger a decode.
+    """
+
+    __slots__ = ("cam_id", "seq", "jpeg", "timestamp", "received", "source_time", "_image", "_decoded", "_reduced",
+                 "_size", "_lock")
+
+    def __init__(self, cam_id, image=None, jpeg=None, timestamp=None):
+        self.cam_id = cam_id
+        # Process-wide counter: increases per camera even across worker restarts
+        self.seq = next(_frame_seq)
+        self.jpeg = jpeg
+        # When this process got the frame (wall clock): freshness and queueing latency
+        self.received = time.time()
+        # Capture time (wall clock): the recorded time for a replayed journal, else `received`
+        self.timestamp = timestamp if timestamp is not None else self.received
+        # Creation time stamped into the JPEG by a test source (replay camera), else None
+        self.source_time = jpeg_timestamp(jpeg) if jpeg is not None else None
+        if image is not None:
+            image.flags.writeable = False
+        self._image = image
+        self._decoded = image is not None or jpeg is None
+        self._reduced = {}
+        self._size = None
+        self._lock = threading.Lock()
+
+    @property
+    def image(self):
+        """Decoded BGR image (read-only, shared), or None if the JPEG is corrupt."""
+        if not self._decoded:
+            with self._lock:
+                if not self._decoded:
+                    self._image = decode_jpeg(self.jpeg)
+                    self._decoded = True
+        return self._image
+
+    @property
+    def decoded(self):
+        return self._decoded
+
+    @property
+    def size(self):
+        """Full-resolution (width, height), read from the JPEG header when not decoded."""
+        if self._size is None:
+            if self._decoded and self._image is not None:
+                self._size = (self._image.shape[1], self._image.shape[0])
+            elif self.jpeg is not None:
+                self._size = jpeg_dimensions(self.jpeg)
+        return self._size
+
+    def detection_image(self, target_size=640):
+        """Return (image, scale) for a detector whose input is `target_size` pixels.
+
+        The image is DCT-scaled at decode time when the frame is much larger than
+        the detector input; multiply detector box coordinates by `scale` to get
+        back to full-resolution pixels. If the full frame is already decoded it
+        is returned as-is (scale 1.0).
+        """
+        if self._decoded:
+            return self._image, 1.0
+        size = self.size
+        reduction = pick_reduction(size[0], size[1], target_size) if size else 1
+        if reduction == 1:
+            return self.image, 1.0
+        with self._lock:
+            # One decode per reduction (e.g. the motion gate's 1/8 and the detector's 1/2)
+            if reduction not in self._reduced:
+                self._reduced[reduction] = decode_jpeg(self.jpeg, reduction)
+            image = self._reduced[reduction]
+        if image is None:
+            return None, 1.0
+        return image, size[0] / image.shape[1]
+
+
+class FrameSlot:
+    """Thread-safe holder for the latest frame of one camera.
+
+    Consumers that must see each frame at most once remember the `seq` of the
+    last frame they handled and block in `wait_for_frame(after_seq)`.
+
+    Freshness (`max_age`) is measured from when the camera last delivered the
+    frame's content, so a camera repeating an identical JPEG (see `touch`)
+    stays fresh without publishing a new frame.
+
+    `wait_taken(seq)` lets a producer wait until such a consumer has picked up
+    frame `seq` (journal replay in lockstep with the detection loop).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seen = 0.0
+        self._taken = 0
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seen = frame.received
+            self._cond.notify_all()
+
+    def touch(self):
+        """The camera sent the current frame again: keep it fresh, wake nobody."""
+        with self._cond:
+            if self._frame is not None:
+                self._seen = time.time()
+
+    def latest_frame(self, max_age=10.0):
+        """Return the newest CapturedFrame (shared, do not modify), or None if stale."""
+        with self._cond:
+            frame, seen = self._frame, self._seen
+        if frame is not None and time.time() - seen < max_age:
+            return frame
+        return None
+
+    def latest(self, max_age=10.0):
+        """Return the newest decoded image (read-only, shared), or None."""
+        frame = self.latest_frame(max_age)
+        return frame.image if frame is not None else None
+
+    def wait_for_frame(self, after_seq=0, timeout=None, max_age=10.0):
+        """Block until a frame newer than `after_seq` is available.
+
+        Returns the CapturedFrame, or None if none arrived within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                frame = self._frame
+                if frame is not None and frame.seq > after_seq and time.time() - self._seen < max_age:
+                    if frame.seq > self._taken:
+                        self._taken = frame.seq
+                        self._cond.notify_all()
+                    return frame
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def wait_taken(self, seq, timeout=None):
+        """Block until `wait_for_frame` has returned frame `seq` (or a newer one); False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._taken >= seq, timeout)
+
+    def wait_first(self, timeout):
+        return self.wait_for_frame(0, timeout, max_age=float("inf")) is not None
+
+    @property
+    def seq(self):
+        with self._cond:
+            return self._frame.seq if self._frame is not None else 0
+
+    @property
+    def frame_time(self):
+        """When the camera last delivered the current frame (0.0 before the first one)."""
+        with self._cond:
+            return self._seen
+
+
+class RateController:
+    """Picks a snapshot camera's polling interval from demand and health.
+
+    - active: someone watches or records (realtime bus subscribers) -> `active_fps`
+    - idle: only the detection loop samples the camera -> `idle_fps`
+    - backoff: consecutive failures double the interval up to `max_backoff`
+    """
+
+    def __init__(self, active_fps=10.0, idle_fps=2.0, max_backoff=10.0):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.max_backoff = max_backoff
+        self.mode = "idle"
+        self.interval = 1.0 / idle_fps
+
+    def next_interval(self, demand, consecutive_failures=0):
+        base = 1.0 / (self.active_fps if demand else self.idle_fps)
+        if consecutive_failures:
+            self.mode = "backoff"
+            self.interval = min(base * (2 ** min(consecutive_failures, 16)), max(base, self.max_backoff))
+        else:
+            self.mode = "active" if demand else "idle"
+            self.interval = base
+        return self.interval
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "target_fps": round(1.0 / self.interval, 2) if self.interval else None,
+            "interval": round(self.interval, 3),
+        }
+
+
+class CaptureWorker:
+    """Base class for a per-camera capture thread.
+
+    Subclasses implement `_run()` and call `_frame_ok(jpeg)` / `_frame_failed(err)`;
+    the base class owns the thread lifecycle, the latest-frame slot and the stats.
+    """
+
+    kind = "base"
+
+    def __init__(self, cam_id, url, bus=None, urls=None):
+        self.cam_id = cam_id
+        # The configured (first) URL identifies the camera; frames are read from paths.active
+        self.url = url
+        self.paths = PathSelector(urls or [url])
+        self.bus = bus
+        self.slot = FrameSlot()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = 0.0
+        self._frame_times = deque(maxlen=30)
+
+        # Stats
+        self.frames = 0
+        self.duplicates = 0  # byte-identical JPEGs dropped before decode
+        self._fingerprint = None
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.rtt = None  # smoothed request / connect round-trip time, seconds
+
+    def start(self):
+        if self.is_alive():
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.cam_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest_frame(self, max_age=10.0, wait=0.0):
+        """Return the newest CapturedFrame (shared), or None if it is missing or stale.
+
+        `wait` lets callers block while the worker is still connecting instead of
+        getting None straight away. It only applies within `wait` seconds of
+        `start()`, so an offline camera never stalls callers after startup.
+        """
+        if wait > 0:
+            remaining = self._started_at + wait - time.time()
+            if remaining > 0:
+                self.slot.wait_first(remaining)
+        return self.slot.latest_frame(max_age)
+
+    def wait_for_frame(self, after_seq=0, timeout=None, max_age=10.0):
+        return self.slot.wait_for_frame(after_seq, timeout, max_age)
+
+    def latest(self, max_age=10.0, wait=0.0):
+        """Return the newest decoded image (read-only, shared), or None (see `latest_frame`)."""
+        frame = self.latest_frame(max_age, wait)
+        return frame.image if frame is not None else None
+
+    def has_demand(self):
+        """True while a live viewer or recorder is subscribed to this camera."""
+        return self.bus is not None and self.bus.subscriber_count(self.cam_id, realtime_only=True) > 0
+
+    def fps(self):
+        times = list(self._frame_times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def stats(self):
+        last_frame_time = self.slot.frame_time
+        return {
+            "type": self.kind,
+            "url": self.url,
+            "active_url": self.paths.active,
+            "running": self.is_alive(),
+            "frames": self.frames,
+            "duplicates": self.duplicates,
+            "duplicate_ratio": round(self.duplicates / (self.frames + self.duplicates), 3) if self.duplicates else 0.0,
+            "seq": self.slot.seq,
+            "fps": round(self.fps(), 2),
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_frame_age": round(time.time() - last_frame_time, 2) if last_frame_time else None,
+            "last_error": self.last_error,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "paths": self.paths.stats() if self.paths.multi else None,
+        }
+
+    def _frame_ok(self, jpeg, image=None, timestamp=None):
+        """Publish a frame; returns the CapturedFrame, or None for a repeated JPEG."""
+        if jpeg is not None:
+            # ESP32s repeat the same JPEG when polled faster than the sensor or
+            # when the scene is frozen: drop it before anything decodes or infers it
+            fingerprint = (len(jpeg), zlib.crc32(jpeg))
+            if fingerprint == self._fingerprint:
+                self.duplicates += 1
+                self.consecutive_failures = 0
+                self.slot.touch()
+                return None
+            self._fingerprint = fingerprint
+        frame = CapturedFrame(self.cam_id, image=image, jpeg=jpeg, timestamp=timestamp)
+        self.slot.publish(frame)
+        if self.bus is not None:
+            self.bus.publish(self.cam_id, frame)
+        self.frames += 1
+        self.consecutive_failures = 0
+        self._frame_times.append(time.time())
+        return frame
+
+    def _record_rtt(self, seconds):
+        self.rtt = seconds if self.rtt is None else 0.7 * self.rtt + 0.3 * seconds
+
+    def _frame_failed(self, error=None):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if error is not None:
+            self.last_error = str(error)
+
+    def _path_failed(self, url):
+        """Report a failure on `url`; True if the next attempt should go to a new path right away."""
+        failover = self.paths.record_failure(url)
+        if failover:
+            print(f"[CAPTURE] {self.cam_id}: {url} failed ({self.last_error}); failing over to {self.paths.active}")
+        return failover
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class SnapshotWorker(CaptureWorker):
+    """Polls an HTTP JPEG snapshot endpoint (ESP32 `/jpg`) over a keep-alive session.
+
+    The poll rate follows demand (see RateController) so an unwatched camera is
+    only sampled at the idle rate, and an unreachable one is retried with backoff.
+    """
+
+    kind = "snapshot"
+
+    def __init__(self, cam_id, url, bus=None, active_fps=10.0, idle_fps=2.0, max_backoff=10.0, timeout=1.5,
+                 urls=None):
+        super().__init__(cam_id, url, bus, urls)
+        self.rate = RateController(active_fps, idle_fps, max_backoff)
+        self.timeout = timeout
+
+    def stats(self):
+        out = super().stats()
+        out.update(self.rate.stats())
+        return out
+
+    def _run(self):
+        print(f"[CAPTURE] Starting snapshot capture for {self.cam_id} at {self.url}")
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept': 'image/jpeg,image/*,*/*',
+            'Connection': 'keep-alive'
+        })
+        while not self._stop.is_set():
+            url = self.paths.active
+            failover = False
+            try:
+                started = time.monotonic()
+                resp = session.get(url, timeout=self.paths.timeout(self.timeout), stream=False)
+                elapsed = time.monotonic() - started
+                self._record_rtt(elapsed)
+                if resp.status_code == 200:
+                    # Keep the JPEG as-is; it is only decoded if a consumer needs pixels
+                    if resp.content[:2] == SOI:
+                        self._frame_ok(resp.content)
+                        self.paths.record_ok(url, elapsed, len(resp.content))
+                        if self.frames % 50 == 0:
+                            print(f"[CAPTURE] {self.cam_id}: captured {self.frames} frames successfully")
+                    else:
+                        self._frame_failed("not a JPEG")
+                        failover = self._path_failed(url)
+                else:
+                    self._frame_failed(f"status {resp.status_code}")
+                    failover = self._path_failed(url)
+            except Exception as e:
+                self._frame_failed(e)
+                failover = self._path_failed(url)
+                if self.consecutive_failures % 20 == 0:  # Print error every 20 failures
+                    print(f"[CAPTURE] {self.cam_id} error (attempt {self.consecutive_failures}): {e}")
+            if failover:
+                # Another path is healthy: fetch this frame from it now instead of backing off
+                continue
+            self._stop.wait(self.rate.next_interval(self.has_demand(), self.consecutive_failures))
+        session.close()
+        print(f"[CAPTURE] Snapshot capture for {self.cam_id} stopped")
+
+
+class MjpegWorker(CaptureWorker):
+    """Keeps one upstream MJPEG connection open and publishes the latest frame.
+
+    Reconnects with exponential backoff when the stream drops.
+    """
+
+    kind = "mjpeg"
+
+    def __init__(self, cam_id, url, bus=None, chunk_size=16384, connect_timeout=3.0,
+                 read_timeout=5.0, min_backoff=0.5, max_backoff=10.0, urls=None):
+        super().__init__(cam_id, url, bus, urls)
+        self.chunk_size = chunk_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.reconnects = 0
+
+    def stats(self):
+        out = super().stats()
+        out.update({"connected": self.connected, "reconnects": self.reconnects})
+        return out
+
+    def _run(self):
+        print(f"[MJPEG] Starting persistent reader for {self.cam_id} at {self.url}")
+        session = requests.Session()
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            url = self.paths.active
+            retry_now = False
+            try:
+                started = time.monotonic()
+                with session.get(url, stream=True,
+                                 timeout=(self.paths.timeout(self.connect_timeout), self._read_timeout())) as resp:
+                    if resp.status_code != 200:
+                        raise RuntimeError(f"upstream status {resp.status_code}")
+                    # Time to response headers
+                    self._record_rtt(time.monotonic() - started)
+                    self.connected = True
+                    backoff = self.min_backoff
+                    print(f"[MJPEG] Connected to {self.cam_id}" + (f" via {url}" if self.paths.multi else ""))
+                    # Returns only when the path selector moved to another URL
+                    self._read_stream(resp, url, started)
+                    retry_now = True
+            except Exception as e:
+                self._frame_failed(e)
+                retry_now = self._path_failed(url)
+            self.connected = False
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            if retry_now:
+                continue
+            if self.reconnects % 10 == 1:
+                print(f"[MJPEG] {self.cam_id} disconnected ({self.last_error}); retrying in {backoff:.1f}s")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        session.close()
+        print(f"[MJPEG] Reader for {self.cam_id} stopped")
+
+    def _read_timeout(self):
+        # With alternative paths, give up on a stalled stream after a few frame intervals
+        fps = self.fps()
+        return self.paths.timeout(self.read_timeout, floor=3.0 / fps if fps > 0 else self.read_timeout)
+
+    def _read_stream(self, resp, url, started):
+        parser = MjpegParser(boundary_from_content_type(resp.headers.get('Content-Type')))
+        first = True
+        for chunk in resp.iter_content(chunk_size=self.chunk_size):
+            if self._stop.is_set():
+                return
+            for jpeg in parser.feed(chunk):
+                # Own the bytes (the view dies on the next feed); decoding is lazy
+                self._frame_ok(bytes(jpeg))
+                if first:
+                    # Time to first frame: comparable with PathProber's probes of the other URLs
+                    self.paths.record_ok(url, time.monotonic() - started, len(jpeg))
+                    first = False
+            if self.paths.active != url:
+                return
+        # iter_content ended: upstream closed the connection
+        raise RuntimeError("stream ended")
+
+
+class RtspWorker(CaptureWorker):
+    """Reads an RTSP/H.264 stream (or a video file) through OpenCV's FFMPEG backend.
+
+    The grabber loop calls `grab()` for every frame so FFMPEG's buffer never
+    fills up and latency cannot grow; frames are only converted (`retrieve()`)
+    and published at the demand-driven rate (see RateController). `file://`
+    sources are paced to the file's FPS and loop at the end, for testing.
+    """
+
+    kind = "rtsp"
+
+    def __init__(self, cam_id, url, bus=None, active_fps=10.0, idle_fps=2.0, transport="tcp",
+                 open_timeout=5.0, read_timeout=5.0, min_backoff=0.5, max_backoff=10.0, urls=None):
+        super().__init__(cam_id, url, bus, urls)
+        self.rate = RateController(active_fps, idle_fps, max_backoff)
+        self.transport = transport
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.reconnects = 0
+        self.grabbed = 0
+
+    def stats(self):
+        out = super().stats()
+        out.update(self.rate.stats())
+        out.update({"connected": self.connected, "reconnects": self.reconnects, "grabbed": self.grabbed})
+        return out
+
+    @staticmethod
+    def _is_file(url):
+        return url.lower().startswith("file://")
+
+    def _open(self, url):
+        is_file = self._is_file(url)
+        source = url[len("file://"):] if is_file else url
+        if not is_file and self.transport:
+            # Must be set before the capture is opened; applies to the FFMPEG backend only
+            os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", f"rtsp_transport;{self.transport}")
+        params = []
+        if hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+            params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(self.open_timeout * 1000),
+                      cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(self.read_timeout * 1000)]
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError("could not open stream")
+        return cap
+
+    def _run(self):
+        print(f"[RTSP] Starting grabber for {self.cam_id} at {self.url}")
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            url = self.paths.active
+            retry_now = False
+            cap = None
+            try:
+                started = time.monotonic()
+                cap = self._open(url)
+                self._record_rtt(time.monotonic() - started)
+                # Health only: decoder open time isn't comparable with PathProber's TCP probes
+                self.paths.record_ok(url)
+                self.connected = True
+                backoff = self.min_backoff
+                print(f"[RTSP] Connected to {self.cam_id}" + (f" via {url}" if self.paths.multi else ""))
+                # Returns only when the path selector moved to another URL
+                self._grab_loop(cap, url)
+                retry_now = True
+            except Exception as e:
+                self._frame_failed(e)
+                retry_now = self._path_failed(url)
+            finally:
+                if cap is not None:
+                    cap.release()
+            self.connected = False
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            if retry_now:
+                continue
+            if self.reconnects % 10 == 1:
+                print(f"[RTSP] {self.cam_id} disconnected ({self.last_error}); retrying in {backoff:.1f}s")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        print(f"[RTSP] Grabber for {self.cam_id} stopped")
+
+    def _grab_loop(self, cap, url):
+        is_file = self._is_file(url)
+        file_interval = 0.0
+        if is_file:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            file_interval = 1.0 / fps if 0 < fps < 240 else 0.04
+        next_publish = 0.0
+        rewound = False
+        while not self._stop.is_set():
+            started = time.time()
+            if self.paths.active != url:
+                return
+            if not cap.grab():
+                if is_file and not rewound:
+                    # End of file: loop from the start
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                    continue
+                raise RuntimeError("stream ended")
+            rewound = False
+            self.grabbed += 1
+            now = time.time()
+            if now >= next_publish:
+                ok, image = cap.retrieve()
+                if ok and image is not None:
+                    self._frame_ok(None, image=image)
+                    next_publish = now + self.rate.next_interval(self.has_demand())
+                else:
+                    self._frame_failed("retrieve failed")
+            if file_interval:
+                self._stop.wait(max(0.0, file_interval - (time.time() - started)))
+
+
+class JournalWorker(CaptureWorker):
+    """Replays a recorded frame journal (see frame_journal) as a camera: journal://<dir>/<cam_id>.
+
+    The journal's original JPEG bytes are published unchanged and keep their
+    recorded capture time as `timestamp`, so cooldowns, motion hold times and
+    clip timing follow the recording rather than the replay pace.
+
+    With speed=0 (lockstep) the next frame is published only once a
+    `wait_for_frame` consumer (the detection loop) has taken the previous one,
+    so every recorded frame is processed exactly once, as fast as the consumer
+    allows. speed > 0 replays at that multiple of the recorded pace instead;
+    `loop` starts over at the end.
+    """
+
+    kind = "journal"
+
+    def __init__(self, cam_id, url, bus=None, speed=0.0, loop=False, urls=None):
+        super().__init__(cam_id, url, bus, urls)
+        self.directory = url[len("journal://"):] if url.startswith("journal://") else url
+        self.speed = speed
+        self.loop = loop
+        self.replayed = 0
+        self.position = None  # recorded capture time of the frame being replayed
+        self.finished = False
+
+    def stats(self):
+        out = super().stats()
+        out.update({"speed": self.speed, "replayed": self.replayed, "position": self.position,
+                    "finished": self.finished})
+        return out
+
+    def _run(self):
+        mode = f"{self.speed:g}x" if self.speed else "lockstep"
+        print(f"[JOURNAL] Replaying {self.directory} as {self.cam_id} ({mode})")
+        started = time.monotonic()
+        while not self._stop.is_set():
+            first, wall_start = None, time.monotonic()
+            for timestamp, _, jpeg in JournalReader(self.directory).frames():
+                if self._stop.is_set():
+                    break
+                if self.speed:
+                    first = timestamp if first is None else first
+                    delay = (timestamp - first) / self.speed - (time.monotonic() - wall_start)
+                    if delay > 0:
+                        self._stop.wait(delay)
+                self.position = timestamp
+                before = self.slot.seq
+                self._frame_ok(bytes(jpeg), timestamp=timestamp)
+                self.replayed += 1
+                seq = self.slot.seq
+                if not self.speed and seq != before:
+                    while not self._stop.is_set() and not self.slot.wait_taken(seq, timeout=0.5):
+                        pass
+            if not self.loop or not self.replayed:
+                break
+        self.finished = True
+        elapsed = time.monotonic() - started
+        print(f"[JOURNAL] Replay of {self.cam_id} finished: {self.replayed} frames in {elapsed:.1f}s "
+              f"({self.replayed / elapsed if elapsed > 0 else 0.0:.1f} fps)")
+
+
+WORKER_TYPES = {
+    "snapshot": SnapshotWorker,
+    "mjpeg": MjpegWorker,
+    "rtsp": RtspWorker,
+    "journal": JournalWorker,
+}
+
+
+class CaptureManager:
+    """Runs one capture worker per configured camera.
+
+    Every captured frame goes into the worker's latest-frame slot and, when a
+    FrameBus is given, is published on the bus under the camera id.
+
+    `sync(cameras)` reconciles the running workers with a {cam_id: url} mapping:
+    new cameras are started, removed ones stopped, and cameras whose URL changed
+    (e.g. after a network profile switch) are restarted on the new URL. Cameras
+    with several candidate URLs keep one worker that moves between them.
+
+    `worker_options` maps a worker kind ("snapshot", "mjpeg") to extra keyword
+    arguments for that worker class; `worker_types` overrides the class (or
+    factory) used per kind, e.g. to run snapshot cameras on the async engine.
+    """
+
+    def __init__(self, bus=None, worker_options=None, worker_types=None):
+        self.bus = bus
+        self.worker_options = worker_options or {}
+        self.worker_types = dict(WORKER_TYPES, **(worker_types or {}))
+        self._lock = threading.Lock()
+        self._workers = {}
+        self._kinds = {}
+        self.started = False
+
+    def sync(self, cameras, types=None, candidates=None):
+        """Reconcile workers with {cam_id: url}; `types` gives each camera's type
+        ({cam_id: "snapshot" | "mjpeg" | "rtsp" | "journal"}), falling back to `camera_kind(url)`,
+        and `candidates` each camera's list of alternative URLs (see `camera_candidates`)."""
+        types = types or {}
+        candidates = candidates or {}
+        with self._lock:
+            for cam_id in list(self._workers):
+                worker = self._workers[cam_id]
+                url = cameras.get(cam_id)
+                if (url != worker.url or (types.get(cam_id) or camera_kind(url)) != self._kinds.get(cam_id)
+                        or (candidates.get(cam_id) or [url]) != worker.paths.urls):
+                    worker.stop()
+                    del self._workers[cam_id]
+                    print(f"[CAPTURE] Stopped worker for {cam_id} ({worker.url})")
+            for cam_id, url in cameras.items():
+                if not url or url == "test" or cam_id in self._workers:
+                    continue
+                kind = types.get(cam_id) or camera_kind(url)
+                options = dict(self.worker_options.get(kind, {}))
+                if len(candidates.get(cam_id) or ()) > 1:
+                    options["urls"] = candidates[cam_id]
+                worker = self.worker_types[kind](cam_id, url, bus=self.bus, **options)
+                self._workers[cam_id] = worker
+                self._kinds[cam_id] = kind
+                worker.start()
+            self.started = True
+
+    def stop_all(self):
+        with self._lock:
+            for worker in self._workers.values():
+                worker.stop()
+            self._workers.clear()
+            self._kinds.clear()
+            self.started = False
+
+    def workers(self):
+        with self._lock:
+            return list(self._workers.values())
+
+    def worker(self, camera):
+        """Look up a worker by camera id or by its current URL."""
+        with self._lock:
+            worker = self._workers.get(camera)
+            if worker is not None:
+                return worker
+            for worker in self._workers.values():
+                if worker.url == camera:
+                    return worker
+        return None
+
+    def latest_frame(self, camera, max_age=10.0, wait=0.0):
+        worker = self.worker(camera)
+        if worker is None:
+            return None
+        return worker.latest_frame(max_age=max_age, wait=wait)
+
+    def wait_for_frame(self, camera, after_seq=0, timeout=None, max_age=10.0):
+        """Block until `camera` has a frame with seq > `after_seq`; None on timeout."""
+        worker = self.worker(camera)
+        if worker is None:
+            # Not configured (yet): behave like a timeout instead of spinning callers
+            time.sleep(timeout if timeout is not None else 1.0)
+            return None
+        return worker.wait_for_frame(after_seq, timeout, max_age)
+
+    def latest(self, camera, max_age=10.0, wait=0.0):
+        worker = self.worker(camera)
+        if worker is None:
+            return None
+        return worker.latest(max_age=max_age, wait=wait)
+
+    def stats(self):
+        with self._lock:
+            workers = dict(self._workers)
+        return {cam_id: worker.stats() for cam_id, worker in workers.items()}
@@ -0,0 +1,280 @@
+"""
+FalconEye Frame Journal
+Append-only journal of a camera's raw JPEG frames (segmented, memory-mappable, indexed) for deterministic replay
+
+Layout, one directory per camera:
+
+    <journal_dir>/<cam_id>/<start_ms>.frames   raw JPEG bytes, back to back, after an 8-byte header
+    <journal_dir>/<cam_id>/<start_ms>.index    8-byte header + one 32-byte entry per frame:
+                                               offset u64, seq u64, capture timestamp f64, length u32
+
+Nothing is re-encoded: replaying a journal (camera type "journal", see frame_capture.JournalWorker)
+feeds the detector the exact bytes the camera sent.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from frame_bus import EVERY
+
+FRAMES_MAGIC = b"FEJF0001"
+INDEX_MAGIC = b"FEJI0001"
+INDEX_ENTRY = struct.Struct("<QQdI4x")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("seq", "<u8"), ("timestamp", "<f8"), ("length", "<u4"), ("_pad", "<u4")])
+
+
+class JournalWriter:
+    """Appends frames for one camera, rolling to a new segment every `segment_bytes`.
+
+    Writes are buffered; the index is flushed every `flush_interval` seconds so a
+    crash loses at most that much. The oldest segments are deleted once the
+    camera's journal exceeds `max_bytes` (0 = keep everything).
+    """
+
+    def __init__(self, directory, cam_id, segment_bytes=256 * 1024 * 1024, max_bytes=0, flush_interval=1.0):
+        self.directory = os.path.join(directory, cam_id)
+        self.cam_id = cam_id
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(self.directory, exist_ok=True)
+        self._frames = None
+        self._index = None
+        self._offset = 0
+        self._last_flush = 0.0
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.segments = 0
+
+    def _open_segment(self, timestamp):
+        self.close()
+        base = os.path.join(self.directory, f"{int(timestamp * 1000):015d}")
+        self._frames = open(base + ".frames", "wb", buffering=1024 * 1024)
+        self._index = open(base + ".index", "wb", buffering=64 * 1024)
+        self._frames.write(FRAMES_MAGIC)
+        self._index.write(INDEX_MAGIC)
+        self._offset = len(FRAMES_MAGIC)
+        self.segments += 1
+        self._enforce_retention()
+
+    def append(self, jpeg, timestamp, seq):
+        if self._frames is None or self._offset + len(jpeg) > self.segment_bytes:
+            self._open_segment(timestamp)
+        self._frames.write(jpeg)
+        self._index.write(INDEX_ENTRY.pack(self._offset, seq, timestamp, len(jpeg)))
+        self._offset += len(jpeg)
+        self.frames_written += 1
+        self.bytes_written += len(jpeg)
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        # Frames before index: an index entry never points past the data on disk
+        if self._frames is not None:
+            self._frames.flush()
+            self._index.flush()
+
+    def close(self):
+        if self._frames is not None:
+            self.flush()
+            self._frames.close()
+            self._index.close()
+            self._frames = self._index = None
+
+    def _enforce_retention(self):
+        if not self.max_bytes:
+            return
+        segments = list_segments(self.directory)
+        sizes = {s: os.path.getsize(s + ".frames") for s in segments if os.path.exists(s + ".frames")}
+        total = sum(sizes.values())
+        # Never delete the segment being written (the newest)
+        for segment in segments[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.get(segment, 0)
+            for ext in (".frames", ".index"):
+                try:
+                    os.remove(segment + ext)
+                except OSError:
+                    pass
+
+
+def list_segments(directory):
+    """Segment base paths (without extension) in a camera's journal directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name[:-len(".index")])
+            for name in sorted(os.listdir(directory)) if name.endswith(".index")]
+
+
+class JournalSegment:
+    """One memory-mapped segment: `index` is a numpy view of the entries, `frame(i)` a zero-copy view."""
+
+    def __init__(self, base):
+        self.base = base
+        with open(base + ".frames", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        with open(base + ".index", "rb") as f:
+            raw = f.read()
+        if raw[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{base}.index is not a FalconEye journal index")
+        body = raw[len(INDEX_MAGIC):]
+        # A crash can leave a partial trailing entry or entries past the flushed data
+        count = len(body) // INDEX_DTYPE.itemsize
+        index = np.frombuffer(body, INDEX_DTYPE, count=count)
+        self.index = index[index["offset"] + index["length"] <= size]
+
+    def __len__(self):
+        return len(self.index)
+
+    def frame(self, i):
+        entry = self.index[i]
+        start = int(entry["offset"])
+        return memoryview(self._map)[start:start + int(entry["length"])]
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # frames handed out are still referenced; unmapped once they are released
+            self._map = None
+
+
+class JournalReader:
+    """Iterates a camera's journal in capture order.
+
+    Yields (timestamp, seq, jpeg) where `jpeg` is a zero-copy memoryview into
+    the mapped segment (it keeps the mapping alive while referenced). `start`
+    (wall-clock seconds) skips to the first frame at or after that time.
+    """
+
+    def __init__(self, directory, cam_id=None):
+        self.directory = os.path.join(directory, cam_id) if cam_id else directory
+        self.segments = list_segments(self.directory)
+
+    def __iter__(self):
+        return self.frames()
+
+    def frames(self, start=None):
+        for base in self.segments:
+            segment = JournalSegment(base)
+            try:
+                first = 0
+                if start is not None and len(segment):
+                    if segment.index["timestamp"][-1] < start:
+                        continue
+                    first = int(np.searchsorted(segment.index["timestamp"], start))
+                for i in range(first, len(segment)):
+                    entry = segment.index[i]
+                    yield float(entry["timestamp"]), int(entry["seq"]), segment.frame(i)
+            finally:
+                segment.close()
+
+    def summary(self):
+        frames, size, first, last = 0, 0, None, None
+        for base in self.segments:
+            segment = JournalSegment(base)
+            try:
+                if len(segment):
+                    frames += len(segment)
+                    size += int(segment.index["length"].sum())
+                    first = float(segment.index["timestamp"][0]) if first is None else first
+                    last = float(segment.index["timestamp"][-1])
+            finally:
+                segment.close()
+        return {"segments": len(self.segments), "frames": frames, "bytes": size,
+                "start": first, "end": last, "duration": (last - first) if frames else 0.0}
+
+
+class JournalRecorder:
+    """Records the raw JPEGs of selected cameras from the frame bus.
+
+    Each camera gets a non-realtime every-frame subscription (so it never
+    raises a camera's capture rate) and a writer thread; if the disk falls
+    behind, frames are dropped from the subscription queue and counted.
+    Frames without JPEG bytes (RTSP, decoded by FFMPEG) cannot be journaled.
+    """
+
+    def __init__(self, bus, directory, cameras, **writer_options):
+        self.bus = bus
+        self.directory = directory
+        self.cameras = list(cameras)
+        self.writer_options = writer_options
+        self._writers = {}
+        self._subs = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for cam_id in self.cameras:
+                sub = self.bus.subscribe(cam_id, mode=EVERY, maxsize=256, realtime=False, name="journal")
+                writer = JournalWriter(self.directory, cam_id, **self.writer_options)
+                self._subs[cam_id], self._writers[cam_id] = sub, writer
+                thread = threading.Thread(target=self._run, args=(sub, writer), name=f"journal-{cam_id}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            print(f"[JOURNAL] Recording raw frames of {', '.join(self.cameras)} to {self.directory}")
+
+    def stop(self):
+        with self._lock:
+            for sub in self._subs.values():
+                sub.close()
+            for thread in self._threads:
+                thread.join(timeout=2.0)
+            for writer in self._writers.values():
+                writer.close()
+            self._threads = []
+
+    def _run(self, sub, writer):
+        while not sub.closed:
+            frame = sub.get(timeout=1.0)
+            if frame is None:
+                writer.flush()
+                continue
+            if frame.jpeg is None:
+                self.skipped += 1
+                continue
+            try:
+                writer.append(frame.jpeg, frame.timestamp, frame.seq)
+            except OSError as e:
+                print(f"[JOURNAL] {writer.cam_id}: write failed: {e}")
+                time.sleep(1.0)
+
+    def stats(self):
+        return {
+            cam_id: {
+                "frames": writer.frames_written,
+                "bytes": writer.bytes_written,
+                "segments": writer.segments,
+                "dropped": self._subs[cam_id].dropped,
+            }
+            for cam_id, writer in self._writers.items()
+        }
+
+
+def main():
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Summarize FalconEye frame journals")
+    ap.add_argument("directory", nargs="?", default="journal", help="journal directory (FALCONEYE_JOURNAL_DIR)")
+    args = ap.parse_args()
+    cams = sorted(name for name in os.listdir(args.directory) if os.path.isdir(os.path.join(args.directory, name)))
+    print(json.dumps({cam: JournalReader(args.directory, cam).summary() for cam in cams}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+FalconEye Inference Engines
+YOLO detectors behind one call interface: ultralytics/torch, or the same weights exported to ONNX on ONNX Runtime
+
+Either engine can serve as `backend.py`'s `model`/`live_model`: called as
+`model([frames], conf=..., verbose=...)`, it returns one result per frame with
+`boxes.xyxy/conf/cls` and `names` (OnnxYOLO returns detections.Detections).
+
+The "onnx" engine exports the configured weights once (ultralytics is only
+needed for that step) and runs them on ONNX Runtime, optionally INT8-quantized:
+"dynamic" quantizes weights only; "static" also quantizes activations, with
+ranges calibrated on recorded frames (a frame journal, an image folder or a
+video). Exports and quantized models are cached next to the weights.
+"""
+
+import ast
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+ENGINES = ("ultralytics", "onnx")
+QUANTIZE_MODES = ("none", "dynamic", "static")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def onnx_available():
+    return ort is not None
+
+
+# ---------------- Pre/post-processing (same as ultralytics predict) ----------------
+
+def letterbox(image, size, color=114):
+    """Resize keeping the aspect ratio and pad to size x size; returns (canvas, ratio, (pad_x, pad_y))."""
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    canvas = np.full((size, size, 3), color, np.uint8)
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR) if (new_w, new_h) != (w, h) else image
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+    return canvas, ratio, (pad_x, pad_y)
+
+
+def preprocess(images, size):
+    """NCHW float32 RGB batch scaled to 0..1, plus each image's (ratio, pad) for mapping boxes back."""
+    canvases, transforms = [], []
+    for image in images:
+        canvas, ratio, pad = letterbox(image, size)
+        canvases.append(canvas)
+        transforms.append((ratio, pad))
+    return cv2.dnn.blobFromImages(canvases, 1.0 / 255.0, swapRB=True), transforms
+
+
+def decode_output(output, ratio, pad, shape, conf=0.25, iou=0.7, max_det=300, classes=None):
+    """One image's raw YOLOv8/11 output (4 + classes, anchors) -> (xyxy, conf, cls) in original pixels.
+
+    Class-aware NMS like ultralytics' default (boxes of different classes never suppress each other).
+    """
+    pred = np.asarray(output, np.float32).T
+    scores = pred[:, 4:]
+    cls = scores.argmax(axis=1)
+    confs = scores[np.arange(len(scores)), cls]
+    keep = confs >= conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    if not keep.any():
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.float32)
+    cxcywh, confs, cls = pred[keep, :4], confs[keep], cls[keep]
+    xyxy = np.concatenate([cxcywh[:, :2] - cxcywh[:, 2:] / 2, cxcywh[:, :2] + cxcywh[:, 2:] / 2], axis=1)
+    # Shift each class to its own region so a single NMS pass stays per class
+    offset = (cls[:, None] * 7680.0).astype(np.float32)
+    shifted = xyxy + offset
+    xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+    picked = np.asarray(cv2.dnn.NMSBoxes(xywh.tolist(), confs.tolist(), conf, iou), np.int64).reshape(-1)[:max_det]
+    xyxy, confs, cls = xyxy[picked], confs[picked], cls[picked]
+    xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad[0]) / ratio).clip(0, shape[1])
+    xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad[1]) / ratio).clip(0, shape[0])
+    return xyxy, confs, cls.astype(np.float32)
+
+
+# ---------------- ONNX Runtime engine ----------------
+
+class OnnxYOLO:
+    """An exported YOLO detector on ONNX Runtime, called like an ultralytics YOLO model.
+
+    `model(frames, conf=..., iou=..., classes=..., max_det=...)` returns a
+    list of Detections; other ultralytics predict options (verbose, ...) are
+    accepted and ignored. Batches run as one session call when the model was
+    exported with a dynamic batch axis.
+    """
+
+    def __init__(self, path, device="cpu", threads=None):
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        if device == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = ort.InferenceSession(path, options, providers=providers)
+        self.path = path
+        self.device = "cuda" if self.session.get_providers()[0] == "CUDAExecutionProvider" else "cpu"
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        # ultralytics stores names/imgsz as Python literals in the ONNX metadata
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        height = model_input.shape[2]
+        self.imgsz = height if isinstance(height, int) else int(ast.literal_eval(metadata.get("imgsz", "[640]"))[0])
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+    def to(self, device):
+        # Execution providers are fixed when the session is created
+        return self
+
+    def __call__(self, frames, conf=0.25, iou=0.7, classes=None, max_det=300, **_):
+        if not isinstance(frames, (list, tuple)):
+            frames = [frames]
+        batch, transforms = preprocess(frames, self.imgsz)
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                      for i in range(len(frames))])
+        results = []
+        for frame, output, (ratio, pad) in zip(frames, outputs, transforms):
+            xyxy, confs, cls = decode_output(output, ratio, pad, frame.shape[:2], conf, iou, max_det, classes)
+            results.append(Detections(xyxy, confs, cls, self.names, frame))
+        return results
+
+
+# ---------------- Export / quantization ----------------
+
+def onnx_path(weights, imgsz=640, quantize="none"):
+    """Where the export of `weights` at `imgsz` (and its quantized variant) is cached."""
+    stem = os.path.splitext(weights)[0]
+    suffix = "" if quantize == "none" else f"-int8-{quantize}"
+    return f"{stem}-{imgsz}{suffix}.onnx"
+
+
+def export_onnx(weights, imgsz=640):
+    """Export ultralytics weights to ONNX with a dynamic batch axis; reuses an export newer than the weights."""
+    path = onnx_path(weights, imgsz)
+    if os.path.exists(path) and (not os.path.exists(weights) or os.path.getmtime(path) >= os.path.getmtime(weights)):
+        return path
+    from ultralytics import YOLO
+
+    print(f"[ENGINE] Exporting {weights} to ONNX ({imgsz}x{imgsz})")
+    exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    os.replace(exported, path)
+    return path
+
+
+def sample_frames(source, limit=200):
+    """Up to `limit` BGR frames spread evenly over a sample set.
+
+    `source` is a camera's frame journal directory (or journal://path), a
+    folder of images, or a video file.
+    """
+    from frame_capture import decode_jpeg
+    from frame_journal import JournalReader, list_segments
+
+    if source.startswith("journal://"):
+        source = source[len("journal://"):]
+    if os.path.isdir(source) and list_segments(source):
+        reader = JournalReader(source)
+        total = reader.summary()["frames"]
+        step = max(1, total // limit)
+        frames = []
+        for i, (_, _, jpeg) in enumerate(reader.frames()):
+            if i % step == 0:
+                image = decode_jpeg(jpeg)
+                if image is not None:
+                    frames.append(image)
+            if len(frames) >= limit:
+                break
+        return frames
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        paths = paths[::max(1, len(paths) // limit)][:limit]
+        return [image for image in (cv2.imread(p) for p in paths) if image is not None]
+    capture = cv2.VideoCapture(source)
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or limit
+    step = max(1, total // limit)
+    frames, i = [], 0
+    while len(frames) < limit:
+        ok, image = capture.read()
+        if not ok:
+            break
+        if i % step == 0:
+            frames.append(image)
+        i += 1
+    capture.release()
+    return frames
+
+
+class _CalibrationReader:
+    """onnxruntime CalibrationDataReader over preprocessed sample frames, one per batch."""
+
+    def __init__(self, input_name, frames, imgsz):
+        self._inputs = iter([{input_name: preprocess([frame], imgsz)[0]} for frame in frames])
+
+    def get_next(self):
+        return next(self._inputs, None)
+
+
+def quantize_onnx(fp32_path, mode, imgsz=640, calibration=None, calibration_frames=200):
+    """INT8 version of an exported model; "static" calibrates activation ranges on `calibration` frames."""
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    path = fp32_path.replace(".onnx", f"-int8-{mode}.onnx")
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(fp32_path):
+        return path
+    if mode == "dynamic":
+        print(f"[ENGINE] Quantizing {fp32_path} (INT8 dynamic)")
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QUInt8)
+        return path
+    if mode != "static":
+        raise ValueError(f"quantize must be one of {', '.join(QUANTIZE_MODES)}")
+    if not calibration:
+        raise ValueError("static quantization needs calibration frames (FALCONEYE_ONNX_CALIBRATION)")
+    frames = sample_frames(calibration, calibration_frames)
+    if not frames:
+        raise ValueError(f"no calibration frames in {calibration}")
+    print(f"[ENGINE] Quantizing {fp32_path} (INT8 static, {len(frames)} calibration frames from {calibration})")
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(fp32_path, path, _CalibrationReader(input_name, frames, imgsz),
+                    quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    per_channel=True, calibrate_method=CalibrationMethod.MinMax)
+    return path
+
+
+def load_onnx(weights, device="cpu", imgsz=640, quantize="none", calibration=None, threads=None):
+    """OnnxYOLO for `weights`: a .onnx file is used as-is, ultralytics weights are exported (and quantized) first."""
+    if ort is None:
+        raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+    path = weights if weights.endswith(".onnx") else export_onnx(weights, imgsz)
+    if quantize != "none":
+        path = quantize_onnx(path, quantize, imgsz, calibration)
+    return OnnxYOLO(path, device, threads)
+
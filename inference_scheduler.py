@@ -0,0 +1,179 @@
+"""
+FalconEye Inference Scheduler
+Micro-batches frames from all cameras and live streams into one forward pass per model
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from latency import percentile
+
+
+class _Request:
+    __slots__ = ("frame", "key", "kwargs", "group", "future", "submitted")
+
+    def __init__(self, frame, key, kwargs):
+        self.frame = frame
+        self.key = key
+        self.kwargs = kwargs
+        # Only requests with identical call options (conf, ...) can share a forward pass
+        self.group = tuple(sorted(kwargs.items()))
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class InferenceScheduler:
+    """Runs all inference for one model on a single thread, in micro-batches.
+
+    Callers (one per camera detection loop, live stream, snapshot request)
+    `submit()` a frame and get a Future for its result; `infer()` blocks on
+    it. The scheduler thread takes the oldest request and waits up to
+    `max_wait` seconds for more, then calls `model([frames...], **kwargs)`
+    once for up to `max_batch` requests that share the same options.
+
+    It stops waiting early once every recently active caller (`key` seen
+    within `active_window` seconds) has a request queued, so a single camera
+    pays no batching delay. `model` is anything that maps a list of images
+    to a list of per-image results, e.g. an ultralytics YOLO model.
+    """
+
+    def __init__(self, model, name="detect", max_batch=8, max_wait=0.02, active_window=2.0, window=300):
+        self.model = model
+        self.name = name
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait
+        self.active_window = active_window
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._active = {}  # key -> last submit time
+        self._thread = None
+        self._stop = False
+
+        # Stats
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self._batch_sizes = deque(maxlen=window)
+        self._forward_times = deque(maxlen=window)
+        self._wait_times = deque(maxlen=window)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name=f"inference-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+
+    def submit(self, frame, key=None, **kwargs):
+        """Queue `frame` for inference; returns a Future resolving to the model's result for it."""
+        request = _Request(frame, key, kwargs)
+        self.start()
+        with self._cond:
+            if key is not None:
+                self._active[key] = request.submitted
+            self._queue.append(request)
+            self.requests += 1
+            self._cond.notify_all()
+        return request.future
+
+    def infer(self, frame, key=None, timeout=None, **kwargs):
+        """Blocking `submit()`: returns the result list for this one frame, like `model(frame)`.
+
+        Ultralytics returns a list with one Results per image; it is wrapped
+        the same way so callers keep indexing `results[0]`.
+        """
+        return [self.submit(frame, key, **kwargs).result(timeout)]
+
+    def _expected(self, now):
+        # Callers that submitted recently and are likely to submit again soon
+        for key, seen in list(self._active.items()):
+            if now - seen > self.active_window:
+                del self._active[key]
+        return len(self._active)
+
+    def _ready(self, now):
+        queued_keys = {r.key for r in self._queue if r.key is not None}
+        target = min(self.max_batch, max(1, self._expected(now)))
+        return len(self._queue) >= self.max_batch or len(queued_keys) >= target
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._stop:
+                self._cond.wait()
+            if self._stop:
+                return None
+            deadline = self._queue[0].submitted + self.max_wait
+            while not self._stop:
+                now = time.monotonic()
+                if now >= deadline or self._ready(now):
+                    break
+                self._cond.wait(deadline - now)
+            group = self._queue[0].group
+            batch, rest = [], deque()
+            while self._queue:
+                request = self._queue.popleft()
+                if request.group == group and len(batch) < self.max_batch:
+                    batch.append(request)
+                else:
+                    rest.append(request)
+            self._queue = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                results = self.model([r.frame for r in batch], **batch[0].kwargs)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"model returned {len(results)} results for {len(batch)} frames")
+            except Exception as e:
+                self.errors += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished = time.monotonic()
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+            self._forward_times.append(finished - started)
+            for request, result in zip(batch, results):
+                self._wait_times.append(started - request.submitted)
+                request.future.set_result(result)
+
+    def stats(self):
+        sizes = sorted(self._batch_sizes)
+        forward = sorted(self._forward_times)
+        waits = sorted(self._wait_times)
+
+        def ms(values, pct):
+            return round(percentile(values, pct) * 1000, 1) if values else None
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queued": len(self._queue),
+            "active_callers": len(self._active),
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "batch_size_mean": round(sum(sizes) / len(sizes), 2) if sizes else None,
+            "batch_size_max": sizes[-1] if sizes else None,
+            "forward_p50_ms": ms(forward, 50),
+            "forward_p99_ms": ms(forward, 99),
+            "queue_wait_p50_ms": ms(waits, 50),
+            "queue_wait_p99_ms": ms(waits, 99),
+            "frames_per_forward_second": round(sum(sizes) / sum(forward), 1) if forward and sum(forward) > 0 else None,
+        }
@@ -0,0 +1,367 @@
+"""
+FalconEye Inference Service
+Serves detection requests and camera frames to web workers over a local socket, so only one process
+loads the models and only one process connects to each camera
+
+The daemon (`FALCONEYE_ROLE=inference python backend.py`) owns the models, their
+batching schedulers, the capture workers and the detection loops. Web workers
+(`FALCONEYE_ROLE=web`, e.g. under gunicorn) use RemoteModel in place of the
+YOLO models and never import torch or ultralytics, and RemoteCaptureWorker in
+place of the camera workers.
+
+Wire format, both directions: 8-byte header (JSON length, payload length, big
+endian u32) + JSON + payload. An infer request's payload is the raw image
+(shape/dtype in the JSON); the reply's is an N x 6 float32 detection array.
+A frame reply's payload is the camera's JPEG, or the raw image (shape/dtype
+in the JSON) for cameras that only deliver pixels (RTSP).
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from detections import Detections
+from frame_capture import CaptureWorker
+from latency import percentile
+
+DEFAULT_ADDRESS = "/tmp/falconeye-inference.sock"
+_HEADER = struct.Struct("!II")
+
+
+def parse_address(address):
+    """"host:port" -> TCP (for containers), anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        count = sock.recv_into(view[got:], n - got)
+        if count == 0:
+            raise ConnectionError("connection closed")
+        got += count
+    return buf
+
+
+def send_message(sock, header, payload=b""):
+    body = json.dumps(header).encode()
+    sock.sendall(_HEADER.pack(len(body), len(payload)) + body)
+    if len(payload):
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    header_len, payload_len = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(bytes(_recv_exact(sock, header_len)))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def _image_payload(frame):
+    frame = np.ascontiguousarray(frame)
+    # Sent without a copy; frames are a few MB, detections a few hundred bytes
+    return {"shape": list(frame.shape), "dtype": str(frame.dtype)}, memoryview(frame).cast("B") if frame.size else b""
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server.service
+        # Per-connection state: the frame bus subscriptions of a remote capture worker
+        session = {}
+        try:
+            while True:
+                try:
+                    header, payload = recv_message(self.request)
+                except (ConnectionError, OSError, ValueError):
+                    return
+                try:
+                    reply, body = server.dispatch(header, payload, session)
+                except Exception as e:
+                    reply, body = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+                try:
+                    send_message(self.request, reply, body)
+                except OSError:
+                    return
+        finally:
+            for sub in session.values():
+                sub.close()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class InferenceServer:
+    """Socket front end for the daemon's inference schedulers.
+
+    `schedulers` maps a model name ("detect", "live") to an InferenceScheduler;
+    `names` to that model's class names. Each client connection is served by
+    its own thread, so requests from many web workers land in the scheduler
+    concurrently and are batched together.
+
+    `capture` (a CaptureManager with a frame bus) serves "frame" requests: each
+    remote capture worker holds a bus subscription here for as long as its
+    connection lives, flagged with its own viewers' demand, so polling rates
+    and ESP32 resolution control see the web workers' viewers. `handlers` maps
+    extra ops to callables taking the request header and returning a dict.
+    """
+
+    def __init__(self, schedulers, names, address=DEFAULT_ADDRESS, info=None, capture=None, handlers=None):
+        self.schedulers = schedulers
+        self.names = names
+        self.address = address
+        self.info = info or {}
+        self.capture = capture
+        self.handlers = handlers or {}
+        self.requests = 0
+        self.frames = 0
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        family, addr = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.remove(addr)  # stale socket from a previous run
+            self._server = _UnixServer(addr, _Handler)
+        else:
+            self._server = _TcpServer(addr, _Handler)
+        self._server.service = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="inference-service", daemon=True)
+        self._thread.start()
+        print(f"[INFERENCE] Serving {', '.join(self.schedulers)} on {self.address}")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            family, addr = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(addr):
+                os.remove(addr)
+            self._server = None
+
+    def dispatch(self, header, payload, session=None):
+        op = header.get("op")
+        if op == "frame":
+            return self._frame(header, {} if session is None else session)
+        if op == "infer":
+            scheduler = self.schedulers[header["model"]]
+            frame = np.frombuffer(payload, header["dtype"]).reshape(header["shape"])
+            self.requests += 1
+            result = scheduler.submit(frame, key=header.get("key"), **header.get("kwargs", {})).result()
+            array = Detections.from_results(result).to_array()
+            return {"ok": True, "n": len(array)}, array.astype(np.float32).tobytes()
+        if op == "info":
+            return {"ok": True, **self.info,
+                    "models": {name: {"names": {str(k): v for k, v in names.items()}}
+                               for name, names in self.names.items()}}, b""
+        if op == "stats":
+            return {"ok": True, "requests": self.requests, "frames": self.frames,
+                    "models": {name: s.stats() for name, s in self.schedulers.items()}}, b""
+        if op in self.handlers:
+            return {"ok": True, **self.handlers[op](header)}, b""
+        raise ValueError(f"unknown op {op!r}")
+
+    def _frame(self, header, session):
+        """Next frame of a camera for a remote capture worker (long poll, up to `timeout` seconds)."""
+        if self.capture is None or self.capture.bus is None:
+            raise ValueError("this process does not capture frames")
+        cam_id = header["cam_id"]
+        realtime, full_res = bool(header.get("realtime")), bool(header.get("full_res"))
+        sub = session.get(cam_id)
+        frame = None
+        if sub is None:
+            sub = session[cam_id] = self.capture.bus.subscribe(cam_id, realtime=realtime, name="remote",
+                                                               full_res=full_res)
+            # A new worker starts from the newest frame instead of waiting for the next one
+            frame = self.capture.latest_frame(cam_id)
+        sub.realtime, sub.full_res = realtime, full_res
+        if frame is None:
+            frame = sub.get(timeout=min(float(header.get("timeout", 2.0)), 10.0))
+        if frame is None:
+            return {"ok": True, "frame": None}, b""
+        meta = {"seq": frame.seq, "timestamp": frame.timestamp}
+        if frame.jpeg is not None:
+            payload = frame.jpeg
+        elif frame.image is not None:
+            image_header, payload = _image_payload(frame.image)
+            meta.update(image_header)
+        else:
+            return {"ok": True, "frame": None}, b""
+        self.frames += 1
+        return {"ok": True, "frame": meta}, payload
+
+
+class ServiceClient:
+    """Client side of the socket; each calling thread keeps its own connection."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=30.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self.errors = 0
+
+    def _connect(self):
+        family, addr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, header, payload=b""):
+        # One retry on a fresh connection: the daemon may have restarted since the last call
+        for attempt in (0, 1):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                send_message(sock, header, payload)
+                reply, body = recv_message(sock)
+                break
+            except (OSError, ConnectionError):
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt:
+                    self.errors += 1
+                    raise
+        if not reply.get("ok"):
+            self.errors += 1
+            raise RuntimeError(f"inference service: {reply.get('error')}")
+        return reply, body
+
+    def call(self, op, **fields):
+        """Send one request without payload; returns the reply header."""
+        return self.request({"op": op, **fields})[0]
+
+    def close(self):
+        """Close the calling thread's connection."""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class RemoteModel(ServiceClient):
+    """Stands in for one of the daemon's models (and its scheduler) in a web worker.
+
+    `infer(frame, key=..., conf=...)` mirrors InferenceScheduler.infer and
+    returns [Detections]; calling it like a model (`m(frame)`) works too.
+    Each calling thread keeps its own connection, so concurrent requests
+    reach the daemon in parallel and can share a batch there.
+    """
+
+    def __init__(self, name, address=DEFAULT_ADDRESS, timeout=30.0, window=300):
+        super().__init__(address, timeout)
+        self.name = name
+        self._names = None
+        self.requests = 0
+        self._round_trips = deque(maxlen=window)
+
+    def info(self):
+        return self.call("info")
+
+    @property
+    def names(self):
+        if self._names is None:
+            names = self.info()["models"][self.name]["names"]
+            self._names = {int(k): v for k, v in names.items()}
+        return self._names
+
+    def infer(self, frame, key=None, timeout=None, **kwargs):
+        image_header, payload = _image_payload(frame)
+        started = time.monotonic()
+        _, body = self.request({"op": "infer", "model": self.name, "key": key, "kwargs": kwargs, **image_header},
+                               payload)
+        self._round_trips.append(time.monotonic() - started)
+        self.requests += 1
+        array = np.frombuffer(body, np.float32) if body else np.zeros(0, np.float32)
+        return [Detections.from_array(array, self.names, orig_img=frame)]
+
+    def __call__(self, frames, **kwargs):
+        if isinstance(frames, (list, tuple)):
+            return [self.infer(frame, **kwargs)[0] for frame in frames]
+        return self.infer(frames, **kwargs)
+
+    def stats(self):
+        trips = sorted(self._round_trips)
+        return {
+            "remote": self.address,
+            "requests": self.requests,
+            "errors": self.errors,
+            "round_trip_p50_ms": round(percentile(trips, 50) * 1000, 1) if trips else None,
+            "round_trip_p99_ms": round(percentile(trips, 99) * 1000, 1) if trips else None,
+        }
+
+
+class RemoteCaptureWorker(CaptureWorker):
+    """A web worker's camera: frames come from the capture-owning process over the socket.
+
+    Only the daemon connects to the camera. This worker long-polls it for
+    the camera's frames and republishes them in the web worker (latest-frame
+    slot and frame bus), so the routes work unchanged. Every request carries
+    the local viewers' demand (realtime, full_res), which the daemon applies
+    to its own subscription for this worker.
+    """
+
+    kind = "remote"
+
+    def __init__(self, cam_id, url, bus=None, address=DEFAULT_ADDRESS, poll_timeout=2.0, max_backoff=10.0, urls=None):
+        super().__init__(cam_id, url, bus, urls)
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self.client = ServiceClient(address, timeout=poll_timeout + 5.0)
+
+    def stats(self):
+        out = super().stats()
+        out["remote"] = self.client.address
+        return out
+
+    def _run(self):
+        print(f"[CAPTURE] Receiving {self.cam_id} from {self.client.address}")
+        backoff = 0.5
+        while not self._stop.is_set():
+            full_res = self.bus is not None and self.bus.subscriber_count(self.cam_id, full_res_only=True) > 0
+            try:
+                reply, body = self.client.request({"op": "frame", "cam_id": self.cam_id, "timeout": self.poll_timeout,
+                                                   "realtime": self.has_demand(), "full_res": full_res})
+                backoff = 0.5
+            except Exception as e:
+                self._frame_failed(e)
+                if self.consecutive_failures % 20 == 1:
+                    print(f"[CAPTURE] {self.cam_id}: capture service unavailable ({e}); retrying in {backoff:.1f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            meta = reply.get("frame")
+            if meta is None:
+                continue
+            if "shape" in meta:
+                image = np.frombuffer(body, meta["dtype"]).reshape(meta["shape"])
+                self._frame_ok(None, image=image, timestamp=meta["timestamp"])
+            else:
+                self._frame_ok(bytes(body), timestamp=meta["timestamp"])
+        # Drops this worker's subscription (and its demand) in the daemon
+        self.client.close()
+        print(f"[CAPTURE] Receiver for {self.cam_id} stopped")
@@ -0,0 +1,117 @@
+"""
+FalconEye Latency
+Per-camera, per-stage frame latency tracking from capture (or source) to socket write
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Rolling windows of stage durations keyed by (camera, pipeline, stage).
+
+    A pipeline is one consumer of a camera's frames ("live", "detect", ...).
+    `stats()` reports p50/p90/p99/max in milliseconds over the last `window`
+    samples of each stage.
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, cam_id, pipeline, stage, seconds):
+        key = (cam_id, pipeline, stage)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentiles(self, cam_id, pipeline, stage):
+        with self._lock:
+            values = sorted(self._samples.get((cam_id, pipeline, stage), ()))
+        if not values:
+            return None
+        return {
+            "p50": round(percentile(values, 50) * 1000, 1),
+            "p90": round(percentile(values, 90) * 1000, 1),
+            "p99": round(percentile(values, 99) * 1000, 1),
+            "max": round(values[-1] * 1000, 1),
+            "count": len(values),
+        }
+
+    def stats(self, cam_id=None):
+        """{cam_id: {pipeline: {stage: {p50, p90, p99, max, count}}}} (milliseconds)."""
+        with self._lock:
+            keys = [k for k in self._samples if cam_id is None or k[0] == cam_id]
+        out = {}
+        for cam, pipeline, stage in sorted(keys):
+            result = self.percentiles(cam, pipeline, stage)
+            if result is not None:
+                out.setdefault(cam, {}).setdefault(pipeline, {})[stage] = result
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+class FrameTimer:
+    """Stopwatch for one frame through a pipeline, anchored at its capture time.
+
+    Call `mark(stage)` at the end of each stage (repeated marks of the same
+    stage add up) and `done()` once the frame has been written. Recorded per
+    frame:
+
+    - camera: source stamp -> capture (only for stamped test sources)
+    - queue: capture -> pickup by this pipeline
+    - each marked stage
+    - glass_to_glass: source stamp (or capture) -> done()
+    """
+
+    def __init__(self, tracker, captured, pipeline):
+        self.tracker = tracker
+        self.cam_id = captured.cam_id
+        self.pipeline = pipeline
+        self.captured_at = captured.received
+        self.source_time = captured.source_time
+        self.origin = self.source_time if self.source_time is not None else self.captured_at
+        self._last = time.time()
+        self.stages = {"queue": max(0.0, self._last - self.captured_at)}
+        if self.source_time is not None:
+            self.stages["camera"] = max(0.0, self.captured_at - self.source_time)
+
+    def mark(self, stage):
+        now = time.time()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def age(self):
+        """Seconds since the frame left the camera (or was captured)."""
+        return time.time() - self.origin
+
+    def done(self, stage="write"):
+        self.mark(stage)
+        self.stages["glass_to_glass"] = self._last - self.origin
+        for name, seconds in self.stages.items():
+            self.tracker.record(self.cam_id, self.pipeline, name, seconds)
+        return self.stages["glass_to_glass"]
+
+    def overlay_text(self):
+        """One-line debug overlay: this frame's age and the pipeline's recent p50/p99."""
+        text = f"age {self.age() * 1000:.0f}ms"
+        recent = self.tracker.percentiles(self.cam_id, self.pipeline, "glass_to_glass")
+        if recent:
+            text += f" | p50 {recent['p50']:.0f}ms p99 {recent['p99']:.0f}ms"
+        if self.source_time is None:
+            text += " (from capture)"
+        return text
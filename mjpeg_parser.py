@@ -0,0 +1,287 @@
+"""
+FalconEye MJPEG Parser
+Incremental multipart/x-mixed-replace parser shared by every MJPEG consumer
+"""
+
+SOI = b'\xff\xd8'
+EOI = b'\xff\xd9'
+SOS = 0xDA
+COM = 0xFE
+
+# COM segment payload prefix used by test sources to stamp frames with their creation time
+TIMESTAMP_PREFIX = b'FalconEye-ts:'
+
+# Markers that carry no length field
+_STANDALONE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+
+
+def boundary_from_content_type(content_type):
+    """Extract the multipart boundary token from a Content-Type header value.
+
+    Returns the boundary without leading dashes, or None when absent.
+    """
+    if not content_type or 'boundary=' not in content_type:
+        return None
+    boundary = content_type.split('boundary=', 1)[1].split(';', 1)[0].strip().strip('"')
+    boundary = boundary.lstrip('-')
+    return boundary or None
+
+
+def jpeg_scan_start(buf, start, end=None):
+    """Return the offset of the entropy-coded data of the JPEG at `start`.
+
+    Walks the marker segments (skipping their declared lengths) up to the first
+    SOS header. This is what makes the parser immune to 0xFFD9 bytes inside
+    APP segments such as EXIF thumbnails. Returns -1 when more data is needed
+    and -2 when the data does not look like a JPEG.
+    """
+    if end is None:
+        end = len(buf)
+    i = start + 2
+    while True:
+        if i + 4 > end:
+            return -1
+        if buf[i] != 0xFF:
+            return -2
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            i += 2
+            continue
+        seg_len = (buf[i + 2] << 8) | buf[i + 3]
+        if seg_len < 2:
+            return -2
+        if marker == SOS:
+            if i + 2 + seg_len > end:
+                return -1
+            return i + 2 + seg_len
+        i += 2 + seg_len
+
+
+def jpeg_dimensions(buf):
+    """Return (width, height) from a JPEG's SOF header without decoding, or None."""
+    end = len(buf)
+    if end < 4 or buf[0] != 0xFF or buf[1] != 0xD8:
+        return None
+    i = 2
+    while i + 4 <= end:
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            i += 2
+            continue
+        seg_len = (buf[i + 2] << 8) | buf[i + 3]
+        if seg_len < 2 or marker == SOS:
+            return None
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if i + 9 > end:
+                return None
+            height = (buf[i + 5] << 8) | buf[i + 6]
+            width = (buf[i + 7] << 8) | buf[i + 8]
+            return width, height
+        i += 2 + seg_len
+    return None
+
+
+def stamp_jpeg(jpeg, timestamp):
+    """Return `jpeg` with a COM segment holding `timestamp` (wall clock) right after SOI."""
+    payload = TIMESTAMP_PREFIX + f"{timestamp:.6f}".encode()
+    return SOI + bytes((0xFF, COM)) + (len(payload) + 2).to_bytes(2, "big") + payload + bytes(jpeg[2:])
+
+
+def jpeg_timestamp(buf):
+    """Creation time stamped by `stamp_jpeg`, or None for ordinary camera JPEGs.
+
+    Only the segment right after SOI is looked at, so this costs nothing on
+    real camera frames.
+    """
+    if len(buf) < 6 or buf[2] != 0xFF or buf[3] != COM:
+        return None
+    seg_len = (buf[4] << 8) | buf[5]
+    payload = bytes(buf[6:4 + seg_len])
+    if not payload.startswith(TIMESTAMP_PREFIX):
+        return None
+    try:
+        return float(payload[len(TIMESTAMP_PREFIX):])
+    except ValueError:
+        return None
+
+
+class MjpegParser:
+    """Incremental MJPEG parser over a single reusable `bytearray`.
+
+    Feed it raw chunks from the upstream socket; `feed()` yields each complete
+    JPEG as a `memoryview` into the internal buffer, so no per-frame copy is
+    made. A yielded view is only valid until the next `feed()` call; use
+    `bytes(view)` to keep a frame around.
+
+    When the multipart boundary is known, part headers are honoured and
+    `Content-Length` is used to slice the body directly. Otherwise (or when a
+    part has no length) frames are delimited by walking the JPEG structure from
+    SOI to the EOI that follows the scan data.
+    """
+
+    def __init__(self, boundary=None, max_frame_size=8 * 1024 * 1024):
+        self.boundary = boundary.lstrip('-').encode() if isinstance(boundary, str) else boundary
+        self.max_frame_size = max_frame_size
+        self._buf = bytearray()
+        self._pos = 0
+        # Pending-part state
+        self._part_length = None
+        self._in_body = False
+        self._frame_start = -1
+        self._scan_from = -1
+        # Stats
+        self.frames = 0
+        self.bytes_in = 0
+        self.resyncs = 0
+        self.part_headers = {}
+
+    def reset(self):
+        self._buf = bytearray()
+        self._pos = 0
+        self._reset_part()
+
+    def _reset_part(self):
+        self._part_length = None
+        self._in_body = False
+        self._frame_start = -1
+        self._scan_from = -1
+
+    def _append(self, chunk):
+        # Drop consumed bytes once they dominate the buffer so it stays small.
+        # If a consumer still holds a view of the old buffer the bytearray can't
+        # be resized; switch to a fresh buffer and let the old one be collected.
+        try:
+            if self._pos and (self._pos >= len(self._buf) // 2 or self._pos > 1 << 20):
+                del self._buf[:self._pos]
+                self._shift(self._pos)
+            self._buf += chunk
+        except BufferError:
+            self._buf = self._buf[self._pos:] + chunk
+            self._shift(self._pos)
+
+    def _shift(self, n):
+        self._pos -= n
+        if self._frame_start >= 0:
+            self._frame_start -= n
+        if self._scan_from >= 0:
+            self._scan_from -= n
+
+    def feed(self, chunk):
+        """Consume a chunk and yield every JPEG it completes as a memoryview."""
+        if not chunk:
+            return
+        self.bytes_in += len(chunk)
+        self._append(chunk)
+        while True:
+            view = self._next_frame()
+            if view is None:
+                break
+            self.frames += 1
+            yield view
+            del view
+        if len(self._buf) - self._pos > self.max_frame_size:
+            # Runaway part (lost sync or corrupt stream): start over
+            self.resyncs += 1
+            self._pos = len(self._buf)
+            self._reset_part()
+
+    def _next_frame(self):
+        if self.boundary:
+            return self._next_multipart_frame()
+        return self._next_scanned_frame()
+
+    def _next_multipart_frame(self):
+        buf = self._buf
+        while True:
+            if not self._in_body:
+                b = buf.find(self.boundary, self._pos)
+                if b == -1:
+                    # Keep enough tail to match a boundary split across chunks
+                    self._pos = max(self._pos, len(buf) - len(self.boundary) - 4)
+                    return None
+                hdr_end = buf.find(b'\r\n\r\n', b)
+                sep = 4
+                if hdr_end == -1:
+                    hdr_end = buf.find(b'\n\n', b)
+                    sep = 2
+                    if hdr_end == -1:
+                        self._pos = b
+                        return None
+                self.part_headers = self._parse_headers(buf[b:hdr_end])
+                length = self.part_headers.get('content-length')
+                try:
+                    self._part_length = int(length) if length is not None else None
+                except ValueError:
+                    self._part_length = None
+                self._in_body = True
+                self._pos = hdr_end + sep
+                self._frame_start = -1
+                self._scan_from = -1
+
+            if self._part_length is None:
+                view = self._next_scanned_frame()
+                if view is not None:
+                    self._reset_part()
+                return view
+
+            start = self._pos
+            end = start + self._part_length
+            if end > len(buf):
+                return None
+            self._pos = end
+            self._reset_part()
+            if buf[start:start + 2] == SOI:
+                return memoryview(buf)[start:end]
+            # Part isn't a JPEG (or the length lied): skip to the next boundary
+            self.resyncs += 1
+
+    def _next_scanned_frame(self):
+        buf = self._buf
+        if self._frame_start < 0:
+            start = buf.find(SOI, self._pos)
+            if start == -1:
+                # Keep a possible partial marker at the tail only
+                self._pos = max(self._pos, len(buf) - 1)
+                return None
+            self._frame_start = start
+            self._scan_from = -1
+        start = self._frame_start
+        if self._scan_from < 0:
+            scan = jpeg_scan_start(buf, start)
+            if scan == -1:
+                return None
+            if scan == -2:
+                # Not a well-formed header; fall back to naive EOI search
+                self.resyncs += 1
+                scan = start + 2
+            self._scan_from = scan
+        # Inside entropy-coded data 0xFF is always byte-stuffed, so the first
+        # 0xFFD9 after the scan header is the real end of image.
+        end = buf.find(EOI, self._scan_from)
+        if end == -1:
+            self._scan_from = max(self._scan_from, len(buf) - 1)
+            return None
+        self._pos = end + 2
+        self._frame_start = -1
+        self._scan_from = -1
+        return memoryview(buf)[start:end + 2]
+
+    @staticmethod
+    def _parse_headers(block):
+        headers = {}
+        for line in bytes(block).split(b'\n')[1:]:
+            if b':' not in line:
+                continue
+            key, value = line.split(b':', 1)
+            headers[key.strip().lower().decode('latin-1')] = value.strip().decode('latin-1')
+        return headers
@@ -0,0 +1,226 @@
+"""
+FalconEye Motion Gate
+Cheap per-camera motion detection that decides whether a frame is worth running YOLO on
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "method": "mog2",     # "mog2" (background subtraction) or "diff" (difference to a running average)
+    "sensitivity": 16,    # per-pixel change threshold (MOG2 varThreshold / grey levels); lower = more sensitive
+    "min_area": 0.002,    # smallest moving blob, as a fraction of the frame area
+    "hold": 2.0,          # seconds the gate stays open after the last motion (objects that stop moving)
+    "keepalive": 10.0,    # run the detector at least this often even without motion (0 = never)
+    "crop": True,         # on motion, run the detector only around the moving region
+}
+
+
+class MotionResult:
+    """Outcome for one frame: `run` says whether to infer; `boxes` are moving regions (x1, y1, x2, y2)
+    in the coordinates of the image passed to `MotionGate.check` times `scale`."""
+
+    __slots__ = ("run", "moving", "reason", "boxes", "changed")
+
+    def __init__(self, run, moving, reason, boxes, changed):
+        self.run = run
+        self.moving = moving
+        self.reason = reason  # "motion", "hold", "keepalive", "warmup", "disabled" or "still"
+        self.boxes = boxes
+        self.changed = changed  # fraction of pixels that changed
+
+    def region(self):
+        """Bounding box of all moving regions, or None (for cropping the detector input)."""
+        if not self.boxes:
+            return None
+        boxes = np.asarray(self.boxes)
+        return (int(boxes[:, 0].min()), int(boxes[:, 1].min()), int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+
+    def crop(self, shape, scale=1.0, margin=0.5, min_size=320, max_fraction=0.5):
+        """Detector crop (x1, y1, x2, y2) around the moving region, in pixels of an image of `shape`.
+
+        `scale` maps that image to the `region` coordinates (the detector's
+        box_scale). The region grows by `margin` of its size on each side and
+        to at least `min_size` pixels, so the whole object and some context are
+        in view. None when nothing moved or the crop would cover more than
+        `max_fraction` of the image.
+        """
+        region = self.region()
+        if region is None:
+            return None
+        h, w = shape[:2]
+        x1, y1, x2, y2 = (v / scale for v in region)
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        cw = min(w, max((x2 - x1) * (1 + 2 * margin), min_size))
+        ch = min(h, max((y2 - y1) * (1 + 2 * margin), min_size))
+        # Slide the window back inside the image rather than shrinking it
+        x1 = int(round(min(max(cx - cw / 2, 0), w - cw)))
+        y1 = int(round(min(max(cy - ch / 2, 0), h - ch)))
+        x2, y2 = int(round(x1 + cw)), int(round(y1 + ch))
+        if (x2 - x1) * (y2 - y1) > max_fraction * w * h:
+            return None
+        return x1, y1, x2, y2
+
+
+def restrict(image, offset, box):
+    """`image` (placed at `offset` in the frame) cut down to the frame rectangle `box`.
+
+    Returns (image, offset) like `CameraZones.prepare`; the input is returned
+    unchanged if `box` does not overlap it.
+    """
+    h, w = image.shape[:2]
+    x1, y1 = max(box[0] - offset[0], 0), max(box[1] - offset[1], 0)
+    x2, y2 = min(box[2] - offset[0], w), min(box[3] - offset[1], h)
+    if x2 <= x1 or y2 <= y1:
+        return image, offset
+    return image[y1:y2, x1:x2], (offset[0] + x1, offset[1] + y1)
+
+
+class MotionGate:
+    """Motion pre-stage for one camera's detection loop.
+
+    `check(image)` works on a `width`-pixel grayscale copy (pass the cheapest
+    decode available, e.g. a 1/8 DCT-scaled one) and returns a MotionResult.
+    The gate opens on motion, stays open for `hold` seconds after it, and
+    opens once every `keepalive` seconds regardless, so a stationary person
+    or a missed change is still picked up. The first `warmup` frames always
+    run while the background model settles.
+    """
+
+    def __init__(self, width=160, warmup=5, **settings):
+        self.width = width
+        self.warmup = warmup
+        self.settings = dict(DEFAULT_SETTINGS)
+        self._lock = threading.Lock()
+        self._subtractor = None
+        self._background = None
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._last_motion = 0.0
+        self._last_run = 0.0
+        self._now = 0.0
+        self._since_reset = 0
+        self.last = None
+
+        # Stats
+        self.frames = 0
+        self.opened = 0
+        self.motion_frames = 0
+        self.keepalives = 0
+        self.configure(**settings)
+
+    def configure(self, **settings):
+        """Apply (possibly changed) settings; the background model is rebuilt only if it has to be."""
+        settings = {k: v for k, v in settings.items() if k in DEFAULT_SETTINGS}
+        with self._lock:
+            rebuild = any(settings.get(k, self.settings[k]) != self.settings[k] for k in ("method", "sensitivity"))
+            self.settings.update(settings)
+            if rebuild:
+                self._subtractor = None
+                self._background = None
+                self._since_reset = 0
+
+    def _mask(self, gray):
+        s = self.settings
+        if s["method"] == "mog2":
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                    history=300, varThreshold=float(s["sensitivity"]), detectShadows=True)
+            mask = self._subtractor.apply(gray)
+            # Shadows are marked 127; only foreground (255) counts as motion
+            _, mask = cv2.threshold(mask, 200, 255, cv2.THRESH_BINARY)
+            return mask
+        current = gray.astype(np.float32)
+        if self._background is None:
+            self._background = current
+            return np.zeros_like(gray)
+        diff = cv2.absdiff(current, self._background)
+        cv2.accumulateWeighted(current, self._background, 0.05)
+        _, mask = cv2.threshold(diff, float(s["sensitivity"]), 255, cv2.THRESH_BINARY)
+        return mask.astype(np.uint8)
+
+    def check(self, image, scale=1.0, now=None):
+        """Decide for one frame; `scale` maps `image` pixels to the caller's full-resolution pixels.
+
+        `now` is the frame's capture time (default: the wall clock), so hold and
+        keepalive follow the recording when a journal is replayed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            s = self.settings
+            if now < self._now:
+                # Frame time went backwards (a looped journal replay): restart the hold and keepalive clocks
+                self._last_motion = self._last_run = 0.0
+            self._now = now
+            self.frames += 1
+            self._since_reset += 1
+            if not s["enabled"]:
+                self.opened += 1
+                self._last_run = now
+                self.last = MotionResult(True, False, "disabled", [], 0.0)
+                return self.last
+            h, w = image.shape[:2]
+            factor = self.width / float(w)
+            small = cv2.resize(image, (self.width, max(1, int(round(h * factor)))), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+            gray = cv2.GaussianBlur(gray, (5, 5), 0)
+            mask = self._mask(gray)
+            mask = cv2.dilate(cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel), self._kernel, iterations=2)
+            changed = float(np.count_nonzero(mask)) / mask.size
+
+            boxes = []
+            min_pixels = s["min_area"] * mask.size
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            back = scale / factor
+            for contour in contours:
+                if cv2.contourArea(contour) < min_pixels:
+                    continue
+                x, y, bw, bh = cv2.boundingRect(contour)
+                boxes.append((x * back, y * back, (x + bw) * back, (y + bh) * back))
+
+            moving = bool(boxes)
+            if moving:
+                self._last_motion = now
+                self.motion_frames += 1
+                reason = "motion"
+            elif self._since_reset <= self.warmup:
+                reason = "warmup"
+            elif now - self._last_motion < s["hold"]:
+                reason = "hold"
+            elif s["keepalive"] and now - self._last_run >= s["keepalive"]:
+                reason = "keepalive"
+                self.keepalives += 1
+            else:
+                reason = "still"
+            run = reason != "still"
+            if run:
+                self.opened += 1
+                self._last_run = now
+            self.last = MotionResult(run, moving, reason, boxes, changed)
+            return self.last
+
+    def stats(self):
+        last = self.last
+        return {
+            "enabled": bool(self.settings["enabled"]),
+            "method": self.settings["method"],
+            "frames": self.frames,
+            "opened": self.opened,
+            "open_ratio": round(self.opened / self.frames, 3) if self.frames else None,
+            "motion_frames": self.motion_frames,
+            "keepalives": self.keepalives,
+            "last_reason": last.reason if last else None,
+            "last_boxes": [[round(v) for v in box] for box in last.boxes] if last else [],
+            "last_motion_age": round(self._now - self._last_motion, 1) if self._last_motion else None,
+        }
+
+
+def camera_settings(motion_settings, cam_id):
+    """Effective settings for `cam_id`: the global "motion" block overlaid with its "cameras" entry."""
+    motion_settings = motion_settings or {}
+    merged = {k: motion_settings.get(k, v) for k, v in DEFAULT_SETTINGS.items()}
+    merged.update((motion_settings.get("cameras") or {}).get(cam_id) or {})
+    return merged
@@ -0,0 +1,149 @@
+"""
+FalconEye Network Profiles
+Concurrent, deadline-bounded probing of network profiles and background profile selection
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from frame_capture import camera_candidates
+
+
+def probe_profiles(profiles, probe, deadline=2.0):
+    """Return the first profile (in list order) with at least one reachable camera.
+
+    Every camera of every profile is probed at once and the whole call is
+    bounded by `deadline` seconds; probes still pending then count as
+    unreachable. Returns early as soon as the answer can no longer change.
+    Returns None if no profile is reachable.
+    """
+    results = [{} for _ in profiles]
+    # Every candidate URL of a multi-URL camera counts for its profile
+    jobs = [(index, cam_id, url)
+            for index, profile in enumerate(profiles)
+            for cam_id, urls in camera_candidates(profile.get("cameras", {})).items()
+            for url in urls]
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="profile-probe")
+    try:
+        for index, cam_id, url in jobs:
+            pending[executor.submit(probe, url)] = (index, f"{cam_id}:{url}")
+
+        def decided():
+            # A profile wins once one of its cameras answered and every
+            # higher-priority profile is known to be unreachable
+            for index, profile in enumerate(profiles):
+                states = results[index]
+                if any(states.values()):
+                    return profile
+                if len(states) < sum(1 for i, _ in pending.values() if i == index):
+                    return False
+            return None
+
+        end = time.monotonic() + deadline
+        not_done = set(pending)
+        while not_done:
+            done, not_done = wait(not_done, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                index, cam_id = pending[future]
+                try:
+                    results[index][cam_id] = bool(future.result())
+                except Exception:
+                    results[index][cam_id] = False
+            winner = decided()
+            if winner is not False:
+                return winner
+        # Deadline hit: whatever has not answered is unreachable
+        for index, profile in enumerate(profiles):
+            if any(results[index].values()):
+                return profile
+        return None
+    finally:
+        # Don't wait for probes stuck past the deadline; they finish on their own
+        executor.shutdown(wait=False)
+
+
+class ProfileSelector:
+    """Picks the active network profile in the background.
+
+    The first evaluation runs as soon as `start()` is called, then every
+    `interval` seconds (0 disables re-probing), so a laptop moving between
+    home Wi-Fi and a hotspot follows its cameras. `apply(profile)` is called
+    only when the chosen profile changes. A manual selection (`pin()`) stops
+    automatic switching until `unpin()`.
+    """
+
+    def __init__(self, profiles, probe, apply, current=None, deadline=2.0, interval=60.0):
+        self.profiles = profiles
+        self.probe = probe
+        self.apply = apply
+        self.current = current
+        self.deadline = deadline
+        self.interval = interval
+        self.pinned = False
+        self.last_probe = None
+        self.last_result = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="profile-selector", daemon=True)
+            self._thread.start()
+
+    def pin(self):
+        self.pinned = True
+
+    def unpin(self):
+        self.pinned = False
+        self._wake.set()
+        if self._thread is not None:
+            # A one-shot selector (interval 0) has exited; run it again
+            self.start()
+
+    def _run(self):
+        while True:
+            if not self.pinned:
+                try:
+                    self.evaluate()
+                except Exception as e:
+                    print(f"[NETWORK] Profile probe failed: {e}")
+            if self.interval <= 0 and not self.pinned:
+                return
+            self._wake.wait(self.interval if self.interval > 0 else None)
+            self._wake.clear()
+
+    def evaluate(self):
+        started = time.monotonic()
+        profile = probe_profiles(self.profiles, self.probe, self.deadline)
+        self.last_probe = time.time()
+        self.last_result = profile.get("name") if profile else None
+        elapsed = time.monotonic() - started
+        if profile is None:
+            # Nothing reachable: keep whatever is active rather than flapping
+            print(f"[NETWORK] No profile reachable ({elapsed:.1f}s); keeping {self._name(self.current)}")
+            return None
+        if self.pinned or profile is self.current:
+            return profile
+        print(f"[NETWORK] Switching profile {self._name(self.current)} -> {profile.get('name')} ({elapsed:.1f}s)")
+        self.current = profile
+        self.apply(profile)
+        return profile
+
+    @staticmethod
+    def _name(profile):
+        return profile.get("name") if profile else None
+
+    def stats(self):
+        return {
+            "pinned": self.pinned,
+            "interval": self.interval,
+            "last_probe_age": round(time.time() - self.last_probe, 1) if self.last_probe else None,
+            "last_result": self.last_result,
+        }
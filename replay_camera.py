@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+FalconEye Replay Camera
+Serves recorded clips, image folders or a synthetic moving-object scene as fake
+ESP32 snapshot (/jpg) and Pi Zero MJPEG (/stream) cameras for load testing.
+
+Usage:
+    # One synthetic camera on :8090 (snapshot at /jpg, MJPEG at /stream)
+    python replay_camera.py
+
+    # Eight 1080p cameras replaying recorded clips at 15 fps on ports 8090-8097
+    python replay_camera.py --source clips/ --instances 8 --fps 15 --width 1920 --height 1080
+
+    # Print a FALCONEYE_NETWORK_PROFILES value that points the backend at them
+    python replay_camera.py --instances 8 --print-profile
+
+Every JPEG carries its creation time in a COM segment (see mjpeg_parser.stamp_jpeg),
+so /camera/latency reports true glass-to-glass latency for these cameras.
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from mjpeg_parser import stamp_jpeg
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class SyntheticSource:
+    """Textured background with a few objects moving across it."""
+
+    def __init__(self, width, height, seed=0, objects=3):
+        self.width = width
+        self.height = height
+        rng = np.random.default_rng(seed)
+        yy, xx = np.mgrid[0:height, 0:width]
+        base = ((xx / width) * 120 + (yy / height) * 60 + 40).astype(np.uint8)
+        noise = rng.integers(0, 25, size=(height, width), dtype=np.uint8)
+        gray = cv2.add(base, noise)
+        self.background = cv2.merge([gray, cv2.add(gray, 10), gray])
+        self.objects = []
+        for i in range(objects):
+            self.objects.append({
+                "pos": np.array([rng.uniform(0, width), rng.uniform(0, height)]),
+                "vel": rng.uniform(-1, 1, size=2) * max(width, height) * 0.01,
+                "size": int(min(width, height) * rng.uniform(0.08, 0.2)),
+                "color": tuple(int(c) for c in rng.integers(40, 255, size=3)),
+                "shape": ("person", "box")[i % 2],
+            })
+        self.index = 0
+
+    def next_frame(self):
+        frame = self.background.copy()
+        for obj in self.objects:
+            obj["pos"] += obj["vel"]
+            for axis, limit in ((0, self.width), (1, self.height)):
+                if not 0 <= obj["pos"][axis] <= limit:
+                    obj["vel"][axis] *= -1
+                    obj["pos"][axis] = min(max(obj["pos"][axis], 0), limit)
+            x, y = int(obj["pos"][0]), int(obj["pos"][1])
+            s = obj["size"]
+            if obj["shape"] == "person":
+                # Head and torso, roughly person-proportioned
+                cv2.circle(frame, (x, y - s), s // 3, obj["color"], -1)
+                cv2.rectangle(frame, (x - s // 3, y - s + s // 3), (x + s // 3, y + s), obj["color"], -1)
+            else:
+                cv2.rectangle(frame, (x - s, y - s // 2), (x + s, y + s // 2), obj["color"], -1)
+        self.index += 1
+        cv2.putText(frame, f"FalconEye replay #{self.index} {time.strftime('%H:%M:%S')}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        return frame
+
+
+class VideoSource:
+    """Loops over one or more video files."""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.current = 0
+        self.cap = None
+
+    def next_frame(self):
+        for _ in range(len(self.paths) + 1):
+            if self.cap is None:
+                self.cap = cv2.VideoCapture(self.paths[self.current])
+            ok, frame = self.cap.read()
+            if ok:
+                return frame
+            # End of this clip: move to the next one (wrapping around)
+            self.cap.release()
+            self.cap = None
+            self.current = (self.current + 1) % len(self.paths)
+        return None
+
+
+class ImageFolderSource:
+    """Cycles through the images in a folder."""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.index = 0
+
+    def next_frame(self):
+        for _ in range(len(self.paths)):
+            frame = cv2.imread(self.paths[self.index % len(self.paths)])
+            self.index += 1
+            if frame is not None:
+                return frame
+        return None
+
+
+def open_source(source, width, height, seed=0):
+    """Build a frame source from "synthetic", a video file, or a folder of clips/images."""
+    if source == "synthetic":
+        return SyntheticSource(width, height, seed=seed)
+    if os.path.isdir(source):
+        files = sorted(glob.glob(os.path.join(source, "*")))
+        videos = [f for f in files if f.lower().endswith(VIDEO_EXTENSIONS)]
+        if videos:
+            # Start each instance on a different clip so cameras don't mirror each other
+            offset = seed % len(videos)
+            return VideoSource(videos[offset:] + videos[:offset])
+        images = [f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        if images:
+            return ImageFolderSource(images)
+        raise ValueError(f"no videos or images in {source}")
+    if os.path.isfile(source):
+        if source.lower().endswith(IMAGE_EXTENSIONS):
+            return ImageFolderSource([source])
+        return VideoSource([source])
+    raise ValueError(f"source not found: {source}")
+
+
+class ReplayCamera:
+    """One fake camera: produces frames at a fixed rate and keeps the newest JPEG.
+
+    Frames are encoded once and shared by every snapshot and MJPEG client.
+    """
+
+    def __init__(self, name, source, fps=10.0, width=None, height=None, quality=80, stamp=True):
+        self.name = name
+        self.source = source
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.stamp = stamp
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._stop = threading.Event()
+        self.clients = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"replay-{self.name}", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        next_time = time.time()
+        while not self._stop.is_set():
+            # The "glass" moment: when the frame is produced, before resize and encode
+            produced_at = time.time()
+            frame = self.source.next_frame()
+            if frame is not None:
+                if self.width and self.height and (frame.shape[1], frame.shape[0]) != (self.width, self.height):
+                    frame = cv2.resize(frame, (self.width, self.height))
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    jpeg = buf.tobytes()
+                    if self.stamp:
+                        jpeg = stamp_jpeg(jpeg, produced_at)
+                    with self._cond:
+                        self._jpeg = jpeg
+                        self._seq += 1
+                        self._cond.notify_all()
+            next_time += interval
+            delay = next_time - time.time()
+            if delay < 0:
+                # Can't keep up (e.g. large clips): don't try to catch up in a burst
+                next_time = time.time()
+            self._stop.wait(max(0.0, delay))
+
+    def latest(self, timeout=5.0):
+        with self._cond:
+            if self._jpeg is None:
+                self._cond.wait(timeout)
+            return self._jpeg
+
+    def wait_next(self, after_seq, timeout=5.0):
+        with self._cond:
+            if self._seq <= after_seq:
+                self._cond.wait(timeout)
+            return self._seq, self._jpeg
+
+
+def make_handler(camera):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path in ("/jpg", "/capture", "/snapshot.jpg"):
+                self._snapshot()
+            elif path in ("/", "/stream", "/mjpeg"):
+                self._stream()
+            elif path == "/status":
+                body = json.dumps({"name": camera.name, "fps": camera.fps, "seq": camera._seq,
+                                   "clients": camera.clients}).encode()
+                self._send(200, "application/json", body)
+            else:
+                self._send(404, "text/plain", b"not found")
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _snapshot(self):
+            jpeg = camera.latest()
+            if jpeg is None:
+                self._send(503, "text/plain", b"no frame yet")
+            else:
+                self._send(200, "image/jpeg", jpeg)
+
+        def _stream(self):
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            camera.clients += 1
+            seq = 0
+            try:
+                while not camera._stop.is_set():
+                    seq, jpeg = camera.wait_next(seq)
+                    if jpeg is None:
+                        continue
+                    self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                                     + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                camera.clients -= 1
+
+    return Handler
+
+
+def serve(camera, host, port):
+    """Start an HTTP server for `camera` in a background thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(camera))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"replay-http-{camera.name}", daemon=True).start()
+    return server
+
+
+def network_profile(host, base_port, instances):
+    """FALCONEYE_NETWORK_PROFILES entry: odd cameras as snapshot, even ones as MJPEG."""
+    cameras = {}
+    for i in range(instances):
+        url = f"http://{host}:{base_port + i}"
+        if i % 2 == 0:
+            cameras[f"cam{i + 1}"] = {"url": f"{url}/jpg", "type": "snapshot"}
+        else:
+            cameras[f"cam{i + 1}"] = {"url": f"{url}/stream", "type": "mjpeg"}
+    return [{"name": "replay", "cameras": cameras, "esp_pan_base": f"http://{host}:1"}]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", default="synthetic",
+                    help="'synthetic', a video file, or a folder of clips/images (e.g. clips/)")
+    ap.add_argument("--instances", type=int, default=1, help="number of cameras (one port each)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090, help="port of the first camera")
+    ap.add_argument("--fps", type=float, default=10.0)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    ap.add_argument("--no-stamp", action="store_true",
+                    help="don't stamp frames with their creation time (for latency measurement)")
+    ap.add_argument("--print-profile", action="store_true",
+                    help="print a FALCONEYE_NETWORK_PROFILES value for these cameras and exit")
+    args = ap.parse_args()
+
+    if args.print_profile:
+        print(json.dumps(network_profile(args.host, args.port, args.instances)))
+        return
+
+    cameras = []
+    for i in range(args.instances):
+        source = open_source(args.source, args.width, args.height, seed=i)
+        camera = ReplayCamera(f"replay{i + 1}", source, args.fps, args.width, args.height, args.quality,
+                              stamp=not args.no_stamp)
+        camera.start()
+        serve(camera, args.host, args.port + i)
+        cameras.append(camera)
+        print(f"[REPLAY] {camera.name}: http://{args.host}:{args.port + i}/jpg (snapshot), "
+              f"http://{args.host}:{args.port + i}/stream (MJPEG)")
+    print(f"[REPLAY] {args.instances} camera(s) from {args.source} at {args.fps} fps, {args.width}x{args.height}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for camera in cameras:
+            camera.stop()
+
+
+if __name__ == "__main__":
+    main()
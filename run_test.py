@@ -11,26 +11,34 @@ import sys
 import os
 import threading
 
+REPLAY_PORT = 8090
+
 def run_test_camera():
-    """Run the test camera in background"""
-    print("🎥 Starting Test Camera...")
-    return subprocess.Popen([sys.executable, "test_camera.py"])
+    """Run two replay cameras in background (synthetic scene, or clips/ if it has videos)"""
+    print("🎥 Starting Test Cameras...")
+    source = "clips" if os.path.isdir("clips") and any(
+        f.lower().endswith((".mp4", ".avi", ".mov")) for f in os.listdir("clips")) else "synthetic"
+    return subprocess.Popen([sys.executable, "replay_camera.py", "--source", source,
+                             "--instances", "2", "--port", str(REPLAY_PORT)])
 
 def run_backend():
-    """Run the FalconEye backend"""
+    """Run the FalconEye backend pointed at the replay cameras"""
     print("🚀 Starting FalconEye Backend...")
-    return subprocess.Popen([sys.executable, "backend.py"])
+    env = dict(os.environ)
+    env.update({
+        "CAM1_URL": f"http://127.0.0.1:{REPLAY_PORT}/jpg",
+        "CAM1_TYPE": "snapshot",
+        "CAM2_URL": f"http://127.0.0.1:{REPLAY_PORT + 1}/stream",
+        "CAM2_TYPE": "mjpeg",
+    })
+    return subprocess.Popen([sys.executable, "backend.py"], env=env)
 
 def main():
     print("=" * 60)
     print("🎯 FalconEye Object Detection Test")
     print("=" * 60)
     
-    # Switch to test camera
-    print("📷 Switching to Test Camera...")
-    subprocess.run([sys.executable, "switch_camera.py", "test"])
-    
-    # Start test camera
+    # Start test cameras
     test_camera_proc = run_test_camera()
     time.sleep(2)  # Wait for test camera to start
     
@@ -41,11 +49,11 @@ def main():
     print("✅ Test Environment Ready!")
     print("=" * 60)
     print("🌐 FalconEye Dashboard: http://localhost:3000")
-    print("🎥 Test Camera: http://localhost:8081")
-    print("📱 Test Camera JPEG: http://localhost:8081/jpg")
+    print(f"📱 Test Camera 1 (snapshot): http://localhost:{REPLAY_PORT}/jpg")
+    print(f"🎥 Test Camera 2 (MJPEG): http://localhost:{REPLAY_PORT + 1}/stream")
     print("\n🎯 Test Features:")
-    print("  • Simulated objects (people, cars, animals, etc.)")
-    print("  • Random movement and appearance")
+    print("  • Replayed clips from clips/ or a synthetic moving-object scene")
+    print("  • More cameras / higher load: python replay_camera.py --help")
     print("  • Real-time object detection")
     print("  • Video recording when objects detected")
     print("  • Push notifications")
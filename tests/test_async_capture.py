@@ -0,0 +1,96 @@
+"""
+Tests for the asyncio snapshot capture engine against a local HTTP camera stub.
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+pytest.importorskip("aiohttp")
+
+from async_capture import AsyncCaptureEngine, AsyncSnapshotWorker
+from frame_bus import FrameBus
+
+
+class CameraStub(BaseHTTPRequestHandler):
+    """ESP32-like /jpg endpoint: a new frame per request; anything else is a 404."""
+
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/jpg":
+            self.send_error(404)
+            return
+        CameraStub.requests += 1
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), CameraStub.requests % 256, np.uint8))
+        body = jpeg.tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def camera():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CameraStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_snapshot_cameras_share_one_loop_and_decode_only_for_viewers(camera):
+    engine = AsyncCaptureEngine(decode_threads=1)
+    bus = FrameBus()
+    watched = AsyncSnapshotWorker("cam1", camera + "/jpg", bus=bus, engine=engine, active_fps=20, idle_fps=20)
+    idle = AsyncSnapshotWorker("cam2", camera + "/jpg", bus=bus, engine=engine, active_fps=20, idle_fps=20)
+    with bus.subscribe("cam1", name="viewer") as viewer:
+        watched.start()
+        idle.start()
+        try:
+            assert wait_until(lambda: watched.frames >= 3 and idle.frames >= 3)
+            assert engine.stats()["cameras"] == 2
+            # The watched camera's frames are decoded by the pool, not by the viewer
+            frame = viewer.get(timeout=2.0)
+            assert wait_until(lambda: frame.decoded)
+            assert frame.image.shape == (48, 64, 3)
+            assert engine.decoded >= 1
+            # Nobody needs the idle camera's pixels: its frames stay compressed
+            assert not idle.latest_frame().decoded
+        finally:
+            watched.stop()
+            idle.stop()
+    assert wait_until(lambda: not watched.is_alive() and not idle.is_alive())
+
+
+def test_failing_camera_counts_failures_without_frames(camera):
+    engine = AsyncCaptureEngine()
+    worker = AsyncSnapshotWorker("cam1", camera + "/missing", engine=engine, idle_fps=20, max_backoff=0.1)
+    worker.start()
+    try:
+        assert wait_until(lambda: worker.failures >= 2)
+        assert worker.frames == 0 and "404" in worker.last_error
+    finally:
+        worker.stop()
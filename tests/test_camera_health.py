@@ -0,0 +1,62 @@
+"""
+Tests for the background camera health monitor.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from camera_health import CameraHealthMonitor, CircuitBreaker
+
+
+class FakeCapture:
+    def __init__(self, stats):
+        self._stats = stats
+
+    def stats(self):
+        return self._stats
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open" and breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and breaker.cooldown == 0.1
+    breaker.cooldown = 0
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_monitor_uses_capture_stats_without_probing():
+    probes = []
+    capture = FakeCapture({"cam1": {"running": True, "url": "http://a/jpg", "last_frame_age": 0.2,
+                                    "fps": 9.5, "consecutive_failures": 0, "rtt_ms": 12.0}})
+    monitor = CameraHealthMonitor(capture, lambda: ({"cam1": "http://a/jpg"}, {"cam1": "snapshot"}),
+                                  probe=probes.append)
+    health = monitor.refresh()["cam1"]
+    assert health["reachable"] and health["source"] == "capture" and health["rtt_ms"] == 12.0
+    assert probes == []
+
+
+def test_monitor_stops_probing_a_dead_camera():
+    probes = []
+
+    def probe(url):
+        probes.append(url)
+        return False
+
+    monitor = CameraHealthMonitor(FakeCapture({}), lambda: ({"cam1": "http://b/jpg"}, {"cam1": "snapshot"}),
+                                  probe=probe)
+    for _ in range(10):
+        health = monitor.refresh()["cam1"]
+    assert len(probes) == 3
+    assert health["reachable"] is False and health["circuit"]["state"] == "open"
+    assert monitor.snapshot()["cameras"]["cam1"]["reachable"] is False
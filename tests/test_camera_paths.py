@@ -0,0 +1,127 @@
+"""
+Tests for multi-URL camera path selection and failover.
+"""
+
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from camera_paths import PathSelector, probe_path
+from frame_capture import SnapshotWorker, camera_candidates, normalize_cameras
+
+
+def test_failure_on_active_path_fails_over_to_healthy_one():
+    paths = PathSelector(["http://lan/jpg", "http://tunnel/jpg"])
+    assert paths.active == "http://lan/jpg"
+    assert paths.record_failure("http://lan/jpg") is True
+    assert paths.active == "http://tunnel/jpg"
+    # Everything failing: rotate, but tell the worker to back off
+    assert paths.record_failure("http://tunnel/jpg") is False
+    assert paths.active == "http://lan/jpg"
+
+
+def test_rebalance_moves_to_clearly_faster_path_only():
+    paths = PathSelector(["http://tunnel/jpg", "http://lan/jpg"], min_dwell=0.0)
+    paths.record_ok("http://tunnel/jpg", 0.30, 60000)
+    paths.record_ok("http://lan/jpg", 0.25, 60000)
+    assert not paths.rebalance()  # within the 0.7 hysteresis
+    paths.record_ok("http://lan/jpg", 0.02, 60000)
+    assert paths.rebalance()
+    assert paths.active == "http://lan/jpg"
+    assert paths.timeout(1.5) < 1.5
+
+
+def test_candidates_from_config():
+    config = {"cam1": {"url": ["http://10.0.0.2/jpg", "https://cam1.example.com/jpg"], "type": "snapshot"},
+              "cam2": "http://10.0.0.3:8081/"}
+    urls, types = normalize_cameras(config)
+    assert urls == {"cam1": "http://10.0.0.2/jpg", "cam2": "http://10.0.0.3:8081/"}
+    assert types["cam1"] == "snapshot"
+    assert camera_candidates(config)["cam1"] == ["http://10.0.0.2/jpg", "https://cam1.example.com/jpg"]
+
+
+def _jpeg_server():
+    class Handler(BaseHTTPRequestHandler):
+        count = 0
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            Handler.count += 1
+            body = b"\xff\xd8" + str(Handler.count).encode() + b"\xff\xd9"
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _dead_url():
+    # A port nobody listens on: connections are refused immediately
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/jpg"
+
+
+def test_snapshot_worker_fails_over_without_backoff():
+    server = _jpeg_server()
+    live = f"http://127.0.0.1:{server.server_address[1]}/jpg"
+    dead = _dead_url()
+    worker = SnapshotWorker("cam1", dead, urls=[dead, live], idle_fps=10.0)
+    worker.start()
+    try:
+        assert worker.wait_for_frame(0, timeout=2.0) is not None
+        assert worker.paths.active == live
+        assert worker.stats()["paths"]["switches"] == 1
+    finally:
+        worker.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_mjpeg_probe_reads_one_part_and_hangs_up():
+    parts = []
+    hung_up = threading.Event()
+
+    class Stream(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.end_headers()
+            try:
+                for n in range(500):
+                    body = b"\xff\xd8" + bytes([n % 200]) * 2000 + b"\xff\xd9"
+                    self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                     b"Content-Length: %d\r\n\r\n" % len(body) + body + b"\r\n")
+                    self.wfile.flush()
+                    parts.append(n)
+                    time.sleep(0.01)
+            except OSError:
+                hung_up.set()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        seconds, nbytes = probe_path(f"http://127.0.0.1:{server.server_address[1]}/", "mjpeg")
+        assert nbytes == 2004 and seconds < 2.0
+        # The camera sees the probe go away instead of streaming to it until it ends
+        assert hung_up.wait(3.0)
+        assert len(parts) < 500
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,61 @@
+"""
+Tests for clip writing across camera resolution changes.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from clip_writer import ClipWriter
+
+LOW, HIGH = (240, 320), (480, 640)
+
+
+def read_back(path):
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def write_clip(path, sizes, settle):
+    writer = ClipWriter(str(path), 10, fourcc="MJPG", settle=settle)
+    for i, (h, w) in enumerate(sizes):
+        writer.write(np.full((h, w, 3), 100, np.uint8), timestamp=1000.0 + i * 0.1)
+    return writer, writer.close()
+
+
+def test_resolution_switch_mid_clip_keeps_every_frame(tmp_path):
+    # Low-res frames while the ESP32 switches, then high-res for the rest of the clip
+    sizes = [LOW] * 5 + [HIGH] * 20
+    writer, written = write_clip(tmp_path / "clip.avi", sizes, settle=0.0)
+    frames = read_back(tmp_path / "clip.avi")
+    assert written == len(frames) == 25
+    assert writer.size == (320, 240) and writer.resized == 20
+    assert all(f.shape[:2] == LOW for f in frames)
+
+
+def test_settle_window_opens_the_writer_at_the_recording_resolution(tmp_path):
+    sizes = [LOW] * 5 + [HIGH] * 20
+    writer, written = write_clip(tmp_path / "clip.avi", sizes, settle=1.0)
+    frames = read_back(tmp_path / "clip.avi")
+    assert written == len(frames) == 25
+    assert writer.size == (640, 480) and writer.resized == 5
+    assert all(f.shape[:2] == HIGH for f in frames)
+
+
+def test_short_clip_is_flushed_on_close(tmp_path):
+    writer, written = write_clip(tmp_path / "clip.avi", [HIGH] * 3, settle=10.0)
+    assert written == len(read_back(tmp_path / "clip.avi")) == 3
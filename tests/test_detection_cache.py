@@ -0,0 +1,100 @@
+"""
+Tests for the per-frame detection cache (fake scheduler, no YOLO required).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from detection_cache import DetectionCache
+from detections import Detections
+
+NAMES = {0: "person", 1: "car"}
+
+
+class FakeScheduler:
+    """Three boxes with confidences 0.3, 0.6 and 0.95, minus those under `conf`; counts calls."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def infer(self, frame, key=None, conf=0.25, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        det = Detections([[0, 0, 10, 10], [5, 5, 20, 20], [1, 1, 2, 2]], [0.3, 0.6, 0.95], [0, 1, 0], NAMES, frame)
+        return [det.filtered(conf, orig_img=frame)]
+
+
+def frame(h=48, w=64):
+    return np.zeros((h, w, 3), np.uint8)
+
+
+def test_concurrent_viewers_of_one_frame_cost_one_inference():
+    cache, scheduler = DetectionCache(), FakeScheduler(delay=0.05)
+    image = frame()
+    results = []
+
+    def viewer():
+        results.append(cache.infer(scheduler, "detect", "cam1", 7, image, conf=0.5)[0])
+
+    threads = [threading.Thread(target=viewer) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert scheduler.calls == 1
+    assert all(r.boxes.conf.tolist() == pytest.approx([0.6, 0.95]) for r in results)
+    assert all(r.orig_img is image for r in results)
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] + stats["coalesced"] == 9
+
+
+def test_lower_threshold_result_answers_higher_threshold_requests():
+    cache, scheduler = DetectionCache(), FakeScheduler()
+    image = frame()
+    assert len(cache.infer(scheduler, "detect", "cam1", 1, image)[0]) == 3
+    assert cache.infer(scheduler, "detect", "cam1", 1, image, conf=0.9)[0].boxes.conf.tolist() == pytest.approx([0.95])
+    assert scheduler.calls == 1
+    # A lower threshold than cached needs a new inference, which then serves both
+    cache.infer(scheduler, "detect", "cam1", 2, image, conf=0.9)
+    assert len(cache.infer(scheduler, "detect", "cam1", 2, image, conf=0.5)[0]) == 2
+    assert scheduler.calls == 3
+
+
+def test_key_includes_model_input_shape_and_frame():
+    cache, scheduler = DetectionCache(), FakeScheduler()
+    cache.infer(scheduler, "detect", "cam1", 1, frame())
+    cache.infer(scheduler, "live", "cam1", 1, frame())
+    cache.infer(scheduler, "detect", "cam1", 1, frame(24, 32))
+    cache.infer(scheduler, "detect", "cam1", 2, frame())
+    cache.infer(scheduler, "detect", "cam2", 1, frame())
+    cache.infer(scheduler, "detect", "cam1", None, frame())
+    cache.infer(scheduler, "detect", "cam1", None, frame())
+    assert scheduler.calls == 7
+
+
+def test_lru_eviction_and_failures_are_not_cached():
+    cache, scheduler = DetectionCache(maxsize=2), FakeScheduler()
+    for seq in (1, 2, 3):
+        cache.infer(scheduler, "detect", "cam1", seq, frame())
+    assert cache.stats()["evictions"] == 1
+    cache.infer(scheduler, "detect", "cam1", 1, frame())
+    assert scheduler.calls == 4
+
+    class Broken:
+        def infer(self, *args, **kwargs):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.infer(Broken(), "detect", "cam1", 9, frame())
+    assert len(cache.infer(scheduler, "detect", "cam1", 9, frame())[0]) == 3
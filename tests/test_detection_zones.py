@@ -0,0 +1,95 @@
+"""
+Tests for per-camera detection zones (masking/cropping before inference).
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from detection_zones import CameraZones, ZoneStore
+from detections import Detections
+
+NAMES = {0: "person", 2: "car"}
+# Lower half of the frame, minus its right quarter
+DRIVEWAY = {"include": [[[0, 0.5], [1, 0.5], [1, 1], [0, 1]]], "exclude": [[[0.75, 0.5], [1, 0.5], [1, 1], [0.75, 1]]]}
+
+
+def frame(h=200, w=400):
+    return np.full((h, w, 3), 200, np.uint8)
+
+
+def test_crop_mode_shrinks_the_input_and_blacks_out_exclusions():
+    zones = CameraZones.from_config(DRIVEWAY)
+    image, offset = zones.prepare(frame())
+    # Cropped to the include bounding box; the exclusion lies at its edge, so the crop shrinks to 300 wide
+    assert offset == (0, 100)
+    assert image.shape[:2] == (100, 300)
+    assert image.min() == 200
+    assert zones.coverage((200, 400)) == {"allowed": 0.375, "input": 0.375}
+
+    hole = CameraZones.from_config({"exclude": [[[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6]]]})
+    image, offset = hole.prepare(frame())
+    assert offset == (0, 0) and image.shape[:2] == (200, 400)
+    assert image[100, 200].tolist() == [0, 0, 0] and image[10, 10].tolist() == [200, 200, 200]
+
+
+def test_mask_mode_keeps_the_frame_size():
+    zones = CameraZones.from_config(dict(DRIVEWAY, mode="mask"))
+    image, offset = zones.prepare(frame())
+    assert offset == (0, 0) and image.shape == (200, 400, 3)
+    assert image[50, 50].tolist() == [0, 0, 0] and image[150, 50].tolist() == [200, 200, 200]
+    assert zones.blackout(frame(20, 40))[5, 5].tolist() == [0, 0, 0]
+
+
+def test_restore_maps_boxes_back_and_drops_objects_outside_the_zones():
+    zones = CameraZones.from_config(DRIVEWAY)
+    full = frame()
+    image, offset = zones.prepare(full)
+    result = Detections([[10, 20, 50, 90]], [0.9], [0], NAMES, image)
+    restored = zones.restore(result, offset, full)
+    assert restored.boxes.xyxy.tolist() == [[10, 120, 50, 190]]
+    assert restored.orig_img is full
+    assert not zones.restore(Detections.empty(NAMES, image), offset, full).boxes
+
+    # A car standing in an excluded hole is dropped even though its box reaches the allowed area
+    hole = CameraZones.from_config({"exclude": [[[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6]]]})
+    image, offset = hole.prepare(full)
+    result = Detections([[180, 20, 220, 110], [10, 10, 60, 60]], [0.8, 0.9], [2, 0], NAMES, image)
+    assert hole.restore(result, offset, full).boxes.cls.tolist() == [0]
+
+
+def test_invalid_zones_are_rejected():
+    with pytest.raises(ValueError):
+        CameraZones.from_config({"include": [[[0, 0], [1, 1]]]})
+    with pytest.raises(ValueError):
+        CameraZones.from_config({"include": [[[0, 0], [2, 0], [2, 2]]]})
+    with pytest.raises(ValueError):
+        CameraZones.from_config({"mode": "zoom"})
+    with pytest.raises(ValueError):
+        CameraZones.from_config([1, 2, 3])
+
+
+def test_store_persists_and_picks_up_external_edits(tmp_path):
+    path = tmp_path / "detection_zones.json"
+    store = ZoneStore(str(path), check_interval=0)
+    store.load()
+    assert store.get("cam1") is None
+    store.set("cam1", DRIVEWAY)
+    assert json.loads(path.read_text())["cam1"]["mode"] == "crop"
+
+    other = ZoneStore(str(path), check_interval=0)
+    other.load()
+    assert other.get("cam1").key == store.get("cam1").key
+    store.set("cam1", None)
+    # Force a visible mtime change on coarse-grained filesystems
+    os.utime(path, (1, 1))
+    assert other.get("cam1") is None
@@ -0,0 +1,113 @@
+"""
+Tests for ESP32 resolution/quality control against a local fake ESP32.
+"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from esp32_control import FRAMESIZES, Esp32Camera, ResolutionController, parse_mode
+from frame_bus import FrameBus
+
+
+class FakeEsp32:
+    """Minimal ESP32-CAM web server: /jpg and /control?var=&val="""
+
+    def __init__(self, control=True):
+        self.settings = {}
+        self.calls = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/control" and control:
+                    query = parse_qs(parsed.query)
+                    var, val = query["var"][0], int(query["val"][0])
+                    fake.calls.append((var, val))
+                    fake.settings[var] = val
+                    body = b""
+                    self.send_response(200)
+                elif parsed.path == "/jpg":
+                    body = b"\xff\xd8\xff\xd9"
+                    self.send_response(200)
+                else:
+                    body = b"not found"
+                    self.send_response(404)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/jpg"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def esp32():
+    fake = FakeEsp32()
+    yield fake
+    fake.close()
+
+
+def test_switches_high_on_demand_and_back_after_hold_down(esp32):
+    cam = Esp32Camera("cam1", esp32.url, min_interval=5.0, hold_down=15.0)
+    assert cam.update(False, now=100.0)
+    assert cam.mode == "low" and esp32.settings == {"quality": 15, "framesize": FRAMESIZES["VGA"]}
+
+    # Rate limited: a viewer arriving 1s after a switch waits for min_interval
+    assert not cam.update(True, now=101.0)
+    assert cam.update(True, now=105.0)
+    assert esp32.settings == {"quality": 10, "framesize": FRAMESIZES["HD"]}
+
+    # Demand gone: stay high until hold_down has passed
+    assert not cam.update(False, now=110.0)
+    assert cam.update(False, now=120.0)
+    assert cam.mode == "low" and cam.switches == 3
+    assert cam.stats()["framesize"] == "VGA"
+
+
+def test_missing_control_endpoint_disables_camera():
+    fake = FakeEsp32(control=False)
+    try:
+        cam = Esp32Camera("cam1", fake.url)
+        assert not cam.update(False)
+        assert cam.supported is False and cam.mode is None
+        assert not cam.update(True, now=1e12)
+    finally:
+        fake.close()
+
+
+def test_controller_reads_full_res_demand_from_bus(esp32):
+    bus = FrameBus()
+    controller = ResolutionController(bus, lambda: ({"cam1": esp32.url, "cam2": "http://pi:8081/"},
+                                                    {"cam1": "snapshot", "cam2": "mjpeg"}),
+                                      min_interval=0.0, hold_down=0.0)
+    controller.refresh()
+    assert controller.stats()["cam1"]["mode"] == "low" and "cam2" not in controller.stats()
+    with bus.subscribe("cam1", name="mobile-live"):
+        controller.refresh()
+        assert controller.stats()["cam1"]["mode"] == "low"
+    with bus.subscribe("cam1", name="recorder", full_res=True):
+        controller.refresh()
+        assert controller.stats()["cam1"]["mode"] == "high"
+
+
+def test_parse_mode():
+    assert parse_mode("svga:12") == {"framesize": "SVGA", "quality": 12}
+    with pytest.raises(ValueError):
+        parse_mode("8K:10")
@@ -0,0 +1,57 @@
+"""
+Tests for the in-process frame bus.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from frame_bus import EVERY, LATEST, FrameBus
+
+
+def test_latest_subscriber_only_keeps_newest():
+    bus = FrameBus()
+    with bus.subscribe("cam1", mode=LATEST) as sub:
+        for i in range(5):
+            bus.publish("cam1", i)
+        assert sub.get(timeout=0.1) == 4
+        assert sub.get(timeout=0.01) is None
+        assert sub.dropped == 4
+
+
+def test_every_subscriber_is_bounded_and_drops_oldest():
+    bus = FrameBus()
+    with bus.subscribe("cam1", mode=EVERY, maxsize=3) as sub:
+        for i in range(5):
+            bus.publish("cam1", i)
+        assert [sub.get(timeout=0.1) for _ in range(3)] == [2, 3, 4]
+        assert sub.dropped == 2
+
+
+def test_topics_are_isolated_and_close_unsubscribes():
+    bus = FrameBus()
+    a = bus.subscribe("cam1")
+    b = bus.subscribe("cam2", realtime=False)
+    bus.publish("cam1", "x")
+    assert b.get(timeout=0.01) is None
+    assert bus.subscriber_count("cam2") == 1
+    assert bus.subscriber_count("cam2", realtime_only=True) == 0
+    a.close()
+    assert bus.subscriber_count("cam1") == 0
+    assert bus.publish("cam1", "y") == 0
+    b.close()
+
+
+def test_close_wakes_blocked_reader():
+    bus = FrameBus()
+    sub = bus.subscribe("cam1")
+    result = []
+    t = threading.Thread(target=lambda: result.append(sub.get(timeout=5)))
+    t.start()
+    sub.close()
+    t.join(timeout=1)
+    assert not t.is_alive()
+    assert result == [None]
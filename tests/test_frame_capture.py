@@ -0,0 +1,185 @@
+"""
+Tests for the capture-side frame containers (no camera required).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from frame_capture import CapturedFrame, FrameSlot, pick_reduction
+
+
+def encode(image):
+    ok, buf = cv2.imencode(".jpg", image)
+    assert ok
+    return buf.tobytes()
+
+
+def test_captured_frame_decodes_lazily_once():
+    jpeg = encode(np.full((48, 64, 3), 128, np.uint8))
+    frame = CapturedFrame("cam1", jpeg=jpeg)
+    assert not frame.decoded
+    assert frame.jpeg is jpeg
+    image = frame.image
+    assert frame.decoded
+    assert image.shape == (48, 64, 3)
+    assert frame.image is image
+
+
+def test_corrupt_jpeg_yields_no_image():
+    slot = FrameSlot()
+    slot.publish(CapturedFrame("cam1", jpeg=b"\xff\xd8not really a jpeg"))
+    assert slot.latest_frame() is not None
+    assert slot.latest() is None
+
+
+def test_pick_reduction_keeps_detector_input_size():
+    assert pick_reduction(1920, 1080, 640) == 2
+    assert pick_reduction(2592, 1944, 640) == 4
+    assert pick_reduction(1280, 720, 640) == 2
+    assert pick_reduction(640, 480, 640) == 1
+    assert pick_reduction(1920, 1080, 0) == 1
+
+
+def test_detection_image_is_scaled_decode_with_box_scale():
+    jpeg = encode(np.full((720, 1280, 3), 90, np.uint8))
+    frame = CapturedFrame("cam1", jpeg=jpeg)
+    assert frame.size == (1280, 720)
+    image, scale = frame.detection_image(640)
+    assert image.shape[:2] == (360, 640)
+    assert scale == 2.0
+    # The scaled decode does not count as decoding the full frame
+    assert not frame.decoded
+    assert frame.image.shape[:2] == (720, 1280)
+    assert frame.detection_image(640)[1] == 1.0
+
+
+def test_rate_controller_follows_demand_and_backs_off():
+    from frame_capture import RateController
+
+    rate = RateController(active_fps=10.0, idle_fps=2.0, max_backoff=4.0)
+    assert rate.next_interval(demand=True) == pytest.approx(0.1)
+    assert rate.mode == "active"
+    assert rate.next_interval(demand=False) == pytest.approx(0.5)
+    assert rate.mode == "idle"
+    assert rate.next_interval(demand=False, consecutive_failures=1) == pytest.approx(1.0)
+    assert rate.next_interval(demand=False, consecutive_failures=5) == pytest.approx(4.0)
+    assert rate.mode == "backoff"
+    assert rate.next_interval(demand=True) == pytest.approx(0.1)
+
+
+def test_wait_for_frame_returns_each_frame_once():
+    import threading
+
+    slot = FrameSlot()
+    assert slot.wait_for_frame(0, timeout=0.01) is None
+    first = CapturedFrame("cam1", jpeg=b"\xff\xd8a")
+    slot.publish(first)
+    assert slot.wait_for_frame(0, timeout=0.01) is first
+    # Already seen: blocks until a newer frame is published
+    assert slot.wait_for_frame(first.seq, timeout=0.01) is None
+    second = CapturedFrame("cam1", jpeg=b"\xff\xd8b")
+    threading.Timer(0.05, slot.publish, args=(second,)).start()
+    assert slot.wait_for_frame(first.seq, timeout=2.0) is second
+    assert second.seq > first.seq
+    assert slot.seq == second.seq
+
+
+def test_shared_frames_are_read_only_and_copies_are_counted():
+    from frame_capture import copy_frame, frame_copies
+
+    frame = CapturedFrame("cam1", jpeg=encode(np.zeros((32, 32, 3), np.uint8)))
+    assert not frame.image.flags.writeable
+    with pytest.raises(ValueError):
+        frame.image[0, 0] = 1
+    before = frame_copies.bytes_total
+    copy = copy_frame(frame.image)
+    assert copy.flags.writeable
+    assert frame_copies.bytes_total - before == frame.image.nbytes
+
+
+def test_normalize_cameras_prefers_explicit_type():
+    from frame_capture import normalize_cameras
+
+    urls, types = normalize_cameras({
+        "cam1": {"url": "http://10.0.0.2/jpg", "type": "snapshot"},
+        "cam2": {"url": "http://10.0.0.3:9000/stream", "type": "mjpeg"},
+        "cam3": "rtsp://10.0.0.4/h264",
+        "cam4": "http://10.0.0.5:8081/",
+    })
+    assert urls["cam2"] == "http://10.0.0.3:9000/stream"
+    assert types == {"cam1": "snapshot", "cam2": "mjpeg", "cam3": "rtsp", "cam4": "mjpeg"}
+    with pytest.raises(ValueError):
+        normalize_cameras({"cam1": {"url": "http://x/", "type": "hls"}})
+
+
+def test_duplicate_jpeg_is_dropped_before_decode():
+    from frame_capture import CaptureWorker
+
+    jpeg = encode(np.zeros((32, 32, 3), np.uint8))
+    worker = CaptureWorker("cam1", "http://cam/jpg")
+    worker._frame_ok(jpeg)
+    first = worker.latest_frame()
+    worker._frame_ok(bytes(jpeg))
+    assert worker.latest_frame() is first
+    assert worker.slot.seq == first.seq
+    assert worker.duplicates == 1 and worker.stats()["duplicate_ratio"] == 0.5
+    assert not first.decoded
+
+
+def test_mjpeg_worker_reconnects_with_backoff():
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from frame_capture import MjpegWorker
+
+    connects = []
+
+    class FlakyStream(BaseHTTPRequestHandler):
+        """Refuses the first three connections, then streams two frames and hangs up."""
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            connects.append(time.monotonic())
+            if len(connects) <= 3:
+                self.send_error(503)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.end_headers()
+            for shade in (len(connects) * 2, len(connects) * 2 + 1):
+                jpeg = encode(np.full((32, 32, 3), shade * 8, np.uint8))
+                self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                 b"Content-Length: %d\r\n\r\n" % len(jpeg) + jpeg + b"\r\n")
+            self.close_connection = True
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyStream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    worker = MjpegWorker("cam1", f"http://127.0.0.1:{server.server_port}/stream",
+                         min_backoff=0.05, max_backoff=0.2)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while (len(connects) < 6 or worker.frames < 4) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert worker.frames >= 4
+        assert worker.reconnects >= 5 and worker.failures >= 3
+        # Refused connections back off exponentially up to max_backoff...
+        gaps = [b - a for a, b in zip(connects, connects[1:])]
+        assert gaps[0] >= 0.05 and gaps[1] >= 0.1 and gaps[2] >= 0.2
+        # ...and a connection that delivered frames resets it
+        assert gaps[3] < 0.2
+    finally:
+        worker.stop()
+        server.shutdown()
+        server.server_close()
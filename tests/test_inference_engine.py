@@ -0,0 +1,136 @@
+"""
+Tests for the ONNX Runtime engine's pre/post-processing and sample loading (no model required).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from frame_journal import JournalWriter
+from inference_engine import decode_output, letterbox, onnx_path, preprocess, sample_frames
+
+
+def raw_output(boxes, num_classes=80):
+    """YOLOv8-style (4 + classes, anchors) output from (cx, cy, w, h, cls, score) rows."""
+    out = np.zeros((4 + num_classes, len(boxes)), np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(boxes):
+        out[:4, i] = (cx, cy, w, h)
+        out[4 + cls, i] = score
+    return out
+
+
+def test_letterbox_and_preprocess():
+    image = np.zeros((360, 640, 3), np.uint8)
+    image[..., 2] = 255  # red in BGR
+    canvas, ratio, pad = letterbox(image, 320)
+    assert canvas.shape == (320, 320, 3) and ratio == 0.5 and pad == (0, 70)
+    assert canvas[0, 0].tolist() == [114, 114, 114] and canvas[160, 160].tolist() == [0, 0, 255]
+
+    batch, transforms = preprocess([image, image[:, :320]], 320)
+    assert batch.shape == (2, 3, 320, 320) and batch.dtype == np.float32
+    # RGB channel order, 0..1
+    assert batch[0, 0, 160, 160] == 1.0 and batch[0, 2, 160, 160] == 0.0
+    assert transforms[1] == (pytest.approx(320 / 360), (18, 0))
+
+
+def test_decode_maps_boxes_back_and_runs_class_aware_nms():
+    # 1280x720 frame letterboxed to 640: ratio 0.5, 140 px of padding top and bottom
+    ratio, pad, shape = 0.5, (0, 140), (720, 1280)
+    output = raw_output([
+        (100, 240, 40, 80, 0, 0.9),    # person
+        (102, 242, 40, 80, 0, 0.6),    # duplicate of it: suppressed
+        (101, 241, 40, 80, 2, 0.7),    # car at the same place: kept (other class)
+        (400, 300, 20, 20, 0, 0.1),    # under the threshold
+    ])
+    xyxy, conf, cls = decode_output(output, ratio, pad, shape, conf=0.25, iou=0.7)
+    assert cls.tolist() == [0, 2]
+    assert conf.tolist() == pytest.approx([0.9, 0.7])
+    assert xyxy[0].tolist() == pytest.approx([160, 120, 240, 280])
+
+    xyxy, conf, cls = decode_output(output, ratio, pad, shape, conf=0.25, classes=[2])
+    assert cls.tolist() == [2]
+    xyxy, conf, cls = decode_output(output, ratio, pad, shape, conf=0.95)
+    assert xyxy.shape == (0, 4) and len(conf) == 0
+
+
+def test_onnx_path_naming():
+    assert onnx_path("yolov8s.pt", 640) == "yolov8s-640.onnx"
+    assert onnx_path("models/yolov8n.pt", 320, "static") == "models/yolov8n-320-int8-static.onnx"
+
+
+def test_sample_frames_from_a_journal_and_an_image_folder(tmp_path):
+    writer = JournalWriter(str(tmp_path / "journal"), "cam1")
+    for i in range(20):
+        ok, jpeg = cv2.imencode(".jpg", np.full((48, 64, 3), i * 10, np.uint8))
+        writer.append(jpeg.tobytes(), 1000.0 + i, i + 1)
+    writer.close()
+    frames = sample_frames(str(tmp_path / "journal" / "cam1"), limit=5)
+    assert len(frames) == 5 and frames[0].shape == (48, 64, 3)
+    # Spread over the whole journal, not the first five frames
+    assert frames[-1].mean() > 100
+    assert len(sample_frames("journal://" + str(tmp_path / "journal" / "cam1"), limit=50)) == 20
+
+    folder = tmp_path / "images"
+    folder.mkdir()
+    for i in range(3):
+        cv2.imwrite(str(folder / f"{i}.jpg"), np.zeros((10, 10, 3), np.uint8))
+    (folder / "notes.txt").write_text("not an image")
+    assert len(sample_frames(str(folder))) == 3
+
+
+def _tiny_yolo(path):
+    """A YOLO-shaped ONNX graph (dynamic batch, 84 x anchors output) predicting one fixed person box."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    weight = np.zeros((84, 3, 32, 32), np.float32)
+    bias = np.zeros(84, np.float32)
+    bias[:5] = [320, 320, 64, 128, 0.9]  # cx, cy, w, h in 640x640 input pixels, person score
+    nodes = [
+        helper.make_node("Conv", ["images", "W", "B"], ["features"],
+                         kernel_shape=[32, 32], strides=[32, 32]),
+        helper.make_node("Constant", [], ["shape"],
+                         value=numpy_helper.from_array(np.array([0, 84, -1]))),
+        helper.make_node("Reshape", ["features", "shape"], ["output0"]),
+    ]
+    inputs = [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, "h", "w"])]
+    outputs = [helper.make_tensor_value_info("output0", TensorProto.FLOAT, None)]
+    weights = [numpy_helper.from_array(weight, "W"), numpy_helper.from_array(bias, "B")]
+    graph = helper.make_graph(nodes, "tiny_yolo", inputs, outputs, weights)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    names = {i: f"class{i}" for i in range(80)} | {0: "person"}
+    for key, value in {"names": str(names), "imgsz": "[640, 640]"}.items():
+        prop = model.metadata_props.add()
+        prop.key, prop.value = key, value
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def test_onnx_engine_end_to_end_with_quantization(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from inference_engine import OnnxYOLO, quantize_onnx
+
+    path = _tiny_yolo(tmp_path / "tiny-640.onnx")
+    model = OnnxYOLO(path)
+    assert model.imgsz == 640 and model.dynamic_batch and model.names[0] == "person"
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    results = model([frame, frame], conf=0.5, verbose=False)
+    assert len(results) == 2
+    assert results[0].boxes.xyxy.tolist() == [[576, 232, 704, 488]]
+    assert [model.names[int(c)] for c in results[0].boxes.cls.tolist()] == ["person"]
+    assert results[0].orig_img is frame
+
+    for i in range(4):
+        cv2.imwrite(str(tmp_path / f"cal{i}.jpg"), np.random.randint(0, 255, (360, 640, 3), np.uint8))
+    for mode in ("dynamic", "static"):
+        quantized = quantize_onnx(path, mode, 640, calibration=str(tmp_path))
+        assert quantized.endswith(f"-int8-{mode}.onnx")
+        assert OnnxYOLO(quantized)(frame, conf=0.5)[0].boxes.xyxy.tolist() == [[576, 232, 704, 488]]
@@ -0,0 +1,85 @@
+"""
+Tests for the micro-batching inference scheduler (fake model, no YOLO required).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference_scheduler import InferenceScheduler
+
+
+class FakeModel:
+    """Doubles each input; records the batches it was called with."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, frames, **kwargs):
+        self.calls.append((list(frames), kwargs))
+        time.sleep(self.delay)
+        return [f * 2 for f in frames]
+
+
+def test_concurrent_cameras_share_one_forward_pass():
+    fake = FakeModel()
+    scheduler = InferenceScheduler(fake, max_batch=8, max_wait=0.5)
+    results = {}
+    barrier = threading.Barrier(4)
+
+    def camera(i):
+        for n in range(5):
+            barrier.wait()
+            results[(i, n)] = scheduler.infer(i * 100 + n, key=f"cam{i}", conf=0.5)[0]
+
+    threads = [threading.Thread(target=camera, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    scheduler.stop()
+    assert results == {(i, n): (i * 100 + n) * 2 for i in range(4) for n in range(5)}
+    assert max(len(frames) for frames, _ in fake.calls) == 4
+    stats = scheduler.stats()
+    assert stats["requests"] == 20
+    assert stats["batches"] < 20
+    assert stats["batch_size_mean"] > 1
+
+
+def test_single_caller_does_not_wait_for_a_batch():
+    scheduler = InferenceScheduler(FakeModel(delay=0), max_wait=1.0)
+    scheduler.infer(1, key="cam1")
+    started = time.monotonic()
+    assert scheduler.infer(2, key="cam1") == [4]
+    assert time.monotonic() - started < 0.5
+    scheduler.stop()
+
+
+def test_requests_with_different_options_are_not_mixed():
+    fake = FakeModel(delay=0.05)
+    scheduler = InferenceScheduler(fake, max_wait=0.05)
+    futures = [scheduler.submit(i, conf=0.5 if i % 2 else 0.9) for i in range(6)]
+    assert [f.result(timeout=5) for f in futures] == [i * 2 for i in range(6)]
+    scheduler.stop()
+    for frames, kwargs in fake.calls:
+        assert all((f % 2 == 1) == (kwargs["conf"] == 0.5) for f in frames)
+
+
+def test_model_errors_reach_every_caller_in_the_batch():
+    def broken(frames, **kwargs):
+        raise RuntimeError("boom")
+
+    scheduler = InferenceScheduler(broken, max_wait=0.05)
+    futures = [scheduler.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    assert scheduler.stats()["errors"] >= 1
+    scheduler.stop()
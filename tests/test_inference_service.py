@@ -0,0 +1,162 @@
+"""
+Tests for the inference service socket protocol (fake model, no YOLO required).
+"""
+
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from detections import Detections
+from frame_bus import FrameBus
+from frame_capture import CaptureManager, CaptureWorker
+from inference_scheduler import InferenceScheduler
+from inference_service import InferenceServer, RemoteCaptureWorker, RemoteModel, ServiceClient, parse_address
+
+NAMES = {0: "person", 1: "car"}
+
+
+class FakeModel:
+    """One box covering the frame; the class is the frame's first pixel value."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, frames, **kwargs):
+        self.batches.append(len(frames))
+        out = []
+        for frame in frames:
+            h, w = frame.shape[:2]
+            out.append(Detections([[0, 0, w, h]], [kwargs.get("conf", 0.25)], [int(frame[0, 0, 0])], NAMES, frame))
+        return out
+
+
+class ManualWorker(CaptureWorker):
+    """A camera whose frames the test publishes by hand."""
+
+    kind = "manual"
+
+    def _run(self):
+        self._stop.wait()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def service(tmp_path):
+    fake = FakeModel()
+    scheduler = InferenceScheduler(fake, max_wait=0.2)
+    server = InferenceServer({"detect": scheduler}, {"detect": NAMES}, str(tmp_path / "inf.sock"),
+                             info={"device": "cpu"})
+    server.start()
+    yield server, fake
+    server.stop()
+    scheduler.stop()
+
+
+def test_remote_model_returns_results_shaped_like_ultralytics(service):
+    server, _ = service
+    remote = RemoteModel("detect", server.address)
+    frame = np.zeros((48, 64, 3), np.uint8)
+    frame[0, 0, 0] = 1
+    results = remote.infer(frame, key="cam1", conf=0.5, verbose=False)
+    assert results[0].boxes
+    assert results[0].boxes.xyxy.cpu().numpy().tolist() == [[0, 0, 64, 48]]
+    assert results[0].boxes.conf.tolist() == [0.5]
+    assert [remote.names[int(c)] for c in results[0].boxes.cls.tolist()] == ["car"]
+    assert results[0].plot().shape == frame.shape
+    assert remote.info()["device"] == "cpu"
+
+
+def test_web_workers_share_the_daemon_batches(service):
+    server, fake = service
+    remotes = [RemoteModel("detect", server.address) for _ in range(4)]
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def worker(i):
+        frame = np.full((16, 16, 3), i, np.uint8)
+        barrier.wait()
+        results[i] = remotes[i].infer(frame, key=f"web{i}")[0].boxes.cls.tolist()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert results == {i: [float(i)] for i in range(4)}
+    assert max(fake.batches) > 1
+
+
+def test_errors_and_empty_results_cross_the_socket(service):
+    server, _ = service
+    remote = RemoteModel("detect", server.address)
+    with pytest.raises(RuntimeError):
+        RemoteModel("missing", server.address).infer(np.zeros((4, 4, 3), np.uint8))
+    empty = Detections.from_array(np.zeros((0, 6), np.float32), NAMES)
+    assert not empty.boxes
+    # The connection survives a failed request
+    assert remote.infer(np.zeros((4, 4, 3), np.uint8))[0].boxes
+
+
+def test_parse_address():
+    assert parse_address("/tmp/x.sock") == (socket.AF_UNIX, "/tmp/x.sock")
+    assert parse_address("inference:7070") == (socket.AF_INET, ("inference", 7070))
+    assert parse_address(":7070") == (socket.AF_INET, ("127.0.0.1", 7070))
+
+
+def test_web_workers_receive_frames_and_forward_viewer_demand(tmp_path):
+    owner_bus = FrameBus()
+    capture = CaptureManager(bus=owner_bus, worker_types={"manual": ManualWorker})
+    capture.sync({"cam1": "manual://cam1"}, {"cam1": "manual"})
+    camera = capture.worker("cam1")
+    server = InferenceServer({}, {}, str(tmp_path / "inf.sock"), capture=capture,
+                             handlers={"profile": lambda header: {"active": header.get("name", "home")}})
+    server.start()
+    web_bus = FrameBus()
+    remote = RemoteCaptureWorker("cam1", "manual://cam1", bus=web_bus, address=server.address, poll_timeout=0.2)
+    remote.start()
+    try:
+        # One camera connection: the web worker is one more subscriber on the daemon's bus
+        assert wait_until(lambda: owner_bus.subscriber_count("cam1") == 1)
+        assert owner_bus.subscriber_count("cam1", realtime_only=True) == 0
+        for i in range(3):
+            camera._frame_ok(b"\xff\xd8" + bytes([i]) * 50 + b"\xff\xd9", timestamp=1000.0 + i)
+            frame = remote.wait_for_frame(after_seq=remote.slot.seq, timeout=2.0)
+            assert frame.jpeg[2] == i and frame.timestamp == 1000.0 + i
+
+        # Pixels-only cameras (RTSP) cross as raw images
+        image = np.full((24, 32, 3), 7, np.uint8)
+        camera._frame_ok(None, image=image, timestamp=1010.0)
+        frame = remote.wait_for_frame(after_seq=remote.slot.seq, timeout=2.0)
+        assert frame.jpeg is None and np.array_equal(frame.image, image)
+
+        # A desktop viewer on the web worker asks the daemon's camera for full resolution
+        with web_bus.subscribe("cam1", full_res=True):
+            assert wait_until(lambda: owner_bus.subscriber_count("cam1", full_res_only=True) == 1)
+            assert camera.has_demand()
+        assert wait_until(lambda: owner_bus.subscriber_count("cam1", full_res_only=True) == 0)
+
+        assert ServiceClient(server.address).call("profile", name="away") == {"ok": True, "active": "away"}
+    finally:
+        remote.stop()
+        remote._thread.join(timeout=2.0)
+        assert wait_until(lambda: owner_bus.subscriber_count("cam1") == 0)
+        server.stop()
+        capture.stop_all()
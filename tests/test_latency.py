@@ -0,0 +1,41 @@
+"""
+Tests for per-camera, per-stage latency tracking.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from frame_capture import CapturedFrame
+from latency import FrameTimer, LatencyTracker
+from mjpeg_parser import stamp_jpeg
+
+JPEG = b"\xff\xd8\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00data\xff\xd9"
+
+
+def test_percentiles_over_window():
+    tracker = LatencyTracker(window=100)
+    for ms in range(1, 201):
+        tracker.record("cam1", "live", "inference", ms / 1000.0)
+    stats = tracker.stats()["cam1"]["live"]["inference"]
+    # Only the last 100 samples (101..200 ms) are kept
+    assert stats["count"] == 100
+    assert stats["p50"] == 150.0 and stats["p99"] == 199.0 and stats["max"] == 200.0
+
+
+def test_frame_timer_measures_from_source_stamp():
+    tracker = LatencyTracker()
+    captured = CapturedFrame("cam1", jpeg=stamp_jpeg(JPEG, time.time() - 0.05))
+    timer = FrameTimer(tracker, captured, "live")
+    timer.mark("decode")
+    timer.mark("encode")
+    timer.mark("decode")
+    total = timer.done()
+    stages = tracker.stats("cam1")["cam1"]["live"]
+    assert set(stages) == {"camera", "queue", "decode", "encode", "write", "glass_to_glass"}
+    assert stages["decode"]["count"] == 1
+    assert total >= 0.05 and stages["camera"]["p50"] >= 50.0
+    assert "(from capture)" not in timer.overlay_text()
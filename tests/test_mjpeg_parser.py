@@ -0,0 +1,106 @@
+"""
+Tests for the incremental MJPEG parser.
+These build synthetic JPEG byte streams, so no camera or OpenCV is required.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mjpeg_parser import MjpegParser, boundary_from_content_type, jpeg_dimensions
+
+
+def make_jpeg(payload: bytes, app_payload: bytes = b"") -> bytes:
+    """Build a minimal JPEG-shaped byte string (SOI, APP1, SOS, data, EOI)."""
+    app = b"\xff\xe1" + (len(app_payload) + 2).to_bytes(2, "big") + app_payload
+    sos = b"\xff\xda" + (8).to_bytes(2, "big") + b"\x01\x01\x00\x00\x3f\x00"
+    # Byte-stuff 0xFF in the entropy-coded data like a real encoder would
+    data = payload.replace(b"\xff", b"\xff\x00")
+    return b"\xff\xd8" + app + sos + data + b"\xff\xd9"
+
+
+def multipart(frames, boundary=b"frame", with_length=True) -> bytes:
+    out = b""
+    for jpeg in frames:
+        out += b"--" + boundary + b"\r\nContent-Type: image/jpeg\r\n"
+        if with_length:
+            out += b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n"
+        out += b"\r\n" + jpeg + b"\r\n"
+    return out
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def collect(parser, chunks):
+    return [bytes(v) for chunk in chunks for v in parser.feed(chunk)]
+
+
+def test_boundary_from_content_type():
+    assert boundary_from_content_type("multipart/x-mixed-replace; boundary=FRAME") == "FRAME"
+    assert boundary_from_content_type('multipart/x-mixed-replace;boundary="--frame"') == "frame"
+    assert boundary_from_content_type("image/jpeg") is None
+    assert boundary_from_content_type(None) is None
+
+
+def test_scanned_frames_across_chunk_sizes():
+    frames = [make_jpeg(bytes([i]) * 5000 + b"\xff" * 3) for i in range(5)]
+    stream = b"garbage" + b"".join(frames)
+    for size in (1, 7, 512, 16384):
+        assert collect(MjpegParser(), chunked(stream, size)) == frames
+
+
+def test_stray_eoi_inside_app_segment_does_not_split_frame():
+    # An embedded EXIF thumbnail carries its own SOI/EOI pair
+    jpeg = make_jpeg(b"\x10" * 1000, app_payload=b"Exif\x00\x00\xff\xd8thumb\xff\xd9")
+    assert collect(MjpegParser(), chunked(jpeg * 3, 100)) == [jpeg] * 3
+
+
+def test_multipart_with_content_length():
+    frames = [make_jpeg(bytes([i]) * 3000) for i in range(4)]
+    stream = multipart(frames)
+    parser = MjpegParser(boundary="frame")
+    assert collect(parser, chunked(stream, 333)) == frames
+    assert parser.part_headers.get("content-type") == "image/jpeg"
+    assert parser.resyncs == 0
+
+
+def test_multipart_without_content_length():
+    frames = [make_jpeg(bytes([i]) * 3000, app_payload=b"\xff\xd9") for i in range(4)]
+    stream = multipart(frames, with_length=False)
+    assert collect(MjpegParser(boundary="frame"), chunked(stream, 1000)) == frames
+
+
+def test_held_view_survives_further_feeds():
+    frames = [make_jpeg(bytes([i]) * 2000) for i in range(3)]
+    parser = MjpegParser()
+    held = []
+    for chunk in chunked(b"".join(frames), 700):
+        held.extend(parser.feed(chunk))
+    assert [bytes(v) for v in held] == frames
+
+
+def test_jpeg_dimensions_reads_sof_header():
+    sof0 = (b"\xff\xc0" + (17).to_bytes(2, "big") + b"\x08"
+            + (1080).to_bytes(2, "big") + (1920).to_bytes(2, "big") + b"\x03" + b"\x00" * 9)
+    jpeg = make_jpeg(b"\x01" * 10, app_payload=b"Exif")
+    # Insert the SOF segment between APP1 and SOS
+    app_end = 4 + 2 + len(b"Exif")
+    jpeg = jpeg[:app_end] + sof0 + jpeg[app_end:]
+    assert jpeg_dimensions(jpeg) == (1920, 1080)
+    assert jpeg_dimensions(make_jpeg(b"\x01")) is None
+    assert jpeg_dimensions(b"not a jpeg") is None
+
+
+def test_stamped_jpeg_round_trips_timestamp():
+    from mjpeg_parser import jpeg_timestamp, stamp_jpeg
+
+    jpeg = make_jpeg(b"payload")
+    stamped = stamp_jpeg(jpeg, 1700000000.25)
+    assert jpeg_timestamp(stamped) == 1700000000.25
+    assert jpeg_timestamp(jpeg) is None
+    assert jpeg_dimensions(stamped) == jpeg_dimensions(jpeg)
+    assert list(MjpegParser().feed(stamped)) == [stamped]
@@ -0,0 +1,103 @@
+"""
+Tests for the motion gate in front of the detection loop.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from detection_zones import CameraZones
+from motion_gate import MotionGate, MotionResult, camera_settings, restrict
+
+
+def scene(x=None, size=(240, 320)):
+    """Grey background with a white 40x40 square at column `x` (none if x is None)."""
+    frame = np.full(size + (3,), 90, np.uint8)
+    if x is not None:
+        frame[100:140, x:x + 40] = 255
+    return frame
+
+
+@pytest.mark.parametrize("method", ["mog2", "diff"])
+def test_gate_closes_on_a_static_scene_and_opens_on_motion(method):
+    gate = MotionGate(method=method, hold=1.0, keepalive=0, warmup=3)
+    now = 1000.0
+    for _ in range(20):
+        now += 0.5
+        result = gate.check(scene(), now=now)
+    assert not result.run and result.reason == "still"
+
+    now += 0.5
+    result = gate.check(scene(200), scale=2.0, now=now)
+    assert result.run and result.reason == "motion"
+    # Boxes come back in full-resolution pixels (scale 2): the square spans x 400..480
+    x1, y1, x2, y2 = result.region()
+    assert 360 <= x1 <= 410 and 470 <= x2 <= 520
+    assert 160 <= y1 <= 210 and 270 <= y2 <= 320
+
+    # Stays open for `hold` seconds after the motion, then closes again
+    assert gate.check(scene(), now=now + 0.5).reason in ("motion", "hold")
+    for step in range(1, 20):
+        result = gate.check(scene(), now=now + 1.0 + step)
+    assert not result.run
+
+
+def test_keepalive_and_stats():
+    gate = MotionGate(keepalive=5.0, warmup=1)
+    reasons = [gate.check(scene(), now=100.0 + t).reason for t in range(12)]
+    assert reasons[0] == "warmup"
+    assert reasons.count("keepalive") == 2
+    stats = gate.stats()
+    assert stats["frames"] == 12 and stats["keepalives"] == 2
+    assert stats["open_ratio"] == round(3 / 12, 3)
+
+    # A looped journal replay goes back in frame time: keepalive restarts instead of stalling
+    assert gate.check(scene(), now=100.0).reason == "keepalive"
+    assert gate.check(scene(), now=101.0).reason == "still"
+
+
+def test_small_blobs_are_ignored_and_settings_apply_live():
+    gate = MotionGate(method="diff", min_area=0.05, keepalive=0, warmup=1)
+    gate.check(scene(), now=0.0)
+    gate.check(scene(), now=10.0)
+    # 40x40 of 320x240 is ~2% of the frame: under min_area
+    assert not gate.check(scene(100), now=20.0).run
+    gate.configure(min_area=0.005)
+    assert gate.check(scene(100), now=30.0).moving
+    gate.configure(enabled=False)
+    assert gate.check(scene(), now=40.0).reason == "disabled"
+
+
+def test_motion_crop_restricts_the_detector_input_within_the_zones():
+    # Motion at x 400..480, y 200..280 in full-res pixels; the detector sees a half-size frame
+    motion = MotionResult(True, True, "motion", [(400, 200, 480, 280)], 0.01)
+    frame = np.zeros((360, 640, 3), np.uint8)
+    assert motion.crop(frame.shape, scale=2.0, min_size=100) == (170, 70, 270, 170)
+    # Grown to min_size, slid back inside the frame at the edge
+    edge = MotionResult(True, True, "motion", [(0, 0, 20, 20)], 0.0)
+    assert edge.crop(frame.shape, min_size=200) == (0, 0, 200, 200)
+    # Large motion or no motion: no crop
+    assert MotionResult(True, True, "motion", [(0, 0, 600, 300)], 0.5).crop(frame.shape) is None
+    assert MotionResult(True, False, "hold", [], 0.0).crop(frame.shape) is None
+
+    # Combined with a zone crop to the right half: offsets add up and boxes map back to the frame
+    zones = CameraZones(include=[[[0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0]]])
+    det_input, offset = zones.prepare(frame)
+    assert offset == (320, 0)
+    det_input, offset = restrict(det_input, offset, (180, 80, 420, 160))
+    assert offset == (320, 80) and det_input.shape[:2] == (80, 100)
+    assert restrict(det_input, offset, (0, 0, 10, 10)) == (det_input, offset)
+
+
+def test_camera_settings_overlay():
+    settings = {"sensitivity": 20, "cameras": {"cam2": {"min_area": 0.01}}}
+    assert camera_settings(settings, "cam1")["sensitivity"] == 20
+    assert camera_settings(settings, "cam2")["min_area"] == 0.01
+    assert camera_settings(None, "cam1")["method"] == "mog2"
@@ -0,0 +1,55 @@
+"""
+Tests for concurrent network profile probing and background selection.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from network_profiles import ProfileSelector, probe_profiles
+
+HOME = {"name": "home", "cameras": {"cam1": "http://home1/jpg", "cam2": "http://home2:8081/"}}
+HOTSPOT = {"name": "hotspot", "cameras": {"cam1": "http://hot1/jpg",
+                                          "cam2": {"url": "http://hot2:8081/", "type": "mjpeg"}}}
+
+
+def make_probe(reachable, delay=0.0):
+    def probe(url):
+        time.sleep(delay)
+        return url in reachable
+    return probe
+
+
+def test_probes_run_concurrently_under_one_deadline():
+    # Four cameras that each hang for 1s: sequential probing would take 4s
+    started = time.monotonic()
+    assert probe_profiles([HOME, HOTSPOT], make_probe(set(), delay=1.0), deadline=0.3) is None
+    assert time.monotonic() - started < 0.6
+
+
+def test_first_reachable_profile_in_order_wins():
+    assert probe_profiles([HOME, HOTSPOT], make_probe({"http://hot2:8081/"}))["name"] == "hotspot"
+    both = make_probe({"http://home2:8081/", "http://hot1/jpg"})
+    assert probe_profiles([HOME, HOTSPOT], both)["name"] == "home"
+
+
+def test_selector_switches_once_and_respects_pin():
+    applied = []
+    reachable = {"http://hot1/jpg"}
+    selector = ProfileSelector([HOME, HOTSPOT], make_probe(reachable), applied.append, current=HOME)
+    selector.evaluate()
+    selector.evaluate()
+    assert [p["name"] for p in applied] == ["hotspot"]
+
+    # Nothing reachable: stay where we are
+    reachable.clear()
+    selector.evaluate()
+    assert selector.current is HOTSPOT
+
+    selector.pin()
+    reachable.add("http://home1/jpg")
+    selector.evaluate()
+    assert [p["name"] for p in applied] == ["hotspot"]
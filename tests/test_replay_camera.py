@@ -0,0 +1,53 @@
+"""
+Tests for the replay camera used for load testing (serves on a local port).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+requests = pytest.importorskip("requests")
+
+from mjpeg_parser import MjpegParser, boundary_from_content_type
+from replay_camera import ReplayCamera, SyntheticSource, network_profile, serve
+
+
+@pytest.fixture
+def camera_url():
+    camera = ReplayCamera("test", SyntheticSource(320, 240), fps=30, width=320, height=240)
+    camera.start()
+    server = serve(camera, "127.0.0.1", 0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    camera.stop()
+    server.shutdown()
+
+
+def test_snapshot_endpoint(camera_url):
+    resp = requests.get(f"{camera_url}/jpg", timeout=5)
+    assert resp.status_code == 200
+    assert resp.content[:2] == b"\xff\xd8"
+
+
+def test_mjpeg_endpoint_streams_distinct_frames(camera_url):
+    frames = []
+    with requests.get(f"{camera_url}/stream", stream=True, timeout=5) as resp:
+        parser = MjpegParser(boundary_from_content_type(resp.headers["Content-Type"]))
+        for chunk in resp.iter_content(4096):
+            frames.extend(bytes(f) for f in parser.feed(chunk))
+            if len(frames) >= 3:
+                break
+    assert len(set(frames)) == 3
+    image = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (240, 320, 3)
+
+
+def test_network_profile_alternates_camera_types():
+    cams = network_profile("127.0.0.1", 8090, 3)[0]["cameras"]
+    assert [c["type"] for c in cams.values()] == ["snapshot", "mjpeg", "snapshot"]
+    assert cams["cam2"]["url"] == "http://127.0.0.1:8091/stream"
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ultralytics/torch vs. ONNX Runtime FP32 / INT8 (dynamic, static) for the same YOLO weights,
+as per-frame latency and mAP drift on a sample set.
+
+Drift is measured against the torch model's own detections (at --conf) as ground
+truth, so no labels are needed: mAP50 = 1.0 means the engine finds the same
+objects. Pass a sample set that looks like production (a frame journal recorded
+with FALCONEYE_JOURNAL_CAMERAS, an image folder or a video).
+
+Usage:
+    python tools/bench_engines.py --samples journal/cam1 --model yolov8s.pt
+    python tools/bench_engines.py --samples clips/front.mp4 --variants onnx,static --calibration journal/cam2
+
+Thread counts matter on CPU: run with the same OMP_NUM_THREADS / FALCONEYE_ONNX_THREADS as the server.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from detections import Detections  # noqa: E402
+from inference_engine import OnnxYOLO, export_onnx, quantize_onnx, sample_frames  # noqa: E402
+from latency import percentile  # noqa: E402
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def box_iou(a, b):
+    """Pairwise IoU of N x 4 and M x 4 xyxy boxes."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), np.float32)
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def mean_average_precision(predictions, truths):
+    """COCO-style mAP over IOU_THRESHOLDS; inputs are per-image N x 6 arrays (x1, y1, x2, y2, conf, cls).
+
+    Returns (mAP50, mAP50-95), averaged over classes present in `truths`.
+    """
+    classes = sorted({int(c) for t in truths for c in t[:, 5]})
+    if not classes:
+        return None, None
+    ap = np.zeros((len(classes), len(IOU_THRESHOLDS)))
+    for ci, c in enumerate(classes):
+        scores, matched, total = [], [], 0
+        for pred, truth in zip(predictions, truths):
+            pred = pred[pred[:, 5] == c]
+            pred = pred[np.argsort(-pred[:, 4])]
+            truth = truth[truth[:, 5] == c]
+            total += len(truth)
+            iou = box_iou(pred[:, :4], truth[:, :4])
+            hits = np.zeros((len(pred), len(IOU_THRESHOLDS)), bool)
+            for ti, threshold in enumerate(IOU_THRESHOLDS):
+                used = np.zeros(len(truth), bool)
+                for pi in range(len(pred)):
+                    candidates = np.where((iou[pi] >= threshold) & ~used)[0] if len(truth) else []
+                    if len(candidates):
+                        best = candidates[np.argmax(iou[pi, candidates])]
+                        used[best] = True
+                        hits[pi, ti] = True
+            scores.append(pred[:, 4])
+            matched.append(hits)
+        order = np.argsort(-np.concatenate(scores))
+        hits = np.concatenate(matched)[order]
+        tp = np.cumsum(hits, axis=0)
+        fp = np.cumsum(~hits, axis=0)
+        recall = tp / max(total, 1)
+        precision = tp / np.maximum(tp + fp, 1e-9)
+        for ti in range(len(IOU_THRESHOLDS)):
+            # 101-point interpolated AP over the precision envelope
+            envelope = np.maximum.accumulate(precision[::-1, ti])[::-1] if len(precision) else np.zeros(0)
+            points = np.linspace(0, 1, 101)
+            idx = np.searchsorted(recall[:, ti], points, side="left") if len(recall) else np.zeros(101, int)
+            ap[ci, ti] = np.mean([envelope[i] if i < len(envelope) else 0.0 for i in idx])
+    return float(ap[:, 0].mean()), float(ap.mean())
+
+
+def run(model, frames, conf):
+    """(per-frame detections as N x 6 arrays, per-frame seconds) with batch size 1, like the detection loop."""
+    model(frames[0], conf=conf, verbose=False)  # warm-up
+    outputs, times = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        result = model(frame, conf=conf, verbose=False)[0]
+        times.append(time.perf_counter() - started)
+        outputs.append(Detections.from_results(result).to_array())
+    return outputs, sorted(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--samples", required=True, help="frame journal directory, image folder or video")
+    ap.add_argument("--model", default=os.getenv("FALCONEYE_DETECT_MODEL", "yolov8s.pt"))
+    ap.add_argument("--imgsz", type=int, default=int(os.getenv("FALCONEYE_DETECT_INPUT_SIZE", "640")))
+    ap.add_argument("--frames", type=int, default=100)
+    ap.add_argument("--variants", default="onnx,dynamic,static",
+                    help="comma-separated: onnx (FP32), dynamic, static (INT8)")
+    ap.add_argument("--calibration", help="frames for static quantization (default: --samples)")
+    ap.add_argument("--conf", type=float, default=0.25, help="reference confidence (ground truth)")
+    ap.add_argument("--threads", type=int, default=int(os.getenv("FALCONEYE_ONNX_THREADS", "0")))
+    args = ap.parse_args()
+
+    frames = sample_frames(args.samples, args.frames)
+    if not frames:
+        sys.exit(f"no frames in {args.samples}")
+
+    from ultralytics import YOLO
+
+    reference = YOLO(args.model).to("cpu")
+    truths, times = run(reference, frames, args.conf)
+    print(f"{args.model} @ {args.imgsz}, {len(frames)} frames from {args.samples} "
+          f"({sum(len(t) for t in truths)} reference detections at conf {args.conf})")
+    rows = [("torch fp32", times, None, None)]
+
+    fp32 = export_onnx(args.model, args.imgsz)
+    for variant in [v.strip() for v in args.variants.split(",") if v.strip()]:
+        if variant == "onnx":
+            path, label = fp32, "onnx fp32"
+        else:
+            path = quantize_onnx(fp32, variant, args.imgsz, args.calibration or args.samples)
+            label = f"onnx int8 {variant}"
+        engine = OnnxYOLO(path, threads=args.threads or None)
+        # Low threshold for the predictions so AP integrates over the whole precision/recall curve
+        predictions, times = run(engine, frames, 0.001)
+        rows.append((label, times) + mean_average_precision(predictions, truths))
+
+    print(f"  {'engine':<18} {'p50 ms':>8} {'p99 ms':>8} {'mAP50':>7} {'mAP50-95':>9}")
+    for label, times, map50, map5095 in rows:
+        drift = f"{map50:7.3f} {map5095:9.3f}" if map50 is not None else f"{'ref':>7} {'ref':>9}"
+        print(f"  {label:<18} {percentile(times, 50) * 1000:8.1f} {percentile(times, 99) * 1000:8.1f} {drift}")
+
+
+if __name__ == "__main__":
+    main()
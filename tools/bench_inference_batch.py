@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one YOLO call per camera thread (previous detection loops) vs. the batching
+inference_scheduler.InferenceScheduler, as aggregate frames/sec over N cameras.
+
+Usage:
+    # Synthetic 1280x720 scenes, 4 cameras, 30 frames each
+    python tools/bench_inference_batch.py --cameras 4 --frames 30
+
+    # Frames recorded with the frame journal (FALCONEYE_JOURNAL_CAMERAS); each camera
+    # thread gets the journal's frames
+    python tools/bench_inference_batch.py --journal journal/cam1 --cameras 4
+
+Thread counts matter on CPU: run with the same OMP_NUM_THREADS as the server.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from frame_capture import decode_jpeg  # noqa: E402
+from frame_journal import JournalReader  # noqa: E402
+from inference_scheduler import InferenceScheduler  # noqa: E402
+from replay_camera import SyntheticSource  # noqa: E402
+
+
+def load_frames(args):
+    if args.journal:
+        frames = []
+        for _, _, jpeg in JournalReader(args.journal).frames():
+            image = decode_jpeg(jpeg)
+            if image is not None:
+                frames.append(image)
+            if len(frames) >= args.frames:
+                break
+        if not frames:
+            sys.exit(f"no frames in journal {args.journal}")
+        return frames
+    source = SyntheticSource(args.width, args.height)
+    return [source.next_frame() for _ in range(args.frames)]
+
+
+def run_cameras(cameras, frames, infer):
+    """Each camera thread infers every frame in turn; returns aggregate frames/sec."""
+    barrier = threading.Barrier(cameras + 1)
+
+    def camera(i):
+        barrier.wait()
+        for frame in frames:
+            infer(i, frame)
+
+    threads = [threading.Thread(target=camera, args=(i,)) for i in range(cameras)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    return cameras * len(frames) / (time.perf_counter() - started)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=os.getenv("FALCONEYE_DETECT_MODEL", "yolov8s.pt"))
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--cameras", type=int, default=4)
+    ap.add_argument("--frames", type=int, default=30, help="frames per camera")
+    ap.add_argument("--journal", help="camera journal directory, e.g. journal/cam1")
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--max-batch", type=int, default=8)
+    ap.add_argument("--max-wait-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.model).to(args.device)
+    frames = load_frames(args)
+    model(frames[0], verbose=False)  # warm-up
+
+    lock = threading.Lock()
+
+    def per_camera(i, frame):
+        # The ultralytics predictor is not thread-safe, so the old loops effectively serialized
+        with lock:
+            model(frame, conf=0.5, verbose=False)
+
+    scheduler = InferenceScheduler(model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+
+    def batched(i, frame):
+        scheduler.infer(frame, key=f"cam{i}", conf=0.5, verbose=False)
+
+    print(f"{args.model} on {args.device}, {args.cameras} cameras x {len(frames)} frames "
+          f"({frames[0].shape[1]}x{frames[0].shape[0]})")
+    baseline = run_cameras(args.cameras, frames, per_camera)
+    print(f"  per-camera calls: {baseline:7.1f} frames/s")
+    scheduled = run_cameras(args.cameras, frames, batched)
+    stats = scheduler.stats()
+    print(f"  batched:          {scheduled:7.1f} frames/s  ({scheduled / baseline:.2f}x, "
+          f"mean batch {stats['batch_size_mean']}, forward p50 {stats['forward_p50_ms']} ms)")
+    scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy `buffer += chunk` MJPEG splitting vs. mjpeg_parser.MjpegParser.
+
+Usage:
+    # Record ~10s of a real camera stream, then benchmark it
+    python tools/bench_mjpeg_parser.py --record http://10.103.190.170:8081/ --seconds 10 --save stream720.mjpeg
+    python tools/bench_mjpeg_parser.py --input stream720.mjpeg
+
+    # Without a recording a synthetic 1280x720 stream is generated with OpenCV
+    python tools/bench_mjpeg_parser.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mjpeg_parser import MjpegParser, boundary_from_content_type  # noqa: E402
+
+
+def legacy_split(chunks):
+    """The loop previously duplicated in backend.py (gen_mjpeg_live_stream et al.)."""
+    frames = 0
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        while b'\xff\xd8' in buffer and b'\xff\xd9' in buffer:
+            start = buffer.find(b'\xff\xd8')
+            end = buffer.find(b'\xff\xd9', start) + 2
+            if end > start:
+                jpeg_data = buffer[start:end]
+                buffer = buffer[end:]
+                frames += len(jpeg_data) > 0
+            else:
+                buffer = buffer[start:]
+                break
+    return frames
+
+
+def parser_split(chunks, boundary):
+    frames = 0
+    parser = MjpegParser(boundary)
+    for chunk in chunks:
+        for _ in parser.feed(chunk):
+            frames += 1
+    return frames
+
+
+def synthesize_stream(n_frames, width, height, quality):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    # Smooth gradient plus noise gives JPEG sizes close to a real 720p scene
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = ((xx / width) * 180 + (yy / height) * 60).astype(np.uint8)
+    parts = []
+    for i in range(n_frames):
+        noise = rng.integers(0, 40, size=(height, width), dtype=np.uint8)
+        gray = cv2.add(base, noise)
+        img = cv2.merge([gray, np.roll(gray, i * 7, axis=1), 255 - gray])
+        ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        jpeg = buf.tobytes()
+        parts.append(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                     + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+    return b''.join(parts), 'frame'
+
+
+def record_stream(url, seconds):
+    import requests
+
+    data = bytearray()
+    with requests.get(url, stream=True, timeout=(3, 5)) as r:
+        boundary = boundary_from_content_type(r.headers.get('Content-Type'))
+        deadline = time.time() + seconds
+        for chunk in r.iter_content(chunk_size=16384):
+            data += chunk
+            if time.time() > deadline:
+                break
+    return bytes(data), boundary
+
+
+def sniff_boundary(data):
+    if data.startswith(b'--'):
+        line = data[2:data.find(b'\r\n')]
+        return line.decode('latin-1') or None
+    return None
+
+
+def bench(name, fn, chunks, total_bytes, repeat):
+    best = None
+    frames = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frames = fn(chunks)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    mb_s = total_bytes / best / 1e6
+    print(f"{name:<17} {frames:>6} frames  {best * 1000:9.1f} ms  {mb_s:9.1f} MB/s  {frames / best:9.0f} frames/s")
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--input', help='recorded multipart MJPEG stream file')
+    ap.add_argument('--record', metavar='URL', help='record a live MJPEG stream before benchmarking')
+    ap.add_argument('--seconds', type=float, default=10.0, help='recording length for --record')
+    ap.add_argument('--save', help='write the recorded/synthesized stream to this file')
+    ap.add_argument('--frames', type=int, default=120, help='synthetic frame count')
+    ap.add_argument('--width', type=int, default=1280)
+    ap.add_argument('--height', type=int, default=720)
+    ap.add_argument('--quality', type=int, default=85)
+    ap.add_argument('--chunk-size', type=int, default=16384, help='bytes per simulated socket read')
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            data = f.read()
+        boundary = sniff_boundary(data)
+        source = args.input
+    elif args.record:
+        data, boundary = record_stream(args.record, args.seconds)
+        source = args.record
+    else:
+        data, boundary = synthesize_stream(args.frames, args.width, args.height, args.quality)
+        source = f"synthetic {args.width}x{args.height} q{args.quality}"
+    if args.save:
+        with open(args.save, 'wb') as f:
+            f.write(data)
+
+    chunks = [data[i:i + args.chunk_size] for i in range(0, len(data), args.chunk_size)]
+    print(f"Source: {source} ({len(data) / 1e6:.1f} MB, {len(chunks)} chunks of {args.chunk_size} B, boundary={boundary!r})")
+    legacy = bench('legacy', legacy_split, chunks, len(data), args.repeat)
+    parsed = bench('MjpegParser', lambda c: parser_split(c, boundary), chunks, len(data), args.repeat)
+    scanned = bench('MjpegParser/scan', lambda c: parser_split(c, None), chunks, len(data), args.repeat)
+    print(f"Speedup: {legacy / parsed:.1f}x (multipart), {legacy / scanned:.1f}x (SOI/EOI scan)")
+
+
+if __name__ == '__main__':
+    main()
@@ -23,8 +23,9 @@ def update_camera_ip(new_ip):
         content = f.read()
     
     # Update the camera URL
-    old_pattern = r'"cam1": "http://[^"]+/jpg"'
-    new_url = f'"cam1": "http://{new_ip}/jpg"'
+    # Matches both '"cam1": "http://.../jpg"' and '"cam1": {"url": "http://.../jpg"'
+    old_pattern = r'("cam1": (?:\{"url": )?)"http://[^"]+/jpg"'
+    new_url = f'\\1"http://{new_ip}/jpg"'
     
     if re.search(old_pattern, content):
         new_content = re.sub(old_pattern, new_url, content)